@@ -21,6 +21,14 @@ def create_app():
     migrate.init_app(app, db)
 
     from .routes import bp
+    from .metricas import instrumentar_app
+    from .cache import configurar_cache
+    from .respostas import configurar_respostas
+
+    configurar_cache(app)
+    configurar_respostas(app)
+
+    instrumentar_app(app)
 
     # Importar e registrar rotas aqui
     app.register_blueprint(bp)
@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+import zlib
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from . import db
+from .metricas import DURACAO_TAREFA
+
+def chave_do_lock(nome):
+    #pg_advisory_lock recebe um bigint: o crc32 do nome da tarefa basta
+    return zlib.crc32(f"legitrack:{nome}".encode('utf-8'))
+
+class Tarefa:
+    def __init__(self, nome, funcao, intervalo, jitter=0.1, exclusiva=True, atraso_inicial=None):
+        self.nome = nome
+        self.funcao = funcao
+        self.intervalo = intervalo
+        self.jitter = jitter
+        self.exclusiva = exclusiva #False: todas as réplicas rodam (ex.: consumidores da fila)
+
+        #Sem atraso_inicial, a primeira execução sai logo (espalhada em até 10s entre as réplicas)
+        if atraso_inicial is None:
+            atraso_inicial = random.uniform(0, min(10, intervalo * jitter))
+        self.proxima_execucao = time.monotonic() + atraso_inicial
+        self.em_execucao = False
+        self.conexao_lock = None #Conexão que segura o advisory lock enquanto esta réplica for a líder
+
+    def agendar_proxima(self, espera=None):
+        if espera is None:
+            espera = self.intervalo * (1 + random.uniform(-self.jitter, self.jitter))
+        self.proxima_execucao = time.monotonic() + espera
+
+class Agendador:
+    """
+    Roda cada tarefa na sua própria cadência (com jitter), numa thread própria.
+    Uma tarefa nunca roda sobreposta a ela mesma: dentro do processo por causa
+    de em_execucao, e entre réplicas por causa de um advisory lock do Postgres
+    por tarefa. A réplica que pega o lock vira a líder daquela tarefa e o mantém
+    enquanto a conexão estiver viva; as outras ficam de reserva e tentam de
+    novo a cada intervalo_reserva segundos.
+    """
+
+    def __init__(self, app, prefixo="WORKER (Agendador)", intervalo_reserva=30):
+        self.app = app
+        self.prefixo = prefixo
+        self.intervalo_reserva = intervalo_reserva
+        self.tarefas = []
+        self._lock = threading.Lock()
+
+    def adicionar(self, nome, funcao, intervalo, jitter=0.1, exclusiva=True, atraso_inicial=None):
+        self.tarefas.append(Tarefa(nome, funcao, intervalo, jitter, exclusiva, atraso_inicial))
+
+    def _soltar_lideranca(self, tarefa):
+        if tarefa.conexao_lock is not None:
+            try:
+                #close() devolve a conexão ao pool com o lock de sessão ainda preso: solta antes
+                tarefa.conexao_lock.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": chave_do_lock(tarefa.nome)})
+                tarefa.conexao_lock.commit()
+                tarefa.conexao_lock.close()
+            except SQLAlchemyError:
+                #Conexão quebrada: descarta em vez de devolver ao pool
+                tarefa.conexao_lock.invalidate()
+            tarefa.conexao_lock = None
+
+    def _garantir_lideranca(self, tarefa):
+        """
+        True se esta réplica é (ou acabou de virar) a líder da tarefa.
+        """
+        if tarefa.conexao_lock is not None:
+            try:
+                #A conexão caiu (ex.: restart do banco)? Então o lock também se foi
+                tarefa.conexao_lock.execute(text("SELECT 1"))
+                #Sem isso a conexão do líder fica "idle in transaction" até o próximo ciclo
+                tarefa.conexao_lock.rollback()
+                return True
+            except SQLAlchemyError:
+                print(f"{self.prefixo}: [AVISO] Conexão do lock de '{tarefa.nome}' perdida. Disputando a liderança de novo.")
+                self._soltar_lideranca(tarefa)
+
+        conexao = db.engine.connect()
+        try:
+            conseguiu = conexao.execute(text("SELECT pg_try_advisory_lock(:chave)"), {"chave": chave_do_lock(tarefa.nome)}).scalar()
+            #Fecha a transação implícita, mas mantém a conexão (e o lock, que é de sessão)
+            conexao.commit()
+        except SQLAlchemyError:
+            conexao.close()
+            raise
+
+        if not conseguiu:
+            conexao.close()
+            return False
+
+        tarefa.conexao_lock = conexao
+        print(f"{self.prefixo}: Esta réplica agora é a líder da tarefa '{tarefa.nome}'.")
+        return True
+
+    def _rodar(self, tarefa):
+        espera = None
+        with self.app.app_context():
+            try:
+                if tarefa.exclusiva and not self._garantir_lideranca(tarefa):
+                    espera = self.intervalo_reserva
+                    return
+
+                inicio = time.perf_counter()
+                #Tarefas não exclusivas rodam a cada poucos segundos: quem loga é a própria função
+                if tarefa.exclusiva:
+                    print(f"\n{self.prefixo}: {datetime.now()} - Iniciando '{tarefa.nome}'...")
+                tarefa.funcao()
+                DURACAO_TAREFA.labels(tarefa.nome).observe(time.perf_counter() - inicio)
+                if tarefa.exclusiva:
+                    print(f"{self.prefixo}: '{tarefa.nome}' concluída em {time.perf_counter() - inicio:.1f}s.")
+
+            except Exception as e:
+                db.session.rollback()
+                print(f"{self.prefixo}: [ERRO] Tarefa '{tarefa.nome}' falhou: {e}")
+            finally:
+                db.session.remove()
+                with self._lock:
+                    tarefa.agendar_proxima(espera)
+                    tarefa.em_execucao = False
+
+    def executar(self, intervalo_verificacao=1.0):
+        print(f"{self.prefixo}: Tarefas: " + ", ".join(f"{t.nome} (a cada {t.intervalo}s)" for t in self.tarefas))
+        try:
+            while True:
+                agora = time.monotonic()
+                with self._lock:
+                    prontas = [t for t in self.tarefas if not t.em_execucao and agora >= t.proxima_execucao]
+                    for tarefa in prontas:
+                        tarefa.em_execucao = True
+
+                for tarefa in prontas:
+                    threading.Thread(target=self._rodar, args=(tarefa,), name=f"tarefa-{tarefa.nome}", daemon=True).start()
+
+                time.sleep(intervalo_verificacao)
+        finally:
+            for tarefa in self.tarefas:
+                self._soltar_lideranca(tarefa)
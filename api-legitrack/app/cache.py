@@ -0,0 +1,105 @@
+import os
+import time
+from flask import has_app_context
+from flask_caching import Cache
+from . import db
+from .models import TP_Temas, rel_temas
+
+cache = Cache()
+
+PREFIXO_CHAVE = "projetos_iniciais"
+
+def configurar_cache(app):
+    """
+    Redis (CACHE_REDIS_URL) é compartilhado entre os workers do gunicorn e o
+    worker de ingestão, que invalida as entradas. Sem ele, cai num cache em
+    memória por processo, que só expira pelo tempo.
+    """
+    url_redis = os.environ.get('CACHE_REDIS_URL')
+    app.config.setdefault('CACHE_TYPE', 'RedisCache' if url_redis else 'SimpleCache')
+    app.config.setdefault('CACHE_REDIS_URL', url_redis)
+    app.config.setdefault('CACHE_DEFAULT_TIMEOUT', int(os.environ.get('CACHE_TIMEOUT', 300)))
+    app.config.setdefault('CACHE_KEY_PREFIX', 'legitrack:')
+    cache.init_app(app)
+
+'''
+=================== Chaves versionadas por tema ===================
+'''
+
+#Cada tema tem uma versão no cache; "todos" é a da lista sem filtro.
+#A chave de uma consulta inclui as versões dos temas dela, então mudar
+#a versão de um tema invalida exatamente as consultas que o contêm
+
+def normalizar_temas(ids_temas):
+    """
+    [5, 3, 5] -> [3, 5]. ValueError/TypeError se algum id não for inteiro.
+    """
+    return sorted({int(id_tema) for id_tema in ids_temas})
+
+def _chave_versao(tema):
+    return f"{PREFIXO_CHAVE}:versao:{tema}"
+
+def chave_da_consulta(ids_temas, *extras):
+    """
+    Chave da consulta com as versões atuais dos temas, ou None se o cache estiver fora do ar.
+    """
+    temas = ids_temas or ["todos"]
+    try:
+        versoes = cache.get_many(*[_chave_versao(tema) for tema in temas])
+    except Exception as e:
+        print(f"CACHE: [AVISO] Falha ao ler as versões dos temas: {e}")
+        return None
+    partes = [",".join(map(str, temas)), ".".join(str(versao or 0) for versao in versoes), *map(str, extras)]
+    return f"{PREFIXO_CHAVE}:" + ":".join(partes)
+
+def ler(chave):
+    if chave is None:
+        return None
+    try:
+        return cache.get(chave)
+    except Exception as e:
+        print(f"CACHE: [AVISO] Falha ao ler do cache: {e}")
+        return None
+
+def gravar(chave, valor):
+    if chave is None:
+        return
+    try:
+        cache.set(chave, valor)
+    except Exception as e:
+        print(f"CACHE: [AVISO] Falha ao gravar no cache: {e}")
+
+'''
+=================== Invalidação (chamada pela ingestão) ===================
+'''
+
+def invalidar_temas(ids_temas):
+    """
+    Muda a versão dos temas e a da lista sem filtro. Fora de um app context (ou com o cache fora do ar) não faz nada.
+    """
+    if not has_app_context():
+        return
+
+    nova_versao = time.time_ns()
+    try:
+        #timeout 0: as versões não expiram (as entradas, sim)
+        cache.set_many({_chave_versao(tema): nova_versao for tema in [*ids_temas, "todos"]}, timeout=0)
+    except Exception as e:
+        print(f"CACHE: [AVISO] Falha ao invalidar o cache dos temas {sorted(ids_temas)}: {e}")
+
+def invalidar_projetos(ids_projetos):
+    """
+    Invalida as consultas afetadas por projetos recém-gravados (depois do
+    commit): as de todos os temas que eles têm no banco.
+    """
+    if not ids_projetos or not has_app_context():
+        return
+
+    invalidar_temas(db.session.scalars(
+        db.select(rel_temas.c.id_tema).where(rel_temas.c.id_projeto.in_(ids_projetos)).distinct()
+    ).all())
+
+def invalidar_tudo():
+    if not has_app_context():
+        return
+    invalidar_temas(db.session.scalars(db.select(TP_Temas.id_tema)).all())
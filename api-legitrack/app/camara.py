@@ -0,0 +1,147 @@
+import json
+import os
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse, parse_qs
+from urllib3.util import make_headers
+from .limitador import LimitadorAdaptativo, Disjuntor
+from .metricas import CAMARA_DURACAO, endpoint_da_url
+
+#orjson é opcional: se não estiver instalado, usa o json da biblioteca padrão
+try:
+    import orjson
+    _decodificar_json = orjson.loads
+except ImportError:
+    _decodificar_json = json.loads
+
+CAMARA_API_URL = os.environ.get('CAMARA_API_URL', 'https://dadosabertos.camara.leg.br/api/v2')
+CAMARA_TIMEOUT_CONEXAO = float(os.environ.get('CAMARA_TIMEOUT_CONEXAO', 5))
+CAMARA_TIMEOUT_LEITURA = float(os.environ.get('CAMARA_TIMEOUT_LEITURA', 20))
+CAMARA_TENTATIVAS = int(os.environ.get('CAMARA_TENTATIVAS', 3))
+
+#Requisições por segundo (por processo). O limitador parte da inicial e se ajusta entre a mínima e a máxima
+CAMARA_TAXA_INICIAL = float(os.environ.get('CAMARA_TAXA_INICIAL', 10))
+CAMARA_TAXA_MINIMA = float(os.environ.get('CAMARA_TAXA_MINIMA', 0.5))
+CAMARA_TAXA_MAXIMA = float(os.environ.get('CAMARA_TAXA_MAXIMA', 50))
+
+STATUS_TRANSITORIOS = (429, 500, 502, 503, 504)
+
+def segundos_retry_after(resposta):
+    try:
+        return max(0.0, float(resposta.headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return None
+
+def link_da_pagina(corpo, rel):
+    for link in corpo.get('links', []):
+        if link.get('rel') == rel:
+            return link.get('href')
+    return None
+
+class CamaraClient:
+    """
+    Cliente HTTP da API de Dados Abertos da Câmara, compartilhado pelo
+    worker e pelos seeders. Mantém um pool de conexões keep-alive, pede
+    respostas comprimidas e refaz requisições que falham de forma transitória.
+
+    Toda chamada passa pelo limitador (taxa adaptativa) e pelo disjuntor
+    (pausa quando a API cai). As novas tentativas ficam aqui, e não no urllib3,
+    para que cada 429/5xx chegue ao limitador.
+    """
+
+    def __init__(self, url_base=None, timeout=None, tentativas=None, backoff=1.0, tamanho_pool=32,
+                 limitador=None, disjuntor=None):
+        self.url_base = (url_base or CAMARA_API_URL).rstrip('/')
+        self.timeout = timeout or (CAMARA_TIMEOUT_CONEXAO, CAMARA_TIMEOUT_LEITURA)
+        self.tentativas = CAMARA_TENTATIVAS if tentativas is None else tentativas
+        self.backoff = backoff
+
+        self.limitador = limitador or LimitadorAdaptativo(CAMARA_TAXA_INICIAL, CAMARA_TAXA_MINIMA, CAMARA_TAXA_MAXIMA)
+        self.disjuntor = disjuntor or Disjuntor()
+
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=tamanho_pool, max_retries=0)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adaptador)
+        self.session.mount('http://', adaptador)
+        self.session.headers.update(make_headers(keep_alive=True, accept_encoding=True))
+        self.session.headers['Accept'] = 'application/json'
+
+    def url(self, caminho):
+        if caminho.startswith('http://') or caminho.startswith('https://'):
+            return caminho
+        return f"{self.url_base}/{caminho.lstrip('/')}"
+
+    def _get(self, url, params, timeout):
+        for tentativa in range(self.tentativas + 1):
+            ultima = tentativa == self.tentativas
+            self.disjuntor.permitir()
+            self.limitador.adquirir()
+
+            inicio = time.monotonic()
+            try:
+                resposta = self.session.get(url, params=params, timeout=timeout)
+            except requests.exceptions.RequestException as e:
+                #Toda falha chega ao disjuntor: uma sonda sem resultado o deixaria meio-aberto para sempre
+                CAMARA_DURACAO.labels(endpoint_da_url(url, self.url_base), 'erro').observe(time.monotonic() - inicio)
+                self.limitador.registrar(None, time.monotonic() - inicio)
+                self.disjuntor.registrar_falha()
+                #Só conexão e timeout valem nova tentativa (ex.: corpo truncado ou redirects em loop não)
+                if ultima or not isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+                    raise
+                time.sleep(self.backoff * 2 ** tentativa)
+                continue
+
+            latencia = time.monotonic() - inicio
+            CAMARA_DURACAO.labels(endpoint_da_url(url, self.url_base), resposta.status_code).observe(latencia)
+            self.limitador.registrar(resposta.status_code, latencia)
+            if resposta.status_code >= 500:
+                self.disjuntor.registrar_falha()
+            else:
+                #429 também prova que a API está de pé: quem cuida dele é o limitador
+                self.disjuntor.registrar_sucesso()
+
+            if resposta.status_code not in STATUS_TRANSITORIOS or ultima:
+                return resposta
+
+            espera = segundos_retry_after(resposta)
+            if espera is not None:
+                self.limitador.pausar(espera)
+            else:
+                time.sleep(self.backoff * 2 ** tentativa)
+
+    def get_json(self, caminho, params=None, timeout=None):
+        resposta = self._get(self.url(caminho), params, timeout or self.timeout)
+        resposta.raise_for_status()
+        return _decodificar_json(resposta.content)
+
+    def get_dados(self, caminho, params=None, timeout=None):
+        return self.get_json(caminho, params, timeout).get('dados')
+
+    def paginas(self, caminho, params=None, timeout=None):
+        """
+        Gera o corpo de cada página, seguindo links[rel=next] até a última
+        ou até uma página sem dados.
+        """
+        url = self.url(caminho)
+        while url:
+            corpo = self.get_json(url, params, timeout)
+            if not corpo.get('dados'):
+                return
+            yield corpo
+
+            #O link 'next' já traz todos os parâmetros da busca
+            url = link_da_pagina(corpo, 'next')
+            params = None
+
+    def itens(self, caminho, params=None, timeout=None):
+        for corpo in self.paginas(caminho, params, timeout):
+            yield from corpo['dados']
+
+    def total_de_paginas(self, caminho, params=None, timeout=None):
+        corpo = self.get_json(caminho, params, timeout)
+        link_ultima = link_da_pagina(corpo, 'last')
+        if not link_ultima:
+            return 1 if corpo.get('dados') else 0
+        return int(parse_qs(urlparse(link_ultima).query)['pagina'][0])
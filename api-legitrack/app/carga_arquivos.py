@@ -0,0 +1,267 @@
+import argparse
+import csv
+import gzip
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from . import db
+from .models import TB_Projeto
+from .gravacao import montar_item, montar_tramitacoes, montar_temas, confirmar_lote
+from .carga_copy import CargaStaging
+
+#ijson é opcional: só é necessário para ler os arquivos .json em streaming
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+PREFIXO = "CARGA (Arquivos)"
+TAMANHO_BLOCO = 1000
+
+'''
+=================== Leitura em streaming dos arquivos anuais ===================
+'''
+
+def abrir_arquivo(caminho, binario=False):
+    abrir = gzip.open if caminho.endswith('.gz') else open
+    if binario:
+        return abrir(caminho, 'rb')
+    #utf-8-sig descarta o BOM que vem no começo dos CSVs da Câmara
+    return abrir(caminho, 'rt', encoding='utf-8-sig', newline='')
+
+def ler_registros(caminho):
+    """
+    Gera um dict por registro do arquivo, sem carregá-lo inteiro na memória.
+    Aceita .csv (separado por ';', como os da Câmara) e .json ({"dados": [...]}),
+    opcionalmente comprimidos com gzip.
+    """
+    nome = caminho[:-3] if caminho.endswith('.gz') else caminho
+
+    if nome.endswith('.csv'):
+        with abrir_arquivo(caminho) as arquivo:
+            yield from csv.DictReader(arquivo, delimiter=';')
+
+    elif nome.endswith('.json'):
+        if ijson is None:
+            raise RuntimeError("Para ler .json em streaming instale o pacote 'ijson' (ou use os arquivos .csv).")
+        with abrir_arquivo(caminho, binario=True) as arquivo:
+            yield from ijson.items(arquivo, 'dados.item')
+
+    else:
+        raise ValueError(f"Formato de arquivo não suportado: {caminho}")
+
+def _campo(registro, *nomes):
+    for nome in nomes:
+        valor = registro.get(nome)
+        if valor not in (None, ''):
+            return valor
+    return None
+
+def id_da_uri(uri):
+    return int(str(uri).rstrip('/').rsplit('/', 1)[-1])
+
+def _id_proposicao(registro):
+    id_direto = _campo(registro, 'idProposicao', 'id_proposicao')
+    if id_direto is not None:
+        return int(id_direto)
+    return id_da_uri(_campo(registro, 'uriProposicao'))
+
+def ler_proposicoes(caminho):
+    """
+    Gera (projeto_resumido, status) no mesmo formato que a API devolve,
+    a partir das colunas id/ementa/... e ultimoStatus_* do arquivo.
+    """
+    for registro in ler_registros(caminho):
+        status = registro.get('ultimoStatus')
+        if not isinstance(status, dict):
+            status = {chave[len('ultimoStatus_'):]: valor for chave, valor in registro.items() if chave and chave.startswith('ultimoStatus_')}
+
+        projeto_resumido = {
+            "id": registro.get('id'),
+            "ementa": registro.get('ementa'),
+            "siglaTipo": registro.get('siglaTipo'),
+            "numero": registro.get('numero'),
+            "ano": registro.get('ano')
+        }
+        status_api = {
+            "dataHora": _campo(status, 'dataHora'),
+            "siglaOrgao": _campo(status, 'siglaOrgao'),
+            "despacho": _campo(status, 'despacho'),
+            "codSituacao": _campo(status, 'idSituacao', 'codSituacao'),
+            "codTipoTramitacao": _campo(status, 'idTipoTramitacao', 'codTipoTramitacao')
+        }
+        yield projeto_resumido, (status_api if status_api["dataHora"] else None)
+
+def ler_temas(caminho):
+    """
+    Gera (id_projeto, tema) a partir de proposicoesTemas-AAAA.
+    """
+    for registro in ler_registros(caminho):
+        try:
+            yield _id_proposicao(registro), {"cod": _campo(registro, 'codTema', 'cod')}
+        except (ValueError, TypeError):
+            print(f"{PREFIXO}: [AVISO] Linha de tema sem proposição válida. Pulando item.")
+
+def ler_tramitacoes(caminho):
+    """
+    Gera (id_projeto, tramitacao) a partir de um arquivo de tramitações.
+    """
+    for registro in ler_registros(caminho):
+        try:
+            yield _id_proposicao(registro), {
+                "sequencia": _campo(registro, 'sequencia'),
+                "dataHora": _campo(registro, 'dataHora'),
+                "codSituacao": _campo(registro, 'codSituacao', 'idSituacao'),
+                "codTipoTramitacao": _campo(registro, 'codTipoTramitacao', 'idTipoTramitacao')
+            }
+        except (ValueError, TypeError):
+            print(f"{PREFIXO}: [AVISO] Linha de tramitação sem proposição válida. Pulando item.")
+
+def em_blocos(iteravel, tamanho):
+    iterador = iter(iteravel)
+    while True:
+        bloco = list(islice(iterador, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+'''
+=================== Gravação (pelo caminho em lote) ===================
+'''
+
+def carregar_proposicoes(caminho, tamanho_bloco=TAMANHO_BLOCO, staging=None):
+    novos = atualizados = 0
+    for bloco in em_blocos(ler_proposicoes(caminho), tamanho_bloco):
+        itens = []
+        for projeto_resumido, status in bloco:
+            try:
+                itens.append(montar_item(projeto_resumido, status, [], [], PREFIXO))
+            except (ValueError, TypeError):
+                print(f"{PREFIXO}: [AVISO] Proposição sem ID válido ({projeto_resumido.get('id')}). Pulando item.")
+
+        if staging:
+            #Caminho COPY: só conta o que foi para a staging; o merge acontece no fim da carga
+            staging.adicionar(itens)
+            novos += len(itens)
+            continue
+
+        pn, pa, _, _ = confirmar_lote(itens, PREFIXO)
+        novos += pn
+        atualizados += pa
+        print(f"{PREFIXO}: {novos + atualizados} proposições gravadas...")
+    return novos, atualizados
+
+def _projetos_existentes(ids_projetos):
+    return set(db.session.scalars(db.select(TB_Projeto.id_projeto).where(TB_Projeto.id_projeto.in_(ids_projetos))).all())
+
+def carregar_relacoes(pares, campo, tamanho_bloco=TAMANHO_BLOCO, staging=None):
+    """
+    Grava tramitações ou temas (campo) vindos de um gerador de (id_projeto, item_api).
+    Linhas de projetos que não estão no banco são descartadas (com staging, no merge).
+    """
+    montar = montar_tramitacoes if campo == 'tramitacoes' else montar_temas
+    gravados = descartados = 0
+
+    for bloco in em_blocos(pares, tamanho_bloco):
+        por_projeto = defaultdict(list)
+        for id_projeto, item_api in bloco:
+            por_projeto[id_projeto].append(item_api)
+
+        existentes = None if staging else _projetos_existentes(list(por_projeto))
+        itens = []
+        for id_projeto, itens_api in por_projeto.items():
+            if existentes is not None and id_projeto not in existentes:
+                descartados += len(itens_api)
+                continue
+            item = {"id_projeto": id_projeto, "projeto": None, "tramitacoes": [], "temas": []}
+            item[campo] = montar(id_projeto, itens_api, PREFIXO)
+            itens.append(item)
+
+        if staging:
+            staging.adicionar(itens)
+            gravados += sum(len(item[campo]) for item in itens)
+            continue
+
+        _, _, tramitacoes_novas, _ = confirmar_lote(itens, PREFIXO)
+        gravados += tramitacoes_novas if campo == 'tramitacoes' else sum(len(item['temas']) for item in itens)
+
+    if descartados:
+        print(f"{PREFIXO}: [AVISO] {descartados} linhas de {campo} descartadas (projeto ausente no banco).")
+    return gravados
+
+def arquivos_do_ano(diretorio, ano):
+    """
+    Procura no diretório os arquivos anuais com os nomes usados pela Câmara.
+    """
+    encontrados = {}
+    for tipo, prefixo_arquivo in (('proposicoes', 'proposicoes'), ('temas', 'proposicoesTemas'), ('tramitacoes', 'tramitacoes')):
+        for extensao in ('.csv', '.csv.gz', '.json', '.json.gz'):
+            caminho = os.path.join(diretorio, f"{prefixo_arquivo}-{ano}{extensao}")
+            if os.path.exists(caminho):
+                encontrados[tipo] = caminho
+                break
+    return encontrados
+
+def carregar_ano(arquivos, staging=None):
+    """
+    Carrega proposições, depois temas e tramitações, sem nenhuma chamada HTTP.
+    Com staging (CargaStaging), só enfileira as linhas no COPY; quem grava é staging.mesclar().
+    """
+    inicio = time.perf_counter()
+    novos = atualizados = temas = tramitacoes = 0
+
+    if 'proposicoes' in arquivos:
+        print(f"{PREFIXO}: Lendo {arquivos['proposicoes']}...")
+        novos, atualizados = carregar_proposicoes(arquivos['proposicoes'], staging=staging)
+    if 'temas' in arquivos:
+        print(f"{PREFIXO}: Lendo {arquivos['temas']}...")
+        temas = carregar_relacoes(ler_temas(arquivos['temas']), 'temas', staging=staging)
+    if 'tramitacoes' in arquivos:
+        print(f"{PREFIXO}: Lendo {arquivos['tramitacoes']}...")
+        tramitacoes = carregar_relacoes(ler_tramitacoes(arquivos['tramitacoes']), 'tramitacoes', staging=staging)
+
+    duracao = time.perf_counter() - inicio
+    if staging:
+        print(f"{PREFIXO}: {novos} proposições, {temas} ligações de tema e {tramitacoes} tramitações enviadas para a staging em {duracao:.1f}s.")
+        return
+    print(f"{PREFIXO}: {novos} projetos novos, {atualizados} atualizados, {temas} ligações de tema processadas, {tramitacoes} tramitações novas em {duracao:.1f}s.")
+
+if __name__ == "__main__":
+    from . import create_app
+
+    parser = argparse.ArgumentParser(description="Carga a partir dos arquivos anuais da Câmara (sem chamadas à API).")
+    parser.add_argument('--diretorio', help="Diretório com proposicoes-AAAA, proposicoesTemas-AAAA e tramitacoes-AAAA.")
+    parser.add_argument('--anos', help="Anos a carregar do diretório, ex: 2023,2024.")
+    parser.add_argument('--proposicoes', help="Arquivo de proposições.")
+    parser.add_argument('--temas', help="Arquivo de temas das proposições.")
+    parser.add_argument('--tramitacoes', help="Arquivo de tramitações.")
+    parser.add_argument('--copy', action='store_true', help="Carga inicial via COPY em tabelas de staging, com um merge só no fim.")
+    args = parser.parse_args()
+
+    app = create_app()
+    app.app_context().push()
+
+    print(f"\n--- [CARGA DE ARQUIVOS]: {datetime.now()} - INICIANDO ---")
+
+    staging = CargaStaging(db.engine, PREFIXO) if args.copy else None
+
+    if args.diretorio and args.anos:
+        for ano in (a.strip() for a in args.anos.split(',') if a.strip()):
+            arquivos = arquivos_do_ano(args.diretorio, ano)
+            if not arquivos:
+                print(f"{PREFIXO}: [AVISO] Nenhum arquivo de {ano} em {args.diretorio}. Pulando.")
+                continue
+            print("\n" + "="*30 + f" ANO {ano} " + "="*30)
+            carregar_ano(arquivos, staging)
+    else:
+        arquivos = {tipo: getattr(args, tipo) for tipo in ('proposicoes', 'temas', 'tramitacoes') if getattr(args, tipo)}
+        if not arquivos:
+            parser.error("Informe --diretorio e --anos, ou ao menos um entre --proposicoes, --temas e --tramitacoes.")
+        carregar_ano(arquivos, staging)
+
+    if staging:
+        staging.mesclar()
+
+    print("\n--- [CARGA DE ARQUIVOS]: CONCLUÍDA ---")
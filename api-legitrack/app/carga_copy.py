@@ -0,0 +1,251 @@
+import io
+import time
+from sqlalchemy import text
+from .agendador import chave_do_lock
+from .metricas import contar_linhas, contar_projetos
+from .cache import invalidar_tudo
+from .feed import feed_precalculado, recalcular_feeds
+from .leitura import ATUALIZAR_CARDS
+
+#Linhas acumuladas em memória antes de cada COPY
+TAMANHO_BLOCO_COPY = 20000
+
+TABELAS_DESTINO = ('camara.tb_projeto', 'camara.rl_tramitacoes', 'camara.rl_temas', 'camara.projeto_card')
+
+#Staging sem WAL e sem constraints: só recebe o COPY. `ordem` diz qual linha chegou por último.
+#São tabelas TEMP da sessão da carga: cargas concorrentes não se misturam e uma carga que
+#cai não deixa staging para trás
+STAGING = {
+    "pg_temp.stg_projeto": (
+        "id_projeto integer, titulo_projeto text, descricao text, ano_inicio varchar(4), data_hora timestamp, "
+        "sigla_orgao varchar(100), despacho text, id_ultima_situacao integer, id_ultima_tramitacao integer",
+        ('id_projeto', 'titulo_projeto', 'descricao', 'ano_inicio', 'data_hora', 'sigla_orgao', 'despacho', 'id_ultima_situacao', 'id_ultima_tramitacao')
+    ),
+    "pg_temp.stg_tramitacoes": (
+        "id_projeto integer, sequencia integer, data_hora timestamp, id_situacao integer, id_tramitacao integer",
+        ('id_projeto', 'sequencia', 'data_hora', 'id_situacao', 'id_tramitacao')
+    ),
+    "pg_temp.stg_temas": (
+        "id_projeto integer, id_tema integer",
+        ('id_projeto', 'id_tema')
+    )
+}
+
+'''
+=================== Merge (um comando por tabela) ===================
+'''
+
+#Cards de todo projeto que passou pela staging (temas novos também mudam o card)
+CARDS_DA_STAGING = "p.id_projeto IN (SELECT id_projeto FROM pg_temp.stg_projeto UNION SELECT id_projeto FROM pg_temp.stg_temas)"
+
+#Projetos com situação/tramitação desconhecida ficam de fora, como no caminho linha a linha (onde a FK recusaria)
+MERGE_PROJETOS = """
+WITH gravados AS (
+    INSERT INTO camara.tb_projeto (id_projeto, titulo_projeto, descricao, ano_inicio, data_hora, sigla_orgao, despacho, id_ultima_situacao, id_ultima_tramitacao)
+    SELECT DISTINCT ON (s.id_projeto)
+        s.id_projeto, s.titulo_projeto, s.descricao, s.ano_inicio, s.data_hora, s.sigla_orgao, s.despacho, s.id_ultima_situacao, s.id_ultima_tramitacao
+    FROM pg_temp.stg_projeto s
+    WHERE (s.id_ultima_situacao IS NULL OR EXISTS (SELECT 1 FROM camara.tp_situacao t WHERE t.id_situacao = s.id_ultima_situacao))
+      AND (s.id_ultima_tramitacao IS NULL OR EXISTS (SELECT 1 FROM camara.tp_tramitacao t WHERE t.id_tramitacao = s.id_ultima_tramitacao))
+    ORDER BY s.id_projeto, s.ordem DESC
+    ON CONFLICT (id_projeto) DO UPDATE SET
+        titulo_projeto = EXCLUDED.titulo_projeto,
+        descricao = EXCLUDED.descricao,
+        ano_inicio = EXCLUDED.ano_inicio,
+        data_hora = COALESCE(EXCLUDED.data_hora, tb_projeto.data_hora),
+        sigla_orgao = COALESCE(EXCLUDED.sigla_orgao, tb_projeto.sigla_orgao),
+        despacho = COALESCE(EXCLUDED.despacho, tb_projeto.despacho),
+        id_ultima_situacao = COALESCE(EXCLUDED.id_ultima_situacao, tb_projeto.id_ultima_situacao),
+        id_ultima_tramitacao = COALESCE(EXCLUDED.id_ultima_tramitacao, tb_projeto.id_ultima_tramitacao)
+    RETURNING xmax = 0 AS novo
+)
+SELECT count(*) FILTER (WHERE novo), count(*) FILTER (WHERE NOT novo) FROM gravados
+"""
+
+#Projetos que a carga gravou saem da fila de falhas (os descartados no merge continuam nela)
+LIMPAR_FILA_FALHAS = """
+DELETE FROM camara.tb_fila_falhas f
+USING pg_temp.stg_projeto s
+WHERE f.id_projeto = s.id_projeto
+  AND (s.id_ultima_situacao IS NULL OR EXISTS (SELECT 1 FROM camara.tp_situacao t WHERE t.id_situacao = s.id_ultima_situacao))
+  AND (s.id_ultima_tramitacao IS NULL OR EXISTS (SELECT 1 FROM camara.tp_tramitacao t WHERE t.id_tramitacao = s.id_ultima_tramitacao))
+"""
+
+MERGE_TRAMITACOES = """
+WITH gravadas AS (
+    INSERT INTO camara.rl_tramitacoes (id_projeto, sequencia, data_hora, id_situacao, id_tramitacao)
+    SELECT DISTINCT ON (s.id_projeto, s.sequencia)
+        s.id_projeto, s.sequencia, s.data_hora, s.id_situacao, s.id_tramitacao
+    FROM pg_temp.stg_tramitacoes s
+    JOIN camara.tb_projeto p ON p.id_projeto = s.id_projeto
+    JOIN camara.tp_situacao ts ON ts.id_situacao = s.id_situacao
+    JOIN camara.tp_tramitacao tt ON tt.id_tramitacao = s.id_tramitacao
+    WHERE s.sequencia IS NOT NULL AND s.data_hora IS NOT NULL
+    ORDER BY s.id_projeto, s.sequencia, s.ordem DESC
+    ON CONFLICT (id_projeto, sequencia) DO NOTHING
+    RETURNING 1
+)
+SELECT count(*) FROM gravadas
+"""
+
+MERGE_TEMAS = """
+WITH gravados AS (
+    INSERT INTO camara.rl_temas (id_projeto, id_tema)
+    SELECT DISTINCT s.id_projeto, s.id_tema
+    FROM pg_temp.stg_temas s
+    JOIN camara.tb_projeto p ON p.id_projeto = s.id_projeto
+    JOIN camara.tp_temas t ON t.id_tema = s.id_tema
+    ON CONFLICT (id_projeto, id_tema) DO NOTHING
+    RETURNING 1
+)
+SELECT count(*) FROM gravados
+"""
+
+'''
+=================== Índices e FKs adiados ===================
+'''
+
+def remover_indices_e_fks(conexao):
+    """
+    Remove as FKs e os índices secundários (não únicos) das tabelas de destino.
+    Retorna os comandos que os recriam. PK e UNIQUE ficam: o ON CONFLICT precisa delas.
+    """
+    tabelas = {"tabelas": list(TABELAS_DESTINO)}
+    fks = conexao.execute(text("""
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE contype = 'f' AND conrelid::regclass::text = ANY(:tabelas)
+    """), tabelas).all()
+    indices = conexao.execute(text("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid::regclass::text = ANY(:tabelas) AND NOT i.indisunique AND NOT i.indisprimary
+    """), tabelas).all()
+
+    recriar = []
+    for tabela, nome, definicao in fks:
+        conexao.execute(text(f'ALTER TABLE {tabela} DROP CONSTRAINT "{nome}"'))
+        recriar.append(f'ALTER TABLE {tabela} ADD CONSTRAINT "{nome}" {definicao}')
+    for nome, definicao in indices:
+        conexao.execute(text(f"DROP INDEX {nome}"))
+        recriar.append(definicao)
+    return recriar
+
+'''
+=================== Carga ===================
+'''
+
+#COPY csv com NULL explícito: campo sem aspas \N é NULL; todo valor vai entre aspas,
+#então '' continua sendo texto vazio e nenhum texto vira NULL por acaso
+NULO_COPY = '\\N'
+
+def _campo_csv(valor):
+    if valor is None:
+        return NULO_COPY
+    return '"' + str(valor).replace('"', '""') + '"'
+
+class CargaStaging:
+    """
+    Caminho de carga inicial: os itens (no formato de montar_item) vão por
+    COPY FROM STDIN para tabelas TEMP, e no fim mesclar() passa tudo para
+    as tabelas do schema camara com um INSERT ... SELECT por tabela.
+    Usa uma conexão só, do início ao fim (as tabelas TEMP são dela).
+    Se o banco estiver vazio, FKs e índices secundários são removidos antes
+    do merge e recriados depois, de uma vez, na mesma transação.
+    """
+
+    def __init__(self, engine, prefixo, tamanho_bloco=TAMANHO_BLOCO_COPY):
+        self.engine = engine
+        self.prefixo = prefixo
+        self.tamanho_bloco = tamanho_bloco
+        self.buffers = {tabela: [] for tabela in STAGING}
+        self.copiadas = dict.fromkeys(STAGING, 0)
+
+        self.conexao = engine.connect()
+        with self.conexao.begin():
+            for tabela, (colunas, _) in STAGING.items():
+                self.conexao.execute(text(f"CREATE TEMP TABLE {tabela} ({colunas}, ordem bigserial)"))
+
+    def adicionar(self, itens):
+        for item in itens:
+            if item.get("projeto"):
+                self.buffers["pg_temp.stg_projeto"].append(item["projeto"])
+            self.buffers["pg_temp.stg_tramitacoes"].extend(item["tramitacoes"])
+            self.buffers["pg_temp.stg_temas"].extend(item["temas"])
+
+        for tabela, linhas in self.buffers.items():
+            if len(linhas) >= self.tamanho_bloco:
+                self._copiar(tabela)
+
+    def _copiar(self, tabela):
+        linhas = self.buffers[tabela]
+        if not linhas:
+            return
+
+        _, colunas = STAGING[tabela]
+        buffer = io.StringIO()
+        for linha in linhas:
+            buffer.write(",".join(_campo_csv(linha.get(coluna)) for coluna in colunas) + "\n")
+        buffer.seek(0)
+
+        with self.conexao.begin():
+            with self.conexao.connection.cursor() as cursor:
+                cursor.copy_expert(f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv, NULL '{NULO_COPY}')", buffer)
+
+        self.copiadas[tabela] += len(linhas)
+        self.buffers[tabela] = []
+
+    def mesclar(self):
+        """
+        Descarrega o que sobrou e faz o merge. Retorna (novos, atualizados, tramitacoes_novas, temas_novos).
+        """
+        for tabela in STAGING:
+            self._copiar(tabela)
+
+        print(f"{self.prefixo}: Staging carregada: {self.copiadas['pg_temp.stg_projeto']} projetos, {self.copiadas['pg_temp.stg_tramitacoes']} tramitações, {self.copiadas['pg_temp.stg_temas']} temas. Mesclando...")
+        inicio = time.perf_counter()
+
+        conexao = self.conexao
+        with conexao.begin():
+            #Um merge por vez: dois ao mesmo tempo disputariam a remoção dos índices e FKs
+            conexao.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": chave_do_lock('carga_staging')})
+            conexao.execute(text("SET LOCAL maintenance_work_mem = '256MB'"))
+            for tabela in STAGING:
+                conexao.execute(text(f"ANALYZE {tabela}"))
+
+            #Carga inicial: validar FKs e montar índices uma vez no fim sai bem mais barato que linha a linha
+            banco_vazio = conexao.execute(text("SELECT NOT EXISTS (SELECT 1 FROM camara.tb_projeto)")).scalar()
+            recriar = remover_indices_e_fks(conexao) if banco_vazio else []
+
+            novos, atualizados = conexao.execute(text(MERGE_PROJETOS)).one()
+            tramitacoes_novas = conexao.execute(text(MERGE_TRAMITACOES)).scalar()
+            temas_novos = conexao.execute(text(MERGE_TEMAS)).scalar()
+            conexao.execute(text(ATUALIZAR_CARDS.format(filtro=CARDS_DA_STAGING)))
+            fora_da_fila = conexao.execute(text(LIMPAR_FILA_FALHAS)).rowcount
+
+            if recriar:
+                print(f"{self.prefixo}: Recriando {len(recriar)} índices e FKs...")
+            for comando in recriar:
+                conexao.execute(text(comando))
+
+            for tabela in STAGING:
+                conexao.execute(text(f"DROP TABLE {tabela}"))
+        conexao.close()
+
+        #Carga em massa: mais simples invalidar a landing page inteira
+        invalidar_tudo()
+        if feed_precalculado():
+            recalcular_feeds()
+
+        contar_projetos(self.prefixo, novos=novos, atualizados=atualizados)
+        contar_linhas('tb_projeto', novos)
+        contar_linhas('rl_tramitacoes', tramitacoes_novas)
+        contar_linhas('rl_temas', temas_novos)
+
+        if fora_da_fila:
+            print(f"{self.prefixo}: {fora_da_fila} projeto(s) recuperados saíram da fila de falhas.")
+        descartados = self.copiadas['pg_temp.stg_projeto'] - novos - atualizados
+        if descartados:
+            print(f"{self.prefixo}: [AVISO] {descartados} linhas de projeto descartadas (repetidas ou com situação/tramitação desconhecida).")
+        print(f"{self.prefixo}: Merge concluído em {time.perf_counter() - inicio:.1f}s: {novos} projetos novos, {atualizados} atualizados, {tramitacoes_novas} tramitações e {temas_novos} temas novos.")
+        return novos, atualizados, tramitacoes_novas, temas_novos
@@ -0,0 +1,58 @@
+import os
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+#Requisições abertas ao mesmo tempo por host, somando todos os pipelines e consumidores do processo
+CAMARA_LIMITE_POR_HOST = int(os.environ.get('CAMARA_LIMITE_POR_HOST', 8))
+
+#Um semáforo por host, compartilhado por todas as threads
+_semaforos_por_host = {}
+_semaforos_lock = threading.Lock()
+
+def _semaforo_do_host(url):
+    host = urlparse(url).netloc
+    with _semaforos_lock:
+        semaforo = _semaforos_por_host.get(host)
+        if semaforo is None:
+            semaforo = threading.BoundedSemaphore(CAMARA_LIMITE_POR_HOST)
+            _semaforos_por_host[host] = semaforo
+    return semaforo
+
+def _buscar_dados(cliente, caminho):
+    with _semaforo_do_host(cliente.url(caminho)):
+        return cliente.get_dados(caminho)
+
+def projeto_mudou(projeto_detalhado, data_hora_local, desde=None):
+    """
+    Compara statusProposicao.dataHora com a data_hora gravada no banco.
+    Com desde, status anterior a ele conta como sem mudança: já foi visto por um ciclo anterior.
+    Na dúvida (sem data local ou data malformada), considera que mudou.
+    """
+    if data_hora_local is None and desde is None:
+        return True
+    try:
+        data_hora_api = datetime.fromisoformat(projeto_detalhado.get('statusProposicao', {}).get('dataHora'))
+    except (ValueError, TypeError, AttributeError):
+        return True
+    if desde is not None and data_hora_api < desde:
+        return False
+    return data_hora_local is None or data_hora_api != data_hora_local
+
+def buscar_projeto_completo(cliente, id_projeto, data_hora_local=None, desde=None):
+    """
+    Busca o detalhe, as tramitações e os temas de um projeto.
+    Retorna a tupla (projeto_detalhado, tramitacoes, temas). Se o status
+    não mudou desde data_hora_local (ou é anterior a desde), não busca o
+    resto e devolve (projeto_detalhado, None, None).
+    """
+    caminho = f"/proposicoes/{id_projeto}"
+
+    projeto_detalhado = _buscar_dados(cliente, caminho) or {}
+    if not projeto_mudou(projeto_detalhado, data_hora_local, desde):
+        return projeto_detalhado, None, None
+
+    tramitacoes = _buscar_dados(cliente, f"{caminho}/tramitacoes") or []
+    temas = _buscar_dados(cliente, f"{caminho}/temas") or []
+
+    return projeto_detalhado, tramitacoes, temas
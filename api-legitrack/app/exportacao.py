@@ -0,0 +1,75 @@
+import os
+from flask import current_app
+from sqlalchemy import tuple_
+from . import db
+from .models import TB_ProjetoCard, RL_Tramitacoes, TP_Situacao, TP_Tramitacao, rel_temas
+from .leitura import consulta_cards, buscar_pagina_de_projetos
+
+#Linhas por consulta. A exportação anda por keyset, um lote de cada vez: a memória
+#fica em um lote, qualquer que seja o tamanho total
+TAMANHO_LOTE_EXPORTACAO = int(os.environ.get('EXPORTACAO_TAMANHO_LOTE', 1000))
+
+'''
+=================== Exportação em NDJSON ===================
+'''
+
+def _fim_do_lote():
+    #Encerra a transação de leitura entre lotes: um export longo não segura o VACUUM
+    db.session.rollback()
+
+def linhas_de_projetos(desde=None, temas=None):
+    """
+    Gerador de linhas NDJSON com o card de cada projeto, do mais recente para o mais antigo.
+    desde filtra por data_hora >= desde; temas, por qualquer um dos temas.
+    """
+    consulta = consulta_cards()
+    if desde is not None:
+        consulta = consulta.where(TB_ProjetoCard.data_hora >= desde)
+    if temas:
+        consulta = consulta.where(TB_ProjetoCard.ids_temas.overlap(temas))
+
+    cursor = None
+    while True:
+        lote = buscar_pagina_de_projetos(consulta, cursor, TAMANHO_LOTE_EXPORTACAO)
+        _fim_do_lote()
+        if not lote:
+            return
+        yield "".join(linha.card + "\n" for linha in lote)
+        if len(lote) < TAMANHO_LOTE_EXPORTACAO:
+            return
+        cursor = (lote[-1].data_hora, lote[-1].id_projeto)
+
+def linhas_de_tramitacoes(desde=None, temas=None):
+    """
+    Gerador de linhas NDJSON com as tramitações, por (id_projeto, sequencia).
+    desde filtra pela data da tramitação; temas, pelos temas do projeto.
+    """
+    consulta = (
+        db.select(
+            RL_Tramitacoes.id_projeto, RL_Tramitacoes.sequencia, RL_Tramitacoes.data_hora,
+            RL_Tramitacoes.id_situacao, TP_Situacao.ds_situacao, RL_Tramitacoes.id_tramitacao, TP_Tramitacao.ds_tramitacao
+        )
+        .outerjoin(TP_Situacao, TP_Situacao.id_situacao == RL_Tramitacoes.id_situacao)
+        .outerjoin(TP_Tramitacao, TP_Tramitacao.id_tramitacao == RL_Tramitacoes.id_tramitacao)
+    )
+    if desde is not None:
+        consulta = consulta.where(RL_Tramitacoes.data_hora >= desde)
+    if temas:
+        consulta = consulta.where(RL_Tramitacoes.id_projeto.in_(
+            db.select(rel_temas.c.id_projeto).where(rel_temas.c.id_tema.in_(temas))
+        ))
+    consulta = consulta.order_by(RL_Tramitacoes.id_projeto, RL_Tramitacoes.sequencia).limit(TAMANHO_LOTE_EXPORTACAO)
+
+    cursor = None
+    while True:
+        pagina = consulta
+        if cursor:
+            pagina = pagina.where(tuple_(RL_Tramitacoes.id_projeto, RL_Tramitacoes.sequencia) > tuple_(*cursor))
+        lote = db.session.execute(pagina).all()
+        _fim_do_lote()
+        if not lote:
+            return
+        yield "".join(current_app.json.dumps(linha._asdict()) + "\n" for linha in lote)
+        if len(lote) < TAMANHO_LOTE_EXPORTACAO:
+            return
+        cursor = (lote[-1].id_projeto, lote[-1].sequencia)
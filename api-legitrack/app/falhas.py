@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from sqlalchemy.dialects.postgresql import insert
+from . import db
+from .models import TB_FilaFalhas
+from .coleta import buscar_projeto_completo
+from .gravacao import TAMANHO_LOTE, montar_item, confirmar_lote
+from .pipeline import Pipeline
+from .metricas import contar_projetos
+
+PREFIXO = "WORKER (Falhas)"
+
+#Espera antes da tentativa n: BACKOFF_BASE * 2^(n-1), limitada a BACKOFF_MAXIMO
+BACKOFF_BASE = timedelta(minutes=2)
+BACKOFF_MAXIMO = timedelta(hours=6)
+MAX_TENTATIVAS = 10
+
+'''
+=================== Fila de falhas (DLQ) ===================
+'''
+
+def proxima_tentativa(tentativas, agora):
+    if tentativas >= MAX_TENTATIVAS:
+        return None
+    return agora + min(BACKOFF_MAXIMO, BACKOFF_BASE * 2 ** (tentativas - 1))
+
+def _linhas_de_falha(por_id, prefixo):
+    consulta = db.select(TB_FilaFalhas.id_projeto, TB_FilaFalhas.tentativas).where(TB_FilaFalhas.id_projeto.in_(por_id))
+    tentativas_atuais = dict(db.session.execute(consulta).all())
+
+    agora = datetime.now()
+    linhas = []
+    for id_projeto in sorted(por_id):
+        erro = por_id[id_projeto]
+        tentativas = tentativas_atuais.get(id_projeto, 0) + 1
+        proxima = proxima_tentativa(tentativas, agora)
+        if proxima is None:
+            print(f"{prefixo}: [ERRO CRÍTICO] Projeto {id_projeto} falhou {tentativas} vezes. Desistindo até intervenção manual.")
+
+        linhas.append({
+            "id_projeto": id_projeto,
+            "classe_erro": erro.__class__.__name__,
+            "erro": str(erro)[:1000],
+            "tentativas": tentativas,
+            "proxima_tentativa": proxima,
+            "criado_em": agora,
+            "atualizado_em": agora
+        })
+    return linhas
+
+def atualizar_fila(ids_gravados, falhas, prefixo=PREFIXO):
+    """
+    Tira da fila os projetos gravados e coloca (ou atualiza) os que falharam,
+    com a classe do erro, o número de tentativas e quando tentar de novo.
+    falhas é uma lista de (id_projeto, erro). Faz commit.
+    """
+    por_id = {id_projeto: erro for id_projeto, erro in falhas}
+    ids_gravados = [id_projeto for id_projeto in ids_gravados if id_projeto not in por_id]
+    if not por_id and not ids_gravados:
+        return
+
+    try:
+        if ids_gravados:
+            db.session.execute(db.delete(TB_FilaFalhas).where(TB_FilaFalhas.id_projeto.in_(ids_gravados)))
+
+        if por_id:
+            tabela = TB_FilaFalhas.__table__
+            stmt = insert(tabela)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[tabela.c.id_projeto],
+                set_={c: stmt.excluded[c] for c in ('classe_erro', 'erro', 'tentativas', 'proxima_tentativa', 'atualizado_em')}
+            )
+            db.session.execute(stmt, _linhas_de_falha(por_id, prefixo))
+
+        db.session.commit()
+        if por_id:
+            print(f"{prefixo}: {len(por_id)} projeto(s) colocados na fila de falhas.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"{prefixo}: [ERRO] Não foi possível atualizar a fila de falhas ({sorted(por_id)}): {e}")
+
+def rearmar_falhas(prefixo=PREFIXO):
+    """
+    Dá mais uma tentativa aos projetos que esgotaram as suas. O backoff inteiro
+    (~14,5h) cabe num intervalo da sincronização de referências (24h): quem falhou
+    por um código que ainda não existia só tem chance depois que ela roda. Faz commit.
+    """
+    agora = datetime.now()
+    resultado = db.session.execute(
+        db.update(TB_FilaFalhas)
+        .where(TB_FilaFalhas.proxima_tentativa.is_(None))
+        .values(tentativas=MAX_TENTATIVAS - 1, proxima_tentativa=agora, atualizado_em=agora)
+    )
+    db.session.commit()
+    if resultado.rowcount:
+        print(f"{prefixo}: {resultado.rowcount} projeto(s) que tinham esgotado as tentativas voltaram para a fila.")
+
+def falhas_vencidas(limite):
+    consulta = (
+        db.select(TB_FilaFalhas.id_projeto)
+        .where(TB_FilaFalhas.proxima_tentativa <= datetime.now())
+        .order_by(TB_FilaFalhas.proxima_tentativa)
+        .limit(limite)
+    )
+    return db.session.scalars(consulta).all()
+
+def gravar_com_fila(itens, erros, prefixo):
+    """
+    confirmar_lote que alimenta a fila de falhas: erros de busca (erros) e de
+    gravação entram na fila, e os projetos gravados saem dela.
+    Retorna o mesmo que confirmar_lote.
+    """
+    novos, atualizados, tramitacoes_novas, falhas = confirmar_lote(itens, prefixo)
+    contar_projetos(prefixo, falhas=len(erros))
+    atualizar_fila([item["id_projeto"] for item in itens], erros + falhas, prefixo)
+    return novos, atualizados, tramitacoes_novas, falhas
+
+'''
+=================== Estágio de reprocessamento ===================
+'''
+
+def reprocessar_falhas(cliente, concorrencia=4, limite=500):
+    """
+    Busca de novo, do zero, os projetos da fila cuja próxima tentativa venceu.
+    Roda separado do ciclo principal; quem falha de novo volta para a fila
+    com o intervalo dobrado.
+    """
+    ids_vencidos = falhas_vencidas(limite)
+    if not ids_vencidos:
+        return
+
+    print(f"{PREFIXO}: Reprocessando {len(ids_vencidos)} projeto(s) da fila de falhas...")
+    totais = {"novos": 0, "atualizados": 0, "falhas": 0}
+
+    def listar():
+        for id_projeto in ids_vencidos:
+            yield id_projeto, None
+
+    def buscar(id_projeto, contexto):
+        return buscar_projeto_completo(cliente, id_projeto)
+
+    def transformar(id_projeto, contexto, resultado):
+        projeto_detalhado, tramitacoes_api, projeto_temas_api = resultado
+        #O detalhe traz id, ementa, siglaTipo, numero e ano, como o resumo da listagem
+        return montar_item(projeto_detalhado, projeto_detalhado.get('statusProposicao'), tramitacoes_api, projeto_temas_api, PREFIXO)
+
+    def gravar(lote):
+        erros = [(id_projeto, erro) for id_projeto, _, erro in lote if erro]
+        itens = [item for _, item, erro in lote if not erro]
+
+        pn, pa, _, falhas = gravar_com_fila(itens, erros, PREFIXO)
+        totais["novos"] += pn
+        totais["atualizados"] += pa
+        totais["falhas"] += len(erros) + len(falhas)
+
+    Pipeline(PREFIXO, concorrencia=concorrencia, tamanho_lote=TAMANHO_LOTE).executar(listar, buscar, transformar, gravar)
+    print(f"{PREFIXO}: {totais['novos'] + totais['atualizados']} projeto(s) recuperados, {totais['falhas']} continuam na fila.")
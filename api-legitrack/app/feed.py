@@ -0,0 +1,134 @@
+import os
+from sqlalchemy import or_, text
+from . import db
+from .models import TB_ProjetoCard, TB_Interesses, RL_Favoritos, TB_Feed, rel_temas
+from .leitura import consulta_cards, buscar_pagina_de_projetos
+
+'''
+=================== Feed do usuário ===================
+'''
+
+#Feed = projetos dos temas de interesse do usuário + projetos que ele favoritou,
+#do mais recente para o mais antigo. Sai direto das tabelas de usuário numa consulta
+#ou, com FEED_PRECALCULADO=1, de usuarios.tb_feed, que o worker mantém
+
+def feed_precalculado():
+    return os.environ.get('FEED_PRECALCULADO', '0') == '1'
+
+def buscar_pagina_do_feed(id_user, cursor, limite):
+    """
+    Uma página do feed (linhas de consulta_cards + data_feed), pelo keyset (data_feed, id_projeto).
+    """
+    if feed_precalculado():
+        consulta = (
+            consulta_cards()
+            .add_columns(TB_Feed.data_hora.label('data_feed'))
+            .join(TB_Feed, TB_Feed.id_projeto == TB_ProjetoCard.id_projeto)
+            .where(TB_Feed.id_user == id_user)
+        )
+        linhas = buscar_pagina_de_projetos(consulta, cursor, limite, TB_Feed.data_hora, TB_Feed.id_projeto)
+        #tb_feed guarda só o começo do feed (FEED_MAXIMO projetos com data). Se a página
+        #não coube inteira nele, ela sai da consulta direta, a partir do mesmo cursor
+        if len(linhas) == limite:
+            return linhas
+
+    dos_temas = (
+        db.select(rel_temas.c.id_projeto)
+        .join(TB_Interesses, TB_Interesses.id_interesse == rel_temas.c.id_tema)
+        .where(TB_Interesses.id_user == id_user)
+    )
+    favoritos = db.select(RL_Favoritos.id_projeto).where(RL_Favoritos.id_user == id_user)
+    consulta = (
+        consulta_cards()
+        .add_columns(TB_ProjetoCard.data_hora.label('data_feed'))
+        .where(or_(TB_ProjetoCard.id_projeto.in_(dos_temas), TB_ProjetoCard.id_projeto.in_(favoritos)))
+    )
+    return buscar_pagina_de_projetos(consulta, cursor, limite)
+
+'''
+=================== Manutenção do feed pré-calculado ===================
+'''
+
+#Para cada usuário, tb_feed tem os FEED_MAXIMO projetos mais recentes (com data) do feed
+#e tudo que entrou depois: o que ela guarda é sempre um começo contínuo do feed
+FEED_MAXIMO = int(os.environ.get('FEED_MAXIMO', 500))
+
+#Os FEED_MAXIMO mais recentes de cada usuário, descendo o índice (data_hora, id_projeto)
+RECALCULAR_FEED = """
+    INSERT INTO usuarios.tb_feed (id_user, id_projeto, data_hora)
+    SELECT u.id, f.id_projeto, f.data_hora
+    FROM usuarios.tb_users u
+    CROSS JOIN LATERAL (
+        SELECT p.id_projeto, p.data_hora
+        FROM camara.tb_projeto p
+        WHERE p.data_hora IS NOT NULL AND (
+            p.id_projeto IN (
+                SELECT t.id_projeto FROM camara.rl_temas t
+                JOIN usuarios.tb_interesses i ON i.id_interesse = t.id_tema
+                WHERE i.id_user = u.id
+            )
+            OR p.id_projeto IN (SELECT fav.id_projeto FROM usuarios.rl_favoritos fav WHERE fav.id_user = u.id)
+        )
+        ORDER BY p.data_hora DESC, p.id_projeto DESC
+        LIMIT :maximo
+    ) f
+    WHERE {filtro}
+"""
+
+#Projetos recém-gravados entram no feed de quem segue um tema deles ou os favoritou,
+#desde que não fiquem abaixo do fim do que já está guardado (senão abririam um buraco).
+#Feed vazio não tem fim: tudo entra
+ATUALIZAR_FEEDS = """
+    INSERT INTO usuarios.tb_feed (id_user, id_projeto, data_hora)
+    SELECT n.id_user, n.id_projeto, n.data_hora
+    FROM (
+        SELECT i.id_user, p.id_projeto, p.data_hora
+        FROM camara.tb_projeto p
+        JOIN camara.rl_temas t ON t.id_projeto = p.id_projeto
+        JOIN usuarios.tb_interesses i ON i.id_interesse = t.id_tema
+        WHERE p.id_projeto = ANY(:ids) AND p.data_hora IS NOT NULL
+        UNION
+        SELECT fav.id_user, p.id_projeto, p.data_hora
+        FROM camara.tb_projeto p
+        JOIN usuarios.rl_favoritos fav ON fav.id_projeto = p.id_projeto
+        WHERE p.id_projeto = ANY(:ids) AND p.data_hora IS NOT NULL
+    ) n
+    WHERE NOT EXISTS (SELECT 1 FROM usuarios.tb_feed f WHERE f.id_user = n.id_user)
+       OR (n.data_hora, n.id_projeto) >= (
+        SELECT f.data_hora, f.id_projeto FROM usuarios.tb_feed f
+        WHERE f.id_user = n.id_user
+        ORDER BY f.data_hora, f.id_projeto
+        LIMIT 1
+    )
+    ON CONFLICT (id_user, id_projeto) DO UPDATE SET data_hora = EXCLUDED.data_hora
+    WHERE usuarios.tb_feed.data_hora IS DISTINCT FROM EXCLUDED.data_hora
+"""
+
+def atualizar_feeds(ids_projetos):
+    """
+    Incremental, chamado depois que o worker grava projetos. Faz commit.
+    """
+    if not ids_projetos:
+        return 0
+    linhas = db.session.execute(text(ATUALIZAR_FEEDS), {"ids": list(ids_projetos)}).rowcount
+    db.session.commit()
+    return linhas
+
+def recalcular_feed(id_user, maximo=FEED_MAXIMO):
+    """
+    Refaz o feed de um usuário (mudou de interesses ou de favoritos). Faz commit.
+    """
+    db.session.execute(db.delete(TB_Feed).where(TB_Feed.id_user == id_user))
+    linhas = db.session.execute(text(RECALCULAR_FEED.format(filtro="u.id = :id_user")), {"id_user": id_user, "maximo": maximo}).rowcount
+    db.session.commit()
+    return linhas
+
+def recalcular_feeds(maximo=FEED_MAXIMO):
+    """
+    Refaz os feeds de todos os usuários (depois de uma carga em massa). Faz commit.
+    """
+    db.session.execute(db.delete(TB_Feed))
+    linhas = db.session.execute(text(RECALCULAR_FEED.format(filtro="TRUE")), {"maximo": maximo}).rowcount
+    db.session.commit()
+    print(f"FEED: {linhas} linhas no feed pré-calculado.")
+    return linhas
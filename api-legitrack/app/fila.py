@@ -0,0 +1,190 @@
+import argparse
+import os
+import socket
+from datetime import timedelta
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from . import db
+from .models import TB_FilaProjetos
+from .coleta import buscar_projeto_completo
+from .gravacao import TAMANHO_LOTE, montar_item, carregar_datas_locais
+from .falhas import gravar_com_fila
+from .pipeline import Pipeline
+from .metricas import contar_projetos
+
+PREFIXO = "WORKER (Fila)"
+
+#Quanto tempo um projeto reservado fica invisível para as outras réplicas.
+#Se a réplica morrer sem confirmar, ele volta para a fila depois disso
+VISIBILIDADE = timedelta(minutes=10)
+TAMANHO_RESERVA = 100
+#Reservado mais vezes que isso sem confirmação: provavelmente derruba a réplica. Vai para a fila de falhas
+MAX_RESERVAS = 5
+
+class ProjetoAbandonado(Exception):
+    pass
+
+def nome_do_consumidor():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+'''
+=================== Operações da fila (tb_fila_projetos) ===================
+'''
+
+def enfileirar(ids_projetos):
+    """
+    Coloca projetos na fila, disponíveis já. Ids que já estão esperando são ignorados;
+    ids reservados por uma réplica voltam a ficar visíveis e perdem o dono, para que a
+    mudança que os trouxe de volta não se perca no ack de quem buscou antes dela.
+    Não faz commit. Retorna quantos entraram ou voltaram.
+    """
+    if not ids_projetos:
+        return 0
+
+    tabela = TB_FilaProjetos.__table__
+    agora = func.localtimestamp()
+    stmt = insert(tabela).values([
+        {"id_projeto": id_projeto, "disponivel_em": agora, "tentativas": 0, "enfileirado_em": agora}
+        for id_projeto in sorted(set(ids_projetos))
+    ])
+    #tentativas fica: um projeto que derruba réplicas continua indo para a fila de falhas
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabela.c.id_projeto],
+        set_={"disponivel_em": agora, "reservado_por": None, "enfileirado_em": agora},
+        where=tabela.c.reservado_por.isnot(None)
+    ).returning(tabela.c.id_projeto)
+    return len(db.session.execute(stmt).all())
+
+def reservar(conexao, consumidor, quantidade=TAMANHO_RESERVA, visibilidade=VISIBILIDADE):
+    """
+    Reserva até `quantidade` projetos visíveis. FOR UPDATE SKIP LOCKED faz
+    réplicas concorrentes pegarem lotes diferentes sem esperar umas pelas outras.
+    Retorna [(id_projeto, tentativas)].
+    """
+    tabela = TB_FilaProjetos.__table__
+    visiveis = (
+        db.select(tabela.c.id_projeto)
+        .where(tabela.c.disponivel_em <= func.localtimestamp())
+        .order_by(tabela.c.disponivel_em, tabela.c.id_projeto)
+        .limit(quantidade)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        db.update(tabela)
+        .where(tabela.c.id_projeto.in_(visiveis))
+        .values(
+            disponivel_em=func.localtimestamp() + visibilidade,
+            reservado_por=consumidor,
+            tentativas=tabela.c.tentativas + 1
+        )
+        .returning(tabela.c.id_projeto, tabela.c.tentativas)
+    )
+    return sorted(conexao.execute(stmt).all())
+
+def confirmar(ids_projetos, consumidor):
+    """
+    Ack: tira da fila os projetos processados, se a reserva ainda é desta réplica.
+    Não faz commit (vai junto com a gravação do lote).
+    """
+    if ids_projetos:
+        tabela = TB_FilaProjetos.__table__
+        db.session.execute(
+            db.delete(tabela).where(tabela.c.id_projeto.in_(ids_projetos), tabela.c.reservado_por == consumidor)
+        )
+
+def tamanho_da_fila():
+    return db.session.scalar(db.select(func.count()).select_from(TB_FilaProjetos))
+
+'''
+=================== Consumo (uma chamada por réplica) ===================
+'''
+
+def consumir_fila(cliente, consumidor=None, concorrencia=8, tamanho_reserva=TAMANHO_RESERVA):
+    """
+    Reserva lotes, busca, grava e confirma até a fila ficar vazia.
+    Pode rodar em quantas réplicas se quiser ao mesmo tempo.
+    """
+    consumidor = consumidor or nome_do_consumidor()
+    engine = db.engine
+    totais = {"processados": 0, "novos": 0, "atualizados": 0, "sem_mudanca": 0, "falhas": 0}
+
+    def listar():
+        while True:
+            with engine.begin() as conexao:
+                reservados = reservar(conexao, consumidor, tamanho_reserva)
+            if not reservados:
+                return
+
+            datas_locais = carregar_datas_locais(engine, [id_projeto for id_projeto, _ in reservados])
+            for id_projeto, tentativas in reservados:
+                yield id_projeto, (datas_locais.get(id_projeto), tentativas)
+
+    def buscar(id_projeto, contexto):
+        data_hora_local, tentativas = contexto
+        if tentativas > MAX_RESERVAS:
+            raise ProjetoAbandonado(f"Reservado {tentativas} vezes sem confirmação.")
+        return buscar_projeto_completo(cliente, id_projeto, data_hora_local=data_hora_local)
+
+    def transformar(id_projeto, contexto, resultado):
+        projeto_detalhado, tramitacoes_api, projeto_temas_api = resultado
+        if tramitacoes_api is None:
+            return None
+        #O detalhe traz id, ementa, siglaTipo, numero e ano, como o resumo da listagem
+        return montar_item(projeto_detalhado, projeto_detalhado.get('statusProposicao'), tramitacoes_api, projeto_temas_api, PREFIXO)
+
+    def gravar(lote):
+        itens = []
+        erros = []
+        for id_projeto, item, erro in lote:
+            if erro:
+                print(f"{PREFIXO}: [ERRO CRÍTICO] Falha ao buscar projeto {id_projeto}: {erro}")
+                erros.append((id_projeto, erro))
+            elif item is None:
+                totais["sem_mudanca"] += 1
+            else:
+                itens.append(item)
+
+        contar_projetos(PREFIXO, sem_mudanca=sum(1 for _, item, erro in lote if item is None and not erro))
+
+        #O ack vai no mesmo commit da gravação; quem falhou sai daqui e vai para a fila de falhas
+        confirmar([id_projeto for id_projeto, _, _ in lote], consumidor)
+        pn, pa, _, falhas = gravar_com_fila(itens, erros, PREFIXO)
+        totais["processados"] += len(lote)
+        totais["novos"] += pn
+        totais["atualizados"] += pa
+        totais["falhas"] += len(erros) + len(falhas)
+
+    Pipeline(f"{PREFIXO} [{consumidor}]", concorrencia=concorrencia, tamanho_lote=TAMANHO_LOTE).executar(listar, buscar, transformar, gravar)
+
+    if totais["processados"]:
+        print(f"{PREFIXO}: {totais['processados']} projetos consumidos por {consumidor}: {totais['novos']} novos, {totais['atualizados']} atualizados, {totais['sem_mudanca']} sem mudança, {totais['falhas']} para a fila de falhas.")
+    return totais
+
+if __name__ == "__main__":
+    from . import create_app
+    from .camara import CamaraClient
+
+    parser = argparse.ArgumentParser(description="Enfileira projetos da Câmara para as réplicas do worker.")
+    parser.add_argument('--anos', help="Enfileira todos os projetos destes anos, ex: 2023,2024.")
+    args = parser.parse_args()
+
+    app = create_app()
+    app.app_context().push()
+
+    if args.anos:
+        camara = CamaraClient()
+        anos = [a.strip() for a in args.anos.split(',') if a.strip()]
+        params = {"ano": anos, "pagina": 1, "itens": 100, "ordem": "ASC", "ordenarPor": "id"}
+        total = 0
+        for pagina in camara.paginas("/proposicoes", params):
+            ids = []
+            for projeto_resumido in pagina['dados']:
+                try:
+                    ids.append(int(projeto_resumido.get('id')))
+                except (ValueError, TypeError):
+                    print(f"{PREFIXO}: [AVISO] Item de projeto resumido sem ID. Pulando item.")
+            total += enfileirar(ids)
+            db.session.commit()
+            print(f"{PREFIXO}: {total} projetos enfileirados até agora...")
+
+    print(f"{PREFIXO}: {tamanho_da_fila()} projetos na fila.")
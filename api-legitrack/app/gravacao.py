@@ -0,0 +1,251 @@
+from datetime import datetime
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from . import db
+from .models import TB_Projeto, RL_Tramitacoes, TP_Temas, rel_temas
+from .metricas import contar_linhas, contar_projetos
+from .cache import invalidar_projetos
+from .leitura import atualizar_cards
+from .feed import feed_precalculado, atualizar_feeds
+
+TAMANHO_LOTE = 100
+
+#Campos que vêm do status da proposição. Se o status vier vazio, o upsert mantém o valor do banco
+CAMPOS_STATUS = ('data_hora', 'sigla_orgao', 'despacho', 'id_ultima_situacao', 'id_ultima_tramitacao')
+
+'''
+=================== Transformação (API -> linhas) ===================
+'''
+
+def montar_projeto(projeto_resumido, status, prefixo):
+    id_projeto = int(projeto_resumido.get('id'))
+    ano = projeto_resumido.get('ano')
+
+    linha = {
+        "id_projeto": id_projeto,
+        "titulo_projeto": projeto_resumido.get('ementa'),
+        "descricao": f"{projeto_resumido.get('siglaTipo')} {projeto_resumido.get('numero')}/{ano}",
+        "ano_inicio": str(ano) if ano is not None else None
+    }
+    linha.update(dict.fromkeys(CAMPOS_STATUS))
+
+    if status:
+        try:
+            linha.update({
+                "data_hora": datetime.fromisoformat(status.get("dataHora")),
+                "sigla_orgao": status.get("siglaOrgao"),
+                "despacho": status.get("despacho"),
+                "id_ultima_situacao": int(status.get("codSituacao")),
+                "id_ultima_tramitacao": int(status.get("codTipoTramitacao"))
+            })
+        except (ValueError, TypeError):
+            print(f"{prefixo}: [AVISO] 'statusProposicao' malformado para projeto {id_projeto}.")
+
+    return linha
+
+def montar_tramitacoes(id_projeto, tramitacoes_api, prefixo):
+    linhas = []
+    for item_tram_api in tramitacoes_api:
+        try:
+            if not isinstance(item_tram_api, dict):
+                continue
+
+            linhas.append({
+                "id_projeto": id_projeto,
+                "sequencia": int(item_tram_api['sequencia']),
+                "data_hora": datetime.fromisoformat(item_tram_api['dataHora']),
+                "id_situacao": int(item_tram_api['codSituacao']),
+                "id_tramitacao": int(item_tram_api['codTipoTramitacao'])
+            })
+        except (ValueError, TypeError, KeyError, AttributeError):
+            print(f"{prefixo}: [AVISO] Item de tramitação malformado para projeto {id_projeto}. Pulando item.")
+    return linhas
+
+def montar_temas(id_projeto, temas_api, prefixo):
+    linhas = []
+    for tema_api in temas_api:
+        try:
+            if not isinstance(tema_api, dict):
+                continue
+
+            linhas.append({"id_projeto": id_projeto, "id_tema": int(tema_api.get('cod'))})
+        except (ValueError, TypeError, KeyError, AttributeError):
+            print(f"{prefixo}: [AVISO] Item de tema malformado para projeto {id_projeto}. Pulando item.")
+    return linhas
+
+def montar_item(projeto_resumido, status, tramitacoes_api, temas_api, prefixo):
+    """
+    Converte as respostas da API de um projeto no formato que o gravar_lote espera.
+    """
+    projeto = montar_projeto(projeto_resumido, status, prefixo)
+    id_projeto = projeto["id_projeto"]
+    return {
+        "id_projeto": id_projeto,
+        "projeto": projeto,
+        "tramitacoes": montar_tramitacoes(id_projeto, tramitacoes_api or [], prefixo),
+        "temas": montar_temas(id_projeto, temas_api or [], prefixo)
+    }
+
+'''
+=================== Leitura do estado local ===================
+'''
+
+def carregar_datas_locais(engine, ids_projetos):
+    """
+    data_hora gravada de cada projeto, para a detecção de mudanças.
+    Usa uma conexão própria do engine porque roda fora da thread do app context.
+    """
+    consulta = db.select(TB_Projeto.id_projeto, TB_Projeto.data_hora).where(TB_Projeto.id_projeto.in_(ids_projetos))
+    with engine.connect() as conexao:
+        return {id_projeto: data_hora for id_projeto, data_hora in conexao.execute(consulta)}
+
+'''
+=================== Escrita em lote (INSERT ... ON CONFLICT) ===================
+'''
+
+def upsert_projetos(linhas):
+    """
+    Insere ou atualiza projetos. Retorna (novos, atualizados).
+    """
+    if not linhas:
+        return 0, 0
+
+    tabela = TB_Projeto.__table__
+    stmt = insert(tabela)
+    campos_atualizados = {c: stmt.excluded[c] for c in ('titulo_projeto', 'descricao', 'ano_inicio')}
+    campos_atualizados.update({c: func.coalesce(stmt.excluded[c], tabela.c[c]) for c in CAMPOS_STATUS})
+
+    #xmax = 0 só é verdade para linhas recém-inseridas
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabela.c.id_projeto],
+        set_=campos_atualizados
+    ).returning(literal_column('xmax = 0'))
+
+    inseridos = db.session.execute(stmt, linhas).scalars().all()
+    novos = sum(1 for inserido in inseridos if inserido)
+    return novos, len(inseridos) - novos
+
+def inserir_tramitacoes(linhas):
+    """
+    Insere só as tramitações que ainda não existem. Retorna quantas entraram.
+    """
+    if not linhas:
+        return 0
+
+    tabela = RL_Tramitacoes.__table__
+    stmt = insert(tabela).on_conflict_do_nothing(
+        index_elements=[tabela.c.id_projeto, tabela.c.sequencia]
+    ).returning(tabela.c.id_rl_tramitacao)
+
+    return len(db.session.execute(stmt, linhas).all())
+
+def inserir_temas(linhas, prefixo):
+    """
+    Liga projetos a temas, ignorando temas que não existem em tp_temas.
+    Retorna quantas ligações novas entraram.
+    """
+    if not linhas:
+        return 0
+
+    ids_temas = {linha["id_tema"] for linha in linhas}
+    temas_locais = set(db.session.scalars(db.select(TP_Temas.id_tema).where(TP_Temas.id_tema.in_(ids_temas))).all())
+    for id_tema in sorted(ids_temas - temas_locais):
+        print(f"{prefixo}: [AVISO] Tema {id_tema} não encontrado no banco local. Pulei.")
+
+    linhas = [linha for linha in linhas if linha["id_tema"] in temas_locais]
+    if not linhas:
+        return 0
+
+    stmt = insert(rel_temas).on_conflict_do_nothing(
+        index_elements=[rel_temas.c.id_projeto, rel_temas.c.id_tema]
+    ).returning(rel_temas.c.id_rl_temas)
+
+    return len(db.session.execute(stmt, linhas).all())
+
+def _aplicar(itens, prefixo):
+    #Deduplica dentro do lote (ON CONFLICT não aceita a mesma chave duas vezes no mesmo comando)
+    projetos = {item["id_projeto"]: item["projeto"] for item in itens if item["projeto"]}
+    tramitacoes = {(t["id_projeto"], t["sequencia"]): t for item in itens for t in item["tramitacoes"]}
+    temas = {(t["id_projeto"], t["id_tema"]): t for item in itens for t in item["temas"]}
+
+    #Ordenar pela chave deixa a ordem de travas igual entre escritores concorrentes
+    novos, atualizados = upsert_projetos([projetos[k] for k in sorted(projetos)])
+    tramitacoes_novas = inserir_tramitacoes([tramitacoes[k] for k in sorted(tramitacoes)])
+    temas_novos = inserir_temas([temas[k] for k in sorted(temas)], prefixo)
+
+    #Card da lista na mesma transação: quem lê nunca vê projeto sem card ou card velho
+    atualizar_cards(sorted(set(projetos) | {id_projeto for id_projeto, _ in temas}))
+
+    contar_linhas('tb_projeto', novos)
+    contar_linhas('rl_tramitacoes', tramitacoes_novas)
+    contar_linhas('rl_temas', temas_novos)
+    return novos, atualizados, tramitacoes_novas
+
+def gravar_lote(itens, prefixo):
+    """
+    Grava um lote inteiro (projetos, tramitações e temas) com poucos comandos.
+    Um item com "projeto" None grava só tramitações e temas de um projeto que já existe.
+    Se o lote falhar, regrava projeto a projeto, cada um no seu SAVEPOINT,
+    para que um registro ruim não desfaça o resto.
+    Não faz commit. Retorna (novos, atualizados, tramitacoes_novas, falhas),
+    onde falhas é uma lista de (id_projeto, erro).
+    """
+    if not itens:
+        return 0, 0, 0, []
+
+    try:
+        with db.session.begin_nested():
+            return (*_aplicar(itens, prefixo), [])
+    except SQLAlchemyError as e:
+        if len(itens) == 1:
+            id_projeto = itens[0]["id_projeto"]
+            print(f"{prefixo}: [ERRO CRÍTICO] Falha ao gravar projeto {id_projeto}: {e}")
+            return 0, 0, 0, [(id_projeto, e)]
+        print(f"{prefixo}: [AVISO] Lote de {len(itens)} projetos falhou ({e.__class__.__name__}). Isolando o projeto com problema...")
+
+    novos = atualizados = tramitacoes_novas = 0
+    falhas = []
+    for item in itens:
+        id_projeto = item["id_projeto"]
+        try:
+            with db.session.begin_nested():
+                pn, pa, tn = _aplicar([item], prefixo)
+            novos += pn
+            atualizados += pa
+            tramitacoes_novas += tn
+        except SQLAlchemyError as e:
+            print(f"{prefixo}: [ERRO CRÍTICO] Falha ao gravar projeto {id_projeto}: {e}")
+            falhas.append((id_projeto, e))
+
+    return novos, atualizados, tramitacoes_novas, falhas
+
+def confirmar_lote(itens, prefixo):
+    """
+    gravar_lote + commit. Em erro inesperado desfaz tudo e conta o lote inteiro como falha.
+    """
+    try:
+        resultado = gravar_lote(itens, prefixo)
+        db.session.commit()
+        contar_projetos(prefixo, novos=resultado[0], atualizados=resultado[1], falhas=len(resultado[3]))
+    except Exception as e:
+        db.session.rollback()
+        print(f"{prefixo}: [ERRO CRÍTICO] Falha ao confirmar lote de {len(itens)} projetos: {e}")
+        contar_projetos(prefixo, falhas=len(itens))
+        return 0, 0, 0, [(item["id_projeto"], e) for item in itens]
+
+    #A landing page em cache muda só para os temas destes projetos
+    falharam = {id_projeto for id_projeto, _ in resultado[3]}
+    try:
+        invalidar_projetos([item["id_projeto"] for item in itens if item["id_projeto"] not in falharam])
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"{prefixo}: [AVISO] Falha ao invalidar o cache dos projetos gravados: {e}")
+
+    if feed_precalculado():
+        try:
+            atualizar_feeds([item["id_projeto"] for item in itens if item["id_projeto"] not in falharam])
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"{prefixo}: [AVISO] Falha ao atualizar o feed pré-calculado: {e}")
+    return resultado
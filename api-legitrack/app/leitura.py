@@ -0,0 +1,197 @@
+import json
+from sqlalchemy import tuple_, func, text, Numeric
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from . import db
+from .models import TB_Projeto, TB_ProjetoCard, RL_Tramitacoes, TP_Situacao, TP_Tramitacao
+
+'''
+=================== Read model da lista de projetos ===================
+'''
+
+#Cada projeto tem em camara.projeto_card o JSON que as listas mostram, já pronto.
+#Quem grava projetos ou temas chama atualizar_cards na mesma transação; as rotas
+#só emendam os textos guardados, sem join nem trabalho por linha em Python
+
+#Um comando para qualquer conjunto de projetos ({filtro} sobre p = tb_projeto).
+#ultima_data no formato do datetime.isoformat() (microssegundos só quando há)
+ATUALIZAR_CARDS = """
+    INSERT INTO camara.projeto_card (id_projeto, data_hora, ids_temas, card)
+    SELECT p.id_projeto, p.data_hora, coalesce(t.ids_temas, '{{}}'),
+           jsonb_build_object(
+               'id', p.id_projeto,
+               'titulo', p.titulo_projeto,
+               'descricao', p.descricao,
+               'ano_inicio', p.ano_inicio,
+               'sigla_orgao', p.sigla_orgao,
+               'despacho', p.despacho,
+               'ultima_situação', coalesce(s.ds_situacao, ''),
+               'ultima_tramitação', coalesce(tr.ds_tramitacao, ''),
+               'ultima_data', CASE
+                   WHEN date_trunc('second', p.data_hora) = p.data_hora THEN to_char(p.data_hora, 'YYYY-MM-DD"T"HH24:MI:SS')
+                   ELSE to_char(p.data_hora, 'YYYY-MM-DD"T"HH24:MI:SS.US')
+               END
+           )::text
+    FROM camara.tb_projeto p
+    LEFT JOIN camara.tp_situacao s ON s.id_situacao = p.id_ultima_situacao
+    LEFT JOIN camara.tp_tramitacao tr ON tr.id_tramitacao = p.id_ultima_tramitacao
+    LEFT JOIN LATERAL (
+        SELECT array_agg(rt.id_tema ORDER BY rt.id_tema) AS ids_temas FROM camara.rl_temas rt WHERE rt.id_projeto = p.id_projeto
+    ) t ON TRUE
+    WHERE {filtro}
+    ON CONFLICT (id_projeto) DO UPDATE SET data_hora = EXCLUDED.data_hora, ids_temas = EXCLUDED.ids_temas, card = EXCLUDED.card
+    WHERE (camara.projeto_card.data_hora, camara.projeto_card.ids_temas, camara.projeto_card.card)
+          IS DISTINCT FROM (EXCLUDED.data_hora, EXCLUDED.ids_temas, EXCLUDED.card)
+"""
+
+def atualizar_cards(ids_projetos):
+    """
+    Regrava os cards dos projetos na sessão atual, sem commit (vai junto com a escrita dos projetos).
+    """
+    if not ids_projetos:
+        return 0
+    return db.session.execute(text(ATUALIZAR_CARDS.format(filtro="p.id_projeto = ANY(:ids)")), {"ids": list(ids_projetos)}).rowcount
+
+def atualizar_cards_da_referencia(coluna, ids):
+    """
+    Regrava os cards dos projetos cuja última situação/tramitação (coluna) mudou de descrição. Sem commit.
+    """
+    if not ids:
+        return 0
+    return db.session.execute(text(ATUALIZAR_CARDS.format(filtro=f"p.{coluna} = ANY(:ids)")), {"ids": list(ids)}).rowcount
+
+def consulta_cards():
+    return db.select(TB_ProjetoCard.id_projeto, TB_ProjetoCard.data_hora, TB_ProjetoCard.card)
+
+def resposta_com_cards(mensagem, linhas, proximo_cursor):
+    """
+    Corpo JSON da lista com os cards guardados emendados como estão.
+    """
+    return '{"mensagem":%s,"next_cursor":%s,"projetos":[%s]}' % (
+        json.dumps(mensagem), json.dumps(proximo_cursor), ",".join(linha.card for linha in linhas)
+    )
+
+def buscar_pagina_de_projetos(consulta, cursor, limite, data_hora=TB_ProjetoCard.data_hora, id_projeto=TB_ProjetoCard.id_projeto):
+    """
+    Linhas por data_hora DESC e id_projeto DESC, a partir do cursor (data_hora, id_projeto).
+    Os com data saem de um intervalo do índice (data_hora, id_projeto); os sem
+    data (poucos) vêm no fim, só por id_projeto. data_hora e id_projeto podem ser
+    as colunas de outra tabela com as mesmas chaves (o feed pré-calculado).
+    """
+    data_cursor, id_cursor = cursor if cursor else (None, None)
+    linhas = []
+
+    if cursor is None or data_cursor is not None:
+        com_data = consulta.where(data_hora.is_not(None))
+        if cursor:
+            com_data = com_data.where(tuple_(data_hora, id_projeto) < tuple_(data_cursor, id_cursor))
+        com_data = com_data.order_by(data_hora.desc(), id_projeto.desc())
+        linhas = list(db.session.execute(com_data.limit(limite)).all())
+
+    if len(linhas) < limite:
+        sem_data = consulta.where(data_hora.is_(None))
+        if cursor and data_cursor is None:
+            sem_data = sem_data.where(id_projeto < id_cursor)
+        sem_data = sem_data.order_by(id_projeto.desc())
+        linhas += db.session.execute(sem_data.limit(limite - len(linhas))).all()
+
+    return linhas
+
+'''
+=================== Busca textual ===================
+'''
+
+#Criada na migração b0c11931b0e5: português, sem acento quando o servidor tem unaccent
+CONFIG_BUSCA = 'camara.busca_pt'
+
+def buscar_projetos_por_texto(consulta, texto, cursor, limite):
+    """
+    Projetos cuja ementa ou descrição casam com o texto (sintaxe de buscador:
+    "frase exata", -palavra, or), do mais relevante para o menos, desempatando
+    por id_projeto DESC. O cursor é (relevancia, id_projeto). O casamento sai do
+    índice GIN da coluna gerada busca; a relevância só é calculada para quem casou.
+    """
+    termos = func.websearch_to_tsquery(db.cast(CONFIG_BUSCA, REGCONFIG), texto)
+    #ts_rank é real: como float no cursor ele não volta igual e a página se repete.
+    #Em numeric arredondado, o valor do cursor compara exatamente com o do banco
+    relevancia = func.round(db.cast(func.ts_rank(TB_Projeto.busca, termos), Numeric), 6)
+
+    consulta = consulta.add_columns(relevancia.label('relevancia')).where(TB_Projeto.busca.op('@@')(termos))
+    if cursor:
+        consulta = consulta.where(tuple_(relevancia, TB_Projeto.id_projeto) < tuple_(*cursor))
+    consulta = consulta.order_by(relevancia.desc(), TB_Projeto.id_projeto.desc())
+    return list(db.session.execute(consulta.limit(limite)).all())
+
+'''
+=================== Detalhe e tramitações de um projeto ===================
+'''
+
+#A versão de um projeto é a maior sequencia das suas tramitações: toda mudança
+#que a Câmara publica vem com tramitação nova. Vira o ETag das duas rotas
+
+def versao_do_projeto(id_projeto):
+    """
+    Maior sequencia das tramitações (0 se não há nenhuma), ou None se o projeto não existe.
+    Uma consulta só no índice único (id_projeto, sequencia).
+    """
+    maior_sequencia = (
+        db.select(func.max(RL_Tramitacoes.sequencia))
+        .where(RL_Tramitacoes.id_projeto == TB_Projeto.id_projeto)
+        .scalar_subquery()
+    )
+    linha = db.session.execute(
+        db.select(func.coalesce(maior_sequencia, 0)).where(TB_Projeto.id_projeto == id_projeto)
+    ).first()
+    return linha[0] if linha else None
+
+def detalhe_do_projeto(id_projeto):
+    linha = db.session.execute(
+        db.select(
+            TB_Projeto.id_projeto, TB_Projeto.titulo_projeto, TB_Projeto.descricao, TB_Projeto.ano_inicio,
+            TB_Projeto.sigla_orgao, TB_Projeto.despacho, TB_Projeto.data_hora,
+            TP_Situacao.ds_situacao, TP_Tramitacao.ds_tramitacao
+        )
+        .outerjoin(TP_Situacao, TP_Situacao.id_situacao == TB_Projeto.id_ultima_situacao)
+        .outerjoin(TP_Tramitacao, TP_Tramitacao.id_tramitacao == TB_Projeto.id_ultima_tramitacao)
+        .where(TB_Projeto.id_projeto == id_projeto)
+    ).first()
+    if not linha:
+        return None
+
+    return {
+        "id": linha.id_projeto,
+        "informacoes": {
+            "titulo": linha.titulo_projeto,
+            "descricao": linha.descricao,
+            "ano_inicio": linha.ano_inicio
+        },
+        "status_tramitacao_atual": {
+            "descricao_tramitacao": linha.ds_tramitacao or "",
+            "descricao_situacao": linha.ds_situacao or "",
+            "sigla_orgao": linha.sigla_orgao or "",
+            "data_hora": linha.data_hora.isoformat() if linha.data_hora else "",
+            "despacho": linha.despacho or ""
+        }
+    }
+
+def pagina_de_tramitacoes(id_projeto, cursor, limite):
+    """
+    Tramitações da mais nova para a mais antiga, a partir do cursor (sequencia).
+    """
+    consulta = (
+        db.select(RL_Tramitacoes.sequencia, RL_Tramitacoes.data_hora, TP_Situacao.ds_situacao, TP_Tramitacao.ds_tramitacao)
+        .outerjoin(TP_Situacao, TP_Situacao.id_situacao == RL_Tramitacoes.id_situacao)
+        .outerjoin(TP_Tramitacao, TP_Tramitacao.id_tramitacao == RL_Tramitacoes.id_tramitacao)
+        .where(RL_Tramitacoes.id_projeto == id_projeto)
+    )
+    if cursor is not None:
+        consulta = consulta.where(RL_Tramitacoes.sequencia < cursor)
+    return db.session.execute(consulta.order_by(RL_Tramitacoes.sequencia.desc()).limit(limite)).all()
+
+def tramitacao_da_lista(linha):
+    return {
+        "sequencia": linha.sequencia,
+        "data": linha.data_hora.strftime("%Y-%m-%d"),
+        "hora": linha.data_hora.strftime("%H:%M"),
+        "situacao": linha.ds_situacao,
+        "tramitacao": linha.ds_tramitacao
+    }
@@ -0,0 +1,138 @@
+import threading
+import time
+import requests
+
+class LimitadorAdaptativo:
+    """
+    Token bucket compartilhado entre as threads de um processo.
+    A taxa se ajusta sozinha (AIMD): sobe um pouco a cada resposta rápida e cai
+    pela metade com 429/5xx ou quando a latência passa do alvo.
+    """
+
+    def __init__(self, taxa_inicial=10.0, taxa_minima=0.5, taxa_maxima=50.0, rajada=None,
+                 aumento=0.1, latencia_alvo=2.0, intervalo_reducao=1.0):
+        self.taxa = taxa_inicial
+        self.taxa_minima = taxa_minima
+        self.taxa_maxima = taxa_maxima
+        self.rajada = rajada or max(1.0, taxa_inicial)
+        self.aumento = aumento
+        self.latencia_alvo = latencia_alvo
+        #Várias threads recebem o mesmo 429 quase juntas: só reduz uma vez por intervalo
+        self.intervalo_reducao = intervalo_reducao
+
+        self._tokens = self.rajada
+        self._ultima_recarga = time.monotonic()
+        self._ultima_reducao = 0.0
+        self._pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def _recarregar(self, agora):
+        self._tokens = min(self.rajada, self._tokens + (agora - self._ultima_recarga) * self.taxa)
+        self._ultima_recarga = agora
+
+    def adquirir(self):
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                if agora < self._pausado_ate:
+                    espera = self._pausado_ate - agora
+                else:
+                    self._recarregar(agora)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+    def pausar(self, segundos):
+        #Retry-After: ninguém chama a API até o prazo pedido
+        with self._lock:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+
+    def _reduzir(self, fator):
+        agora = time.monotonic()
+        if agora - self._ultima_reducao < self.intervalo_reducao:
+            return
+        self._ultima_reducao = agora
+        self._recarregar(agora)
+        self.taxa = max(self.taxa_minima, self.taxa * fator)
+        self._tokens = min(self._tokens, 1.0)
+
+    def registrar(self, status, latencia):
+        """
+        Informa o resultado de uma chamada. status None é erro de conexão/timeout.
+        """
+        with self._lock:
+            if status is None or status == 429 or status >= 500:
+                self._reduzir(0.5)
+            elif latencia > self.latencia_alvo:
+                self._reduzir(0.9)
+            elif status < 400:
+                self._recarregar(time.monotonic())
+                self.taxa = min(self.taxa_maxima, self.taxa + self.aumento)
+
+class CircuitoAberto(requests.exceptions.RequestException):
+    pass
+
+class Disjuntor:
+    """
+    Circuit breaker: depois de limite_falhas falhas seguidas, abre e segura as
+    chamadas por tempo_aberto segundos. Depois deixa passar uma única sonda
+    (meio-aberto); se ela der certo fecha, se falhar abre de novo.
+    Quem espera mais que espera_maxima recebe CircuitoAberto.
+    """
+
+    FECHADO = 'fechado'
+    ABERTO = 'aberto'
+    MEIO_ABERTO = 'meio-aberto'
+
+    def __init__(self, limite_falhas=5, tempo_aberto=30.0, espera_maxima=300.0, prefixo="CAMARA"):
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self.espera_maxima = espera_maxima
+        self.prefixo = prefixo
+
+        self.estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_ate = 0.0
+        self._sonda_em_andamento = False
+        self._condicao = threading.Condition()
+
+    def permitir(self):
+        limite = time.monotonic() + self.espera_maxima
+        with self._condicao:
+            while True:
+                agora = time.monotonic()
+                if self.estado == self.FECHADO:
+                    return
+                if self.estado == self.ABERTO and agora >= self._aberto_ate:
+                    self.estado = self.MEIO_ABERTO
+                    self._sonda_em_andamento = False
+                if self.estado == self.MEIO_ABERTO and not self._sonda_em_andamento:
+                    self._sonda_em_andamento = True
+                    print(f"{self.prefixo}: Circuito meio-aberto. Enviando requisição de teste...")
+                    return
+
+                if agora >= limite:
+                    raise CircuitoAberto(f"Circuito aberto há mais de {self.espera_maxima:.0f}s. API indisponível.")
+                prazo = self._aberto_ate if self.estado == self.ABERTO else limite
+                self._condicao.wait(max(0.05, min(prazo, limite) - agora))
+
+    def registrar_sucesso(self):
+        with self._condicao:
+            if self.estado != self.FECHADO:
+                print(f"{self.prefixo}: Circuito fechado. API respondendo de novo.")
+            self.estado = self.FECHADO
+            self._falhas = 0
+            self._sonda_em_andamento = False
+            self._condicao.notify_all()
+
+    def registrar_falha(self):
+        with self._condicao:
+            self._falhas += 1
+            if self.estado == self.MEIO_ABERTO or (self.estado == self.FECHADO and self._falhas >= self.limite_falhas):
+                self.estado = self.ABERTO
+                self._aberto_ate = time.monotonic() + self.tempo_aberto
+                self._sonda_em_andamento = False
+                print(f"{self.prefixo}: [AVISO] {self._falhas} falhas seguidas. Circuito aberto por {self.tempo_aberto:.0f}s.")
+                self._condicao.notify_all()
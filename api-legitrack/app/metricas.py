@@ -0,0 +1,130 @@
+import os
+import re
+import time
+from urllib.parse import urlparse
+from flask import Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    generate_latest, multiprocess, start_http_server
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+'''
+=================== Métricas ===================
+'''
+
+#Câmara
+CAMARA_DURACAO = Histogram(
+    'camara_http_duracao_segundos', "Latência das chamadas à API da Câmara.",
+    ['endpoint', 'status'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20)
+)
+
+#Ingestão
+PROJETOS = Counter(
+    'ingestao_projetos_total', "Projetos processados pela ingestão.",
+    ['origem', 'resultado'] #resultado: novo, atualizado, sem_mudanca, falha
+)
+LINHAS_INSERIDAS = Counter(
+    'ingestao_linhas_inseridas_total', "Linhas inseridas no banco pela ingestão.",
+    ['tabela']
+)
+FILA_PIPELINE = Gauge(
+    'ingestao_fila_pipeline', "Itens esperando em cada fila do pipeline.",
+    ['pipeline', 'fila'],
+    multiprocess_mode='livesum'
+)
+DURACAO_TAREFA = Histogram(
+    'worker_tarefa_duracao_segundos', "Duração de cada execução das tarefas do worker.",
+    ['tarefa'],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+
+#API
+DURACAO_ROTA = Histogram(
+    'api_requisicao_duracao_segundos', "Latência das rotas da API.",
+    ['rota', 'metodo', 'status']
+)
+DURACAO_DB_ROTA = Histogram(
+    'api_db_duracao_segundos', "Tempo gasto no banco por requisição.",
+    ['rota'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+
+_ID_NO_CAMINHO = re.compile(r'/\d+(?=/|$)')
+
+def endpoint_da_url(url, url_base):
+    """
+    /api/v2/proposicoes/2345/tramitacoes -> /proposicoes/{id}/tramitacoes
+    """
+    caminho = urlparse(url).path
+    prefixo = urlparse(url_base).path
+    if prefixo and caminho.startswith(prefixo):
+        caminho = caminho[len(prefixo):]
+    return _ID_NO_CAMINHO.sub('/{id}', caminho) or '/'
+
+def contar_projetos(origem, novos=0, atualizados=0, sem_mudanca=0, falhas=0):
+    for resultado, quantidade in (('novo', novos), ('atualizado', atualizados), ('sem_mudanca', sem_mudanca), ('falha', falhas)):
+        if quantidade:
+            PROJETOS.labels(origem, resultado).inc(quantidade)
+
+def contar_linhas(tabela, quantidade):
+    if quantidade:
+        LINHAS_INSERIDAS.labels(tabela).inc(quantidade)
+
+'''
+=================== Exposição ===================
+'''
+
+def gerar_metricas():
+    #Com gunicorn (vários processos), cada worker escreve em PROMETHEUS_MULTIPROC_DIR e a soma sai daqui
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return generate_latest(registro)
+    return generate_latest(REGISTRY)
+
+def servir_metricas(porta):
+    """
+    Sobe o endpoint /metrics do worker numa thread de fundo.
+    """
+    start_http_server(porta)
+    print(f"WORKER: Métricas disponíveis em http://0.0.0.0:{porta}/metrics")
+
+#Um instante só por conexão: ela executa um cursor por vez, e uma consulta que falha
+#(sem after_cursor_execute) tem o seu valor sobrescrito pela próxima, em vez de acumular
+def _antes_da_consulta(conexao, cursor, statement, parameters, context, executemany):
+    conexao.info['inicio_consulta'] = time.perf_counter()
+
+def _depois_da_consulta(conexao, cursor, statement, parameters, context, executemany):
+    inicio = conexao.info.pop('inicio_consulta', None)
+    if inicio is not None and has_request_context():
+        g.tempo_db = g.get('tempo_db', 0.0) + (time.perf_counter() - inicio)
+
+def instrumentar_app(app):
+    """
+    Mede latência e tempo de banco por rota e expõe GET /metrics.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _antes_da_consulta):
+        event.listen(Engine, 'before_cursor_execute', _antes_da_consulta)
+        event.listen(Engine, 'after_cursor_execute', _depois_da_consulta)
+
+    @app.before_request
+    def _iniciar_cronometro():
+        g.inicio_requisicao = time.perf_counter()
+
+    @app.after_request
+    def _registrar_requisicao(resposta):
+        inicio = g.pop('inicio_requisicao', None)
+        if inicio is None or request.endpoint == 'metricas':
+            return resposta
+
+        rota = request.url_rule.rule if request.url_rule else 'desconhecida'
+        DURACAO_ROTA.labels(rota, request.method, resposta.status_code).observe(time.perf_counter() - inicio)
+        DURACAO_DB_ROTA.labels(rota).observe(g.pop('tempo_db', 0.0))
+        return resposta
+
+    @app.route('/metrics', endpoint='metricas')
+    def metricas():
+        return Response(gerar_metricas(), mimetype=CONTENT_TYPE_LATEST)
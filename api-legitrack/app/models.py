@@ -1,6 +1,7 @@
 from . import db
 from datetime import datetime, timezone
 from werkzeug.security import generate_password_hash, check_password_hash # Biblioteca para segurança da senha
+from sqlalchemy.dialects.postgresql import TSVECTOR, ARRAY
 
 #TP
 class TP_Situacao(db.Model):
@@ -21,10 +22,20 @@ class TP_Temas(db.Model):
     id_tema = db.Column(db.Integer, primary_key=True, autoincrement=False)
     ds_tema = db.Column(db.String(255), unique=True, nullable=False)
 
+#Texto indexado da busca: ementa com peso A, descrição com peso B (configuração criada na migração b0c11931b0e5)
+EXPRESSAO_BUSCA = (
+    "setweight(to_tsvector('camara.busca_pt'::regconfig, coalesce(titulo_projeto, '')), 'A') || "
+    "setweight(to_tsvector('camara.busca_pt'::regconfig, coalesce(descricao, '')), 'B')"
+)
+
 #TB
 class TB_Projeto(db.Model):
     __tablename__ = 'tb_projeto'
-    __table_args__ = {'schema': 'camara'}
+    __table_args__ = (
+        db.Index('ix_camara_tb_projeto_data_hora_id_projeto', 'data_hora', 'id_projeto'), # Keyset do feed (data_hora, id_projeto)
+        db.Index('ix_camara_tb_projeto_busca', 'busca', postgresql_using='gin'), # Busca textual
+        {'schema': 'camara'}
+    )
     
     id_projeto = db.Column(db.Integer, primary_key=True, autoincrement=False)
     titulo_projeto = db.Column(db.Text)
@@ -35,16 +46,17 @@ class TB_Projeto(db.Model):
     despacho = db.Column(db.Text)
     id_ultima_situacao = db.Column(db.Integer, db.ForeignKey('camara.tp_situacao.id_situacao'))
     id_ultima_tramitacao = db.Column(db.Integer, db.ForeignKey('camara.tp_tramitacao.id_tramitacao'))
+    busca = db.Column(TSVECTOR, db.Computed(EXPRESSAO_BUSCA, persisted=True)) # Gerada pelo banco a cada escrita
 
     tramitacoes = db.relationship('RL_Tramitacoes', backref='projeto', lazy='dynamic')
-    temas = db.relationship('TP_Temas', secondary='camara.rl_temas', lazy='subquery',
+    temas = db.relationship('TP_Temas', secondary='camara.rl_temas', lazy='select',
                             backref=db.backref('projetos', lazy=True))
     ultima_situacao = db.relationship('TP_Situacao', foreign_keys=[id_ultima_situacao])
     ultima_tramitacao = db.relationship('TP_Tramitacao', foreign_keys=[id_ultima_tramitacao])
 
 class RL_Tramitacoes(db.Model):
     __tablename__ = 'rl_tramitacoes'
-    __table_args__ = {'schema': 'camara'}
+    __table_args__ = (db.UniqueConstraint('id_projeto', 'sequencia', name='uq_tramitacao_projeto_sequencia'), {'schema': 'camara'})
     
     id_rl_tramitacao = db.Column(db.Integer, primary_key=True)
     id_projeto = db.Column(db.Integer, db.ForeignKey('camara.tb_projeto.id_projeto'), nullable=False)
@@ -61,9 +73,65 @@ rel_temas = db.Table('rl_temas',
     db.Column('id_rl_temas', db.Integer, primary_key=True),
     db.Column('id_projeto', db.Integer, db.ForeignKey('camara.tb_projeto.id_projeto')),
     db.Column('id_tema', db.Integer, db.ForeignKey('camara.tp_temas.id_tema')),
+    db.UniqueConstraint('id_projeto', 'id_tema', name='uq_tema_projeto'),
+    db.Index('ix_camara_rl_temas_id_tema_id_projeto', 'id_tema', 'id_projeto'), # Projetos de um tema
     schema='camara'
 )
 
+#Read model da lista: um card pronto por projeto, regravado pela ingestão na mesma transação
+class TB_ProjetoCard(db.Model):
+    __tablename__ = 'projeto_card'
+    __table_args__ = (
+        db.Index('ix_camara_projeto_card_data_hora_id_projeto', 'data_hora', 'id_projeto'), # Keyset das listas
+        db.Index('ix_camara_projeto_card_ids_temas', 'ids_temas', postgresql_using='gin'), # Filtro por tema (&&)
+        {'schema': 'camara'}
+    )
+    id_projeto = db.Column(db.Integer, db.ForeignKey('camara.tb_projeto.id_projeto', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    data_hora = db.Column(db.DateTime)
+    ids_temas = db.Column(ARRAY(db.Integer), nullable=False, server_default='{}')
+    card = db.Column(db.Text, nullable=False) # JSON do projeto na lista, já serializado
+
+#Controle da Sincronização
+class TB_Sincronizacao(db.Model):
+    __tablename__ = 'tb_sincronizacao'
+    __table_args__ = {'schema': 'camara'}
+    tarefa = db.Column(db.String(50), primary_key=True)
+    marca_dagua = db.Column(db.DateTime) # Fim da última janela sincronizada por completo
+    janela_inicio = db.Column(db.DateTime) # Janela do ciclo em andamento (nula quando não há ciclo aberto)
+    janela_fim = db.Column(db.DateTime)
+    ultimo_id = db.Column(db.Integer) # Checkpoint: todos os ids até este já foram gravados no ciclo em andamento
+    atualizado_em = db.Column(db.DateTime)
+
+class TB_CargaPagina(db.Model):
+    __tablename__ = 'tb_carga_paginas'
+    __table_args__ = {'schema': 'camara'}
+    chave = db.Column(db.String(50), primary_key=True, autoincrement=False) # Listagem: 'todos' ou 'ano=2023'
+    pagina = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    status = db.Column(db.String(20), nullable=False, default='pendente') # pendente, ok ou erro
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    erro = db.Column(db.Text)
+    atualizado_em = db.Column(db.DateTime)
+
+class TB_FilaFalhas(db.Model):
+    __tablename__ = 'tb_fila_falhas'
+    __table_args__ = {'schema': 'camara'}
+    id_projeto = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    classe_erro = db.Column(db.String(100), nullable=False)
+    erro = db.Column(db.Text)
+    tentativas = db.Column(db.Integer, nullable=False, default=1)
+    proxima_tentativa = db.Column(db.DateTime, index=True) # Nula quando as tentativas se esgotaram
+    criado_em = db.Column(db.DateTime)
+    atualizado_em = db.Column(db.DateTime)
+
+class TB_FilaProjetos(db.Model):
+    __tablename__ = 'tb_fila_projetos'
+    __table_args__ = {'schema': 'camara'}
+    id_projeto = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    disponivel_em = db.Column(db.DateTime, nullable=False, index=True) # Reservado até aqui; depois disso volta a ficar visível
+    reservado_por = db.Column(db.String(100)) # Réplica que pegou o projeto por último
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    enfileirado_em = db.Column(db.DateTime)
+
 #Usuário
 
 class TB_User(db.Model):
@@ -83,7 +151,11 @@ class TB_User(db.Model):
 
 class TB_Interesses(db.Model):
     __tablename__ = 'tb_interesses'
-    __table_args__ = (db.UniqueConstraint('id_user', 'id_interesse', name='uq_user_interesse'), {'schema': 'usuarios'})
+    __table_args__ = (
+        db.UniqueConstraint('id_user', 'id_interesse', name='uq_user_interesse'), # Também serve às buscas por id_user
+        db.Index('ix_usuarios_tb_interesses_id_interesse', 'id_interesse'), # Usuários interessados num tema
+        {'schema': 'usuarios'}
+    )
     id = db.Column(db.Integer, primary_key=True)
     id_user = db.Column(db.Integer, db.ForeignKey('usuarios.tb_users.id'), nullable=False)
     id_interesse = db.Column(db.Integer, db.ForeignKey('camara.tp_temas.id_tema'), nullable=False)
@@ -94,7 +166,11 @@ class TB_Interesses(db.Model):
 
 class RL_Favoritos(db.Model):
     __tablename__ = 'rl_favoritos'
-    __table_args__ = (db.UniqueConstraint('id_user', 'id_projeto', name='uq_user_projeto_favorito'), {'schema': 'usuarios'})
+    __table_args__ = (
+        db.UniqueConstraint('id_user', 'id_projeto', name='uq_user_projeto_favorito'),
+        db.Index('ix_usuarios_rl_favoritos_id_projeto', 'id_projeto'), # Quem favoritou um projeto
+        {'schema': 'usuarios'}
+    )
     id = db.Column(db.Integer, primary_key=True)
     id_user = db.Column(db.Integer, db.ForeignKey('usuarios.tb_users.id'), nullable=False)
     id_projeto = db.Column(db.Integer, db.ForeignKey('camara.tb_projeto.id_projeto'), nullable=False)
@@ -102,4 +178,16 @@ class RL_Favoritos(db.Model):
     # Permite acessar: favorito.projeto.titulo_projeto
     projeto = db.relationship('TB_Projeto')
     # Permite acessar: usuario.meus_favoritos
-    user = db.relationship('TB_User', backref=db.backref('meus_favoritos', lazy='dynamic'))
\ No newline at end of file
+    user = db.relationship('TB_User', backref=db.backref('meus_favoritos', lazy='dynamic'))
+
+
+class TB_Feed(db.Model):
+    __tablename__ = 'tb_feed'
+    __table_args__ = (
+        db.Index('ix_usuarios_tb_feed_id_user_data_hora_id_projeto', 'id_user', 'data_hora', 'id_projeto'), # Keyset do feed de um usuário
+        {'schema': 'usuarios'}
+    )
+    #Feed pré-calculado (FEED_PRECALCULADO=1): projetos dos temas de interesse e favoritos de cada usuário
+    id_user = db.Column(db.Integer, db.ForeignKey('usuarios.tb_users.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    id_projeto = db.Column(db.Integer, db.ForeignKey('camara.tb_projeto.id_projeto', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    data_hora = db.Column(db.DateTime) # Cópia de tb_projeto.data_hora, para paginar sem ir ao projeto
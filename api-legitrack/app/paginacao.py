@@ -0,0 +1,53 @@
+import base64
+import json
+import os
+from datetime import datetime
+
+TAMANHO_PAGINA_PADRAO = int(os.environ.get('PAGINA_TAMANHO_PADRAO', 40))
+TAMANHO_PAGINA_MAXIMO = int(os.environ.get('PAGINA_TAMANHO_MAXIMO', 100))
+
+'''
+=================== Paginação por keyset ===================
+'''
+
+#O cursor é a chave de ordenação da última linha entregue. Para o cliente ele é
+#opaco (base64 de um JSON); aqui dentro é uma lista de valores
+
+def tamanho_da_pagina(valor):
+    """
+    None -> padrão. Fora de 1..máximo é ajustado. ValueError se não for inteiro.
+    """
+    if valor is None:
+        return TAMANHO_PAGINA_PADRAO
+    if isinstance(valor, bool):
+        raise ValueError("tamanho inválido")
+    return max(1, min(int(valor), TAMANHO_PAGINA_MAXIMO))
+
+def codificar_cursor(*valores):
+    valores = [valor.isoformat() if isinstance(valor, datetime) else valor for valor in valores]
+    return base64.urlsafe_b64encode(json.dumps(valores, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor, quantidade):
+    """
+    Devolve a lista de valores do cursor. ValueError se ele não for um cursor válido.
+    """
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (TypeError, ValueError) as e:
+        raise ValueError("cursor inválido") from e
+    if not isinstance(valores, list) or len(valores) != quantidade:
+        raise ValueError("cursor inválido")
+    return valores
+
+def data_do_cursor(valor):
+    return datetime.fromisoformat(valor) if valor is not None else None
+
+def fatiar_pagina(linhas, tamanho, chave):
+    """
+    Recebe até tamanho + 1 linhas. Devolve (linhas da página, next_cursor);
+    next_cursor é None na última página. chave(linha) dá os valores do cursor.
+    """
+    if len(linhas) <= tamanho:
+        return linhas, None
+    linhas = linhas[:tamanho]
+    return linhas, codificar_cursor(*chave(linhas[-1]))
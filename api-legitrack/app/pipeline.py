@@ -0,0 +1,171 @@
+import queue
+import threading
+import time
+from .metricas import FILA_PIPELINE
+
+#Marca o fim do fluxo em cada fila
+_FIM = object()
+
+class Estagio:
+    def __init__(self, nome):
+        self.nome = nome
+        self.processados = 0
+        self._lock = threading.Lock()
+
+    def contar(self, quantidade=1):
+        with self._lock:
+            self.processados += quantidade
+
+class Pipeline:
+    """
+    Ingestão em estágios ligados por filas limitadas:
+
+        listagem -> busca (N threads) -> transformação -> gravação
+
+    A gravação roda na thread que chama executar(), que é a única a escrever
+    no banco. Como as filas têm tamanho máximo, a listagem espera quando os
+    estágios seguintes estão atrasados, e a memória não cresce com a janela.
+    """
+
+    def __init__(self, prefixo, concorrencia=8, tamanho_fila=200, tamanho_lote=100, intervalo_relatorio=30):
+        self.prefixo = prefixo
+        self.concorrencia = max(1, concorrencia)
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_relatorio = intervalo_relatorio
+
+        self.filas = {
+            "busca": queue.Queue(tamanho_fila),
+            "transformacao": queue.Queue(tamanho_fila),
+            "gravacao": queue.Queue(tamanho_fila)
+        }
+        self.estagios = {nome: Estagio(nome) for nome in ("listagem", "busca", "transformacao", "gravacao")}
+        self.listagem_completa = False
+
+        self._parar = threading.Event()
+        self._buscas_ativas = self.concorrencia
+        self._buscas_lock = threading.Lock()
+        self._inicio = None
+
+    def _colocar(self, fila, item):
+        #put com timeout para não travar para sempre se a gravação morrer
+        while not self._parar.is_set():
+            try:
+                fila.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _listar(self, listar):
+        try:
+            for id_projeto, contexto in listar():
+                if not self._colocar(self.filas["busca"], (id_projeto, contexto)):
+                    return
+                self.estagios["listagem"].contar()
+            self.listagem_completa = True
+        except Exception as e:
+            print(f"{self.prefixo}: [ERRO] Listagem interrompida: {e}")
+        finally:
+            for _ in range(self.concorrencia):
+                self._colocar(self.filas["busca"], _FIM)
+
+    def _buscar(self, buscar):
+        while not self._parar.is_set():
+            entrada = self.filas["busca"].get()
+            if entrada is _FIM:
+                break
+
+            id_projeto, contexto = entrada
+            try:
+                resultado, erro = buscar(id_projeto, contexto), None
+            except Exception as e:
+                resultado, erro = None, e
+
+            self._colocar(self.filas["transformacao"], (id_projeto, contexto, resultado, erro))
+            self.estagios["busca"].contar()
+
+        #A última thread de busca a terminar avisa o estágio seguinte
+        with self._buscas_lock:
+            self._buscas_ativas -= 1
+            ultima = self._buscas_ativas == 0
+        if ultima:
+            self._colocar(self.filas["transformacao"], _FIM)
+
+    def _transformar(self, transformar):
+        while not self._parar.is_set():
+            entrada = self.filas["transformacao"].get()
+            if entrada is _FIM:
+                break
+
+            id_projeto, contexto, resultado, erro = entrada
+            registro = None
+            if erro is None:
+                try:
+                    registro = transformar(id_projeto, contexto, resultado)
+                except Exception as e:
+                    erro = e
+
+            self._colocar(self.filas["gravacao"], (id_projeto, registro, erro))
+            self.estagios["transformacao"].contar()
+
+        self._colocar(self.filas["gravacao"], _FIM)
+
+    def relatorio(self):
+        duracao = max(time.perf_counter() - self._inicio, 1e-9)
+        partes = []
+        for nome, estagio in self.estagios.items():
+            #Cada fila aparece antes do estágio que a consome
+            if nome in self.filas:
+                fila = self.filas[nome]
+                partes.append(f"[fila {fila.qsize()}/{fila.maxsize}]")
+            partes.append(f"{nome} {estagio.processados} ({estagio.processados / duracao:.1f}/s)")
+        return " -> ".join(partes)
+
+    def executar(self, listar, buscar, transformar, gravar):
+        """
+        listar() gera (id_projeto, contexto).
+        buscar(id_projeto, contexto) devolve o resultado da API (roda em N threads).
+        transformar(id_projeto, contexto, resultado) devolve o registro a gravar, ou None.
+        gravar(lote) recebe uma lista de (id_projeto, registro, erro) e roda nesta thread.
+        """
+        self._inicio = time.perf_counter()
+        threads = [threading.Thread(target=self._listar, args=(listar,), daemon=True)]
+        threads += [threading.Thread(target=self._buscar, args=(buscar,), daemon=True) for _ in range(self.concorrencia)]
+        threads += [threading.Thread(target=self._transformar, args=(transformar,), daemon=True)]
+        for thread in threads:
+            thread.start()
+
+        ultimo_relatorio = time.perf_counter()
+        lote = []
+        try:
+            while True:
+                try:
+                    entrada = self.filas["gravacao"].get(timeout=1)
+                except queue.Empty:
+                    entrada = None
+
+                fim = entrada is _FIM
+                if entrada is not None and not fim:
+                    lote.append(entrada)
+
+                #Grava quando o lote enche, no fim, ou quando a fila esvaziou (para o checkpoint andar)
+                if lote and (fim or entrada is None or len(lote) >= self.tamanho_lote):
+                    gravar(lote)
+                    self.estagios["gravacao"].contar(len(lote))
+                    lote = []
+
+                for nome, fila in self.filas.items():
+                    FILA_PIPELINE.labels(self.prefixo, nome).set(fila.qsize())
+
+                if time.perf_counter() - ultimo_relatorio >= self.intervalo_relatorio:
+                    print(f"{self.prefixo}: {self.relatorio()}")
+                    ultimo_relatorio = time.perf_counter()
+
+                if fim:
+                    break
+        finally:
+            self._parar.set()
+
+        for thread in threads:
+            thread.join(timeout=5)
+        print(f"{self.prefixo}: Pipeline concluído. {self.relatorio()}")
@@ -0,0 +1,103 @@
+import gzip
+import os
+from decimal import Decimal
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+#orjson e brotli são opcionais: sem eles, json da biblioteca padrão e só gzip
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+#Abaixo disso o cabeçalho e a CPU custam mais do que se economiza
+COMPRESSAO_MINIMO = int(os.environ.get('COMPRESSAO_MINIMO', 1024))
+#Níveis rápidos: a resposta é dinâmica, comprimida a cada requisição
+NIVEL_GZIP = int(os.environ.get('COMPRESSAO_NIVEL_GZIP', 6))
+QUALIDADE_BROTLI = int(os.environ.get('COMPRESSAO_QUALIDADE_BROTLI', 4))
+
+TIPOS_COMPRIMIVEIS = ('application/json', 'application/x-ndjson', 'text/html', 'text/plain')
+
+'''
+=================== JSON (orjson) ===================
+'''
+
+def _padrao(objeto):
+    #orjson já serializa datetime, date, UUID e dataclass; o resto cai aqui
+    if isinstance(objeto, Decimal):
+        return str(objeto)
+    return DefaultJSONProvider.default(objeto)
+
+class ProvedorJSONRapido(DefaultJSONProvider):
+    """
+    jsonify/app.json com orjson: datetime sai em ISO 8601 (igual ao isoformat())
+    e o corpo vai em bytes direto para a resposta, sem passar por str.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_padrao, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        dados = self._prepare_response_obj(args, kwargs)
+        corpo = orjson.dumps(dados, default=_padrao, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(corpo, mimetype=self.mimetype)
+
+'''
+=================== Compressão ===================
+'''
+
+def codificacao_aceita(cabecalho_aceito):
+    """
+    'br' se o cliente aceita e o brotli está instalado, senão 'gzip' se ele aceita, senão None.
+    """
+    if brotli is not None and cabecalho_aceito['br']:
+        return 'br'
+    if cabecalho_aceito['gzip']:
+        return 'gzip'
+    return None
+
+def comprimir(dados, codificacao):
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=QUALIDADE_BROTLI)
+    return gzip.compress(dados, compresslevel=NIVEL_GZIP)
+
+def comprimir_resposta(resposta):
+    """
+    after_request: comprime respostas prontas (não as em streaming) acima de COMPRESSAO_MINIMO.
+    """
+    if (resposta.status_code != 200 or resposta.direct_passthrough or resposta.is_streamed
+            or 'Content-Encoding' in resposta.headers or resposta.mimetype not in TIPOS_COMPRIMIVEIS):
+        return resposta
+
+    resposta.vary.add('Accept-Encoding')
+    codificacao = codificacao_aceita(request.accept_encodings)
+    dados = resposta.get_data()
+    if codificacao is None or len(dados) < COMPRESSAO_MINIMO:
+        return resposta
+
+    resposta.set_data(comprimir(dados, codificacao))
+    resposta.headers['Content-Encoding'] = codificacao
+
+    #Outra representação, mesmo conteúdo: o ETag passa a ser fraco
+    etag, fraco = resposta.get_etag()
+    if etag and not fraco:
+        resposta.set_etag(etag, weak=True)
+    return resposta
+
+def configurar_respostas(app):
+    app.json = ProvedorJSONRapido(app)
+    app.after_request(comprimir_resposta)
@@ -1,8 +1,13 @@
-from flask import Blueprint, jsonify, request, render_template
+from flask import Blueprint, Response, jsonify, request, render_template, stream_with_context
 import requests
+from decimal import Decimal, InvalidOperation
 from werkzeug.security import generate_password_hash, check_password_hash
 from . import db
-from .models import TB_Projeto, TP_Situacao, RL_Tramitacoes, TP_Temas, TB_Interesses, TB_User
+from .models import TB_Projeto, TB_ProjetoCard, TP_Situacao, RL_Tramitacoes, TP_Temas, TB_Interesses, TB_User
+from . import cache, feed, exportacao
+from .paginacao import tamanho_da_pagina, decodificar_cursor, data_do_cursor, fatiar_pagina
+from .leitura import consulta_cards, resposta_com_cards, buscar_pagina_de_projetos, buscar_projetos_por_texto
+from .leitura import versao_do_projeto, detalhe_do_projeto, pagina_de_tramitacoes, tramitacao_da_lista
 
 bp = Blueprint('routes', __name__)
 
@@ -70,39 +75,145 @@ def projetos_iniciais():
     if not isinstance(temas, list):
          return jsonify({"erro": "'ids_temas' deve ser uma lista."}), 400
 
+    try:
+        temas = cache.normalizar_temas(temas)
+    except (ValueError, TypeError):
+        return jsonify({"erro": "'ids_temas' deve conter apenas ids inteiros."}), 400
+
+    try:
+        tamanho = tamanho_da_pagina(dados.get('tamanho_pagina'))
+    except (ValueError, TypeError):
+        return jsonify({"erro": "'tamanho_pagina' deve ser um inteiro."}), 400
+
+    cursor_texto = dados.get('cursor')
+    cursor = None
+    if cursor_texto is not None:
+        try:
+            data_hora, id_projeto = decodificar_cursor(str(cursor_texto), 2)
+            cursor = (data_do_cursor(data_hora), int(id_projeto))
+        except (ValueError, TypeError):
+            return jsonify({"erro": "'cursor' inválido."}), 400
+
+    #Mesmo conjunto de temas, mesma resposta, até o worker gravar projetos de algum deles
+    chave = cache.chave_da_consulta(temas, cursor_texto or "", tamanho)
+    corpo = cache.ler(chave)
+    if corpo is not None:
+        return Response(corpo, status=200, mimetype='application/json')
+
     try:
         #Lista Vazia - Retorna Todos os Temas
-        query = db.select(TB_Projeto)
+        query = consulta_cards()
 
         #Lista com Temas Definidos - Retorna Apenas Aqueles Temas
         if temas:
-            query = query.filter(TB_Projeto.temas.any(TP_Temas.id_tema.in_(temas))).distinct()
-
-        query = query.order_by(TB_Projeto.data_hora.desc().nullslast())
-        projetos_encontrados = db.session.scalars(query.limit(40)).all()
-
-        projetos_json = []  
-        for projeto in projetos_encontrados:
-            projetos_json.append({
-                "id": projeto.id_projeto,
-                "titulo": projeto.titulo_projeto,
-                "descricao": projeto.descricao,
-                "ano_inicio": projeto.ano_inicio,
-                "sigla_orgao": projeto.sigla_orgao,
-                "despacho": projeto.despacho,
-                "ultima_situação": projeto.ultima_situacao.ds_situacao if projeto.ultima_situacao else "",
-                "ultima_tramitação": projeto.ultima_tramitacao.ds_tramitacao if projeto.ultima_tramitacao else "",
-                "ultima_data": projeto.data_hora.isoformat() if projeto.data_hora else None
-            })
+            query = query.where(TB_ProjetoCard.ids_temas.overlap(temas))
 
-        return jsonify({
-            "mensagem": f"Projetos: {len(projetos_json)}. Temas: {len(temas)}.",
-            "projetos": projetos_json
-        }), 200
+        #Uma linha a mais só para saber se existe próxima página
+        projetos_encontrados, proximo_cursor = fatiar_pagina(
+            buscar_pagina_de_projetos(query, cursor, tamanho + 1), tamanho,
+            lambda projeto: (projeto.data_hora, projeto.id_projeto)
+        )
+
+        corpo = resposta_com_cards(f"Projetos: {len(projetos_encontrados)}. Temas: {len(temas)}.", projetos_encontrados, proximo_cursor)
+        cache.gravar(chave, corpo)
+        return Response(corpo, status=200, mimetype='application/json')
 
     except Exception as e:
         print(f"Erro ao consultar o banco: {e}")
-        return jsonify({"erro": "Um erro ocorreu ao processar sua solicitação."}), 500    
+        return jsonify({"erro": "Um erro ocorreu ao processar sua solicitação."}), 500
+
+#Busca por palavra-chave na ementa e na descrição: /projetos/busca?q=...&tema=1&tema=2
+@bp.route("/projetos/busca", methods=["GET"])
+def busca_projetos():
+    texto = request.args.get('q', '').strip()
+    if not texto:
+        return jsonify({"erro": "Informe o texto da busca em 'q'."}), 400
+
+    try:
+        temas = cache.normalizar_temas(request.args.getlist('tema'))
+    except (ValueError, TypeError):
+        return jsonify({"erro": "'tema' deve ser um id inteiro."}), 400
+
+    try:
+        tamanho = tamanho_da_pagina(request.args.get('tamanho_pagina'))
+    except (ValueError, TypeError):
+        return jsonify({"erro": "'tamanho_pagina' deve ser um inteiro."}), 400
+
+    cursor = None
+    if request.args.get('cursor') is not None:
+        try:
+            relevancia, id_projeto = decodificar_cursor(request.args['cursor'], 2)
+            cursor = (Decimal(str(relevancia)), int(id_projeto))
+        except (ValueError, TypeError, InvalidOperation):
+            return jsonify({"erro": "'cursor' inválido."}), 400
+
+    try:
+        query = consulta_cards().join(TB_Projeto, TB_Projeto.id_projeto == TB_ProjetoCard.id_projeto)
+        if temas:
+            query = query.where(TB_ProjetoCard.ids_temas.overlap(temas))
+
+        projetos_encontrados, proximo_cursor = fatiar_pagina(
+            buscar_projetos_por_texto(query, texto, cursor, tamanho + 1), tamanho,
+            lambda projeto: (str(projeto.relevancia), projeto.id_projeto)
+        )
+
+        corpo = resposta_com_cards(f"Projetos: {len(projetos_encontrados)}. Temas: {len(temas)}.", projetos_encontrados, proximo_cursor)
+        return Response(corpo, status=200, mimetype='application/json')
+
+    except Exception as e:
+        print(f"Erro ao consultar o banco: {e}")
+        return jsonify({"erro": "Um erro ocorreu ao processar sua solicitação."}), 500
+
+#O ETag é a versão do projeto (maior sequencia). O cliente que já tem a versão
+#atual recebe 304 sem o banco montar nada além de uma consulta no índice
+def _com_etag(resposta, etag):
+    #Fraco: a mesma versão pode sair comprimida ou não (respostas.comprimir_resposta)
+    resposta.set_etag(etag, weak=True)
+    resposta.headers['Cache-Control'] = 'no-cache' #Pode guardar, mas revalida sempre
+    return resposta
+
+def _etag_do_projeto(id_projeto):
+    versao = versao_do_projeto(id_projeto)
+    return f"{id_projeto}.{versao}" if versao is not None else None
+
+# Buscar por ID de um projeto
+@bp.route("/projetos/<int:id>", methods=["GET"])
+def detalhes_do_projeto(id):
+    etag = _etag_do_projeto(id)
+    if etag is None:
+        return jsonify({"erro": "Projeto não encontrado"}), 404
+    if request.if_none_match.contains_weak(etag):
+        return _com_etag(Response(status=304), etag)
+
+    return _com_etag(jsonify(detalhe_do_projeto(id)), etag)
+
+# Buscar as tramitações de um projeto: /projetos/tramitacoes/<id>?tamanho_pagina=&cursor=
+@bp.route("/projetos/tramitacoes/<int:id>", methods=["GET"])
+def tramitacoes(id):
+    try:
+        tamanho = tamanho_da_pagina(request.args.get('tamanho_pagina'))
+    except (ValueError, TypeError):
+        return jsonify({"erro": "'tamanho_pagina' deve ser um inteiro."}), 400
+
+    cursor = None
+    if request.args.get('cursor') is not None:
+        try:
+            sequencia, = decodificar_cursor(request.args['cursor'], 1)
+            cursor = int(sequencia)
+        except (ValueError, TypeError):
+            return jsonify({"erro": "'cursor' inválido."}), 400
+
+    etag = _etag_do_projeto(id)
+    if etag is None:
+        return jsonify({"erro": "Projeto não encontrado"}), 404
+    if request.if_none_match.contains_weak(etag):
+        return _com_etag(Response(status=304), etag)
+
+    linhas, proximo_cursor = fatiar_pagina(pagina_de_tramitacoes(id, cursor, tamanho + 1), tamanho, lambda linha: (linha.sequencia,))
+    return _com_etag(jsonify({
+        "tramitacoes": [tramitacao_da_lista(linha) for linha in linhas],
+        "next_cursor": proximo_cursor
+    }), etag)
 
 #Puxa Temas
 @bp.route("/interesses", methods=["GET"])
@@ -161,6 +272,8 @@ def interesses_user(id_user):
 
             if adicionados:
                 db.session.commit()
+                if feed.feed_precalculado():
+                    feed.recalcular_feed(id_user)
                 mensagem = "Novos interesses salvos com sucesso!"
             else:
                 mensagem = "Nenhum interesse novo para adicionar (usuário já seguia todos)."
@@ -175,6 +288,64 @@ def interesses_user(id_user):
             print(f"Erro no servidor: {e}")
             return jsonify({"erro": "Erro interno ao salvar interesses."}), 500
 
+#Feed do usuário: projetos dos temas que ele segue e os que favoritou, numa leitura só
+@bp.route("/feed/<int:id_user>", methods=["GET"])
+def feed_do_usuario(id_user):
+    try:
+        tamanho = tamanho_da_pagina(request.args.get('tamanho_pagina'))
+    except (ValueError, TypeError):
+        return jsonify({"erro": "'tamanho_pagina' deve ser um inteiro."}), 400
+
+    cursor = None
+    if request.args.get('cursor') is not None:
+        try:
+            data_hora, id_projeto = decodificar_cursor(request.args['cursor'], 2)
+            cursor = (data_do_cursor(data_hora), int(id_projeto))
+        except (ValueError, TypeError):
+            return jsonify({"erro": "'cursor' inválido."}), 400
+
+    try:
+        projetos_encontrados, proximo_cursor = fatiar_pagina(
+            feed.buscar_pagina_do_feed(id_user, cursor, tamanho + 1), tamanho,
+            lambda projeto: (projeto.data_feed, projeto.id_projeto)
+        )
+
+        #Só uma página vazia precisa saber se o usuário existe
+        if not projetos_encontrados and not db.session.get(TB_User, id_user):
+            return jsonify({"erro": "Usuário não encontrado"}), 404
+
+        corpo = resposta_com_cards(f"Projetos: {len(projetos_encontrados)}.", projetos_encontrados, proximo_cursor)
+        return Response(corpo, status=200, mimetype='application/json')
+
+    except Exception as e:
+        print(f"Erro ao consultar o banco: {e}")
+        return jsonify({"erro": "Um erro ocorreu ao processar sua solicitação."}), 500
+
+'''
+=================== Exportação (parceiros) ===================
+'''
+
+#/export/projetos.ndjson?since=2025-01-01&tema=40: um JSON por linha, enviado conforme sai do banco
+@bp.route("/export/<string:conjunto>.ndjson", methods=["GET"])
+def exportar(conjunto):
+    geradores = {"projetos": exportacao.linhas_de_projetos, "tramitacoes": exportacao.linhas_de_tramitacoes}
+    if conjunto not in geradores:
+        return jsonify({"erro": "Exportação desconhecida. Use projetos ou tramitacoes."}), 404
+
+    try:
+        desde = data_do_cursor(request.args.get('since'))
+    except ValueError:
+        return jsonify({"erro": "'since' deve ser uma data ISO 8601."}), 400
+
+    try:
+        temas = cache.normalizar_temas(request.args.getlist('tema'))
+    except (ValueError, TypeError):
+        return jsonify({"erro": "'tema' deve ser um id inteiro."}), 400
+
+    linhas = geradores[conjunto](desde=desde, temas=temas)
+    return Response(stream_with_context(linhas), mimetype='application/x-ndjson',
+                    headers={"Content-Disposition": f"attachment; filename={conjunto}.ndjson"})
+
 '''
 =========================== OLD ===========================
 # Busca por tema de um projeto
@@ -192,59 +363,6 @@ def listar_projetos():
     resposta = requests.get(url)
     return jsonify(resposta.json())
 
-# Buscar por ID de um projeto
-@bp.route("/projetos/<int:id>", methods=["GET"])
-def detalhes_do_projeto(id):
-    url_base = "https://dadosabertos.camara.leg.br/api/v2/proposicoes/"
-
-    resposta = requests.get(f"{url_base}{id}")
-    dados_projeto = resposta.json().get('dados', {})
-
-    # Reune as informações do PL necessárias para formar a descrição
-    descricao_PL = {
-        "projeto": dados_projeto.get("siglaTipo"),
-        "ano_do_projeto": dados_projeto.get("ano"),
-        "numero_do_projeto": dados_projeto.get("numero")
-    }
-
-    # Formata as informações para que a descrição esteja no modelo correto
-    descricao_PL_formatada = f"{descricao_PL['projeto']} {descricao_PL['ano_do_projeto']}/{descricao_PL['numero_do_projeto']}"
-
-    resultado = {
-        "id": dados_projeto.get("id"),
-        "informacoes": {
-            "titulo": dados_projeto.get("ementa"),
-            "descricao": descricao_PL_formatada,
-            "ano_inicio": dados_projeto.get("ano")
-        },
-        "status_tramitacao_atual": {
-            "descricao_tramitacao": dados_projeto.get("statusProposicao", {}).get("descricaoTramitacao", ""),
-            "descricao_situacao": dados_projeto.get("statusProposicao", {}).get("descricaoSituacao", ""),
-            "sigla_orgao": dados_projeto.get("statusProposicao", {}).get("siglaOrgao", ""),
-            "data_hora": dados_projeto.get("statusProposicao", {}).get("dataHora", ""),
-            "despacho": dados_projeto.get("statusProposicao", {}).get("despacho", "")         
-        } 
-    }
-    return jsonify(resultado)
-
-# Buscar as tramitações de um projeto
-@bp.route("/projetos/tramitacoes/<int:id>", methods=["GET"])
-def tramitacoes(id):
-    url = f"https://dadosabertos.camara.leg.br/api/v2/proposicoes/{id}/tramitacoes"
-
-    resposta = requests.get(url)
-    dados_tramitacoes = resposta.json().get("dados", {})
-
-    resultado = [{
-        "data": tramitacao.get("dataHora")[:10],
-        "hora": tramitacao.get("dataHora")[-5:],
-        "situacao": tramitacao.get("descricaoSituacao"),
-        "tramitacao": tramitacao.get("descricaoTramitacao")
-    } for tramitacao in dados_tramitacoes
-    ]
-
-    return resultado
-
 # Busca todos os temas existentes
 @bp.route("/projetos/temas", methods=["GET"])
 def listar_temas_projetos():
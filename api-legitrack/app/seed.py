@@ -1,14 +1,19 @@
+import argparse
+import multiprocessing
+import os
 import time
 import requests
 from datetime import datetime
 from . import create_app, db
-from .models import TP_Situacao, TP_Tramitacao, TP_Temas, TB_Projeto, RL_Tramitacoes, rel_temas
-from sqlalchemy.exc import IntegrityError, OperationalError
+from .models import TP_Situacao, TP_Tramitacao, TP_Temas, TB_CargaPagina
+from .gravacao import montar_item, confirmar_lote
+from .camara import CamaraClient, CAMARA_TAXA_INICIAL, CAMARA_TAXA_MINIMA, CAMARA_TAXA_MAXIMA
+from .limitador import LimitadorAdaptativo
+from sqlalchemy.exc import OperationalError
 from sqlalchemy import text
-from urllib.parse import urlparse, parse_qs
+from sqlalchemy.dialects.postgresql import insert
 
-app = create_app()
-app.app_context().push()
+camara = CamaraClient()
 
 def wait_for_db():
     print("SEEDER: Aguardando o banco de dados ficar pronto...")
@@ -37,9 +42,7 @@ def sicronizar_tabelas_tp(url, model_class, id_field_name, ds_field_name, api_id
     print(f"SEEDER: Iniciando sicronização da tabela '{tabela_nome}'...")
     
     try:
-        resposta = requests.get(url, timeout=10)
-        resposta.raise_for_status()
-        dados_api = resposta.json().get('dados', {})
+        dados_api = camara.get_dados(url) or {}
 
         if not dados_api:
             print(f"SEEDER: Nenhum dado recebido da API para '{tabela_nome}'. Pulando.")
@@ -104,218 +107,278 @@ def sicronizar_tabelas_tp(url, model_class, id_field_name, ds_field_name, api_id
 def processar_pagina_de_projetos(projetos_desta_pagina):
     """
     Recebe uma lista de projetos (1 página) e salva
-    todos eles (Projeto, Tramitações, Temas) no banco.
+    todos eles (Projeto, Tramitações, Temas) no banco,
+    num único lote. Retorna (novos, atualizados, tramitações, falhas).
     """
-    projetos_atualizados = 0
-    projetos_novos = 0
-    novas_tramitacoes_total = 0
-
     if not projetos_desta_pagina:
-        return 0, 0, 0
+        return 0, 0, 0, 0
+
+    lote = []
+    falhas_de_busca = 0
 
     for projeto_resumido in projetos_desta_pagina:
         id_api = None
         try:
             id_api_str = projeto_resumido.get('id')
             if not id_api_str:
-                print(f"SEEDER (Projetos): [AVISO] Item de projeto resumido sem ID. Pulando item.")
+                print("SEEDER (Projetos): [AVISO] Item de projeto resumido sem ID. Pulando item.")
                 continue
             
             id_api = int(id_api_str)
-            projeto_db = db.session.get(TB_Projeto, id_api)
-
-            if not projeto_db:
-                projeto_db = TB_Projeto(id_projeto=id_api)
-                db.session.add(projeto_db)
-                projetos_novos += 1
-            else:
-                projetos_atualizados += 1
-
-            projeto_db.titulo_projeto = projeto_resumido.get('ementa')
-            projeto_db.descricao = f"{projeto_resumido.get('siglaTipo')} {projeto_resumido.get('numero')}/{projeto_resumido.get('ano')}"
-            projeto_db.ano_inicio = int(projeto_resumido.get('ano'))
 
-            sequencias_existentes = {t.sequencia for t in projeto_db.tramitacoes}
-            url_tram = f"https://dadosabertos.camara.leg.br/api/v2/proposicoes/{id_api}/tramitacoes"
-            resposta_tram = requests.get(url_tram, timeout=10)
-            resposta_tram.raise_for_status()
-            tramitacoes_api = resposta_tram.json().get('dados', [])
+            tramitacoes_api = camara.get_dados(f"/proposicoes/{id_api}/tramitacoes") or []
 
-            novas_tramitacoes_para_salvar = []
-            
+            ultimo_status = None
             if not tramitacoes_api:
                 print(f"SEEDER (Projetos): [AVISO] Projeto {id_api} sem tramitações. Pulando.")
             else:
-                for item_tram_api in tramitacoes_api:
-                    try:
-                        if not isinstance(item_tram_api, dict):
-                            continue
-                        
-                        seq_api = int(item_tram_api['sequencia'])
-                        
-                        if seq_api not in sequencias_existentes:
-                            nova_tram = RL_Tramitacoes(
-                                id_projeto = id_api,
-                                sequencia = seq_api,
-                                data_hora = datetime.fromisoformat(item_tram_api['dataHora']),
-                                id_situacao = int(item_tram_api['codSituacao']),
-                                id_tramitacao = int(item_tram_api['codTipoTramitacao'])
-                            )
-                            novas_tramitacoes_para_salvar.append(nova_tram)
-                            
-                    except (ValueError, TypeError, KeyError, AttributeError):
-                        print(f"SEEDER (Projetos): [AVISO] Item de tramitação malformado para projeto {id_api}. Pulando item.")
-
-                if novas_tramitacoes_para_salvar:
-                    db.session.add_all(novas_tramitacoes_para_salvar)
-                    novas_tramitacoes_total += len(novas_tramitacoes_para_salvar)
-
                 ultimo_status = tramitacoes_api[-1]
-                try:
-                    projeto_db.data_hora = datetime.fromisoformat(ultimo_status.get("dataHora"))
-                    projeto_db.sigla_orgao = ultimo_status.get("siglaOrgao")
-                    projeto_db.despacho = ultimo_status.get("despacho")
-                    projeto_db.id_ultima_situacao = int(ultimo_status.get("codSituacao"))
-                    projeto_db.id_ultima_tramitacao = int(ultimo_status.get("codTipoTramitacao"))
-                except (ValueError, TypeError):
-                     print(f"SEEDER (Projetos): [AVISO] 'statusProposicao' (da tramitação) malformado para projeto {id_api}.")
-
-            resposta_tema = requests.get(f'https://dadosabertos.camara.leg.br/api/v2/proposicoes/{id_api}/temas', timeout=10)
-            resposta_tema.raise_for_status()
-            projeto_temas_api = resposta_tema.json().get("dados", [])
-
-            if projeto_temas_api:
-                temas_existentes_ids = {tema.id_tema for tema in projeto_db.temas}
-                for tema_api in projeto_temas_api:
-                    try:
-                        if not isinstance(tema_api, dict):
-                           continue
-                        
-                        id_tema_api = int(tema_api.get('cod'))
-                        if id_tema_api not in temas_existentes_ids:
-                            tema_db = db.session.get(TP_Temas, id_tema_api)
-                            if tema_db:
-                                projeto_db.temas.append(tema_db)
-                            else:
-                                print(f"SEEDER (Projetos): [AVISO] Tema {id_tema_api} não encontrado no banco local. Pulei.")
-                    except (ValueError, TypeError, KeyError, AttributeError):
-                        print(f"SEEDER (Projetos): [AVISO] Item de tema malformado para projeto {id_api}. Pulando item.")
-
-            db.session.commit()
+
+            projeto_temas_api = camara.get_dados(f"/proposicoes/{id_api}/temas") or []
+
+            lote.append(montar_item(projeto_resumido, ultimo_status, tramitacoes_api, projeto_temas_api, "SEEDER (Projetos)"))
             
         except Exception as e:
             print(f"SEEDER (Projetos): [ERRO CRÍTICO] Falha ao processar projeto {id_api}: {e}")
-            db.session.rollback()
+            falhas_de_busca += 1
 
-    return projetos_novos, projetos_atualizados, novas_tramitacoes_total
+    projetos_novos, projetos_atualizados, novas_tramitacoes_total, falhas = confirmar_lote(lote, "SEEDER (Projetos)")
+    return projetos_novos, projetos_atualizados, novas_tramitacoes_total, falhas_de_busca + len(falhas)
 
-def get_total_pages():
+PARAMS_LISTAGEM = {"itens": 100, "ordem": "ASC", "ordenarPor": "id"}
+
+def get_total_pages(filtros=None):
     """
     Faz uma chamada à API para descobrir o número total de páginas
-    no endpoint de "Full Sync".
+    no endpoint de "Full Sync" (opcionalmente filtrado, ex: {"ano": 2023}).
     """
     try:
-        url = 'https://dadosabertos.camara.leg.br/api/v2/proposicoes?pagina=1&itens=1&ordem=ASC&ordenarPor=id'
-        print(f"SEEDER: Verificando número total de páginas em: {url}")
-        
-        resposta = requests.get(url, timeout=10)
-        resposta.raise_for_status()
-        links_da_api = resposta.json().get('links', [])
-        
-        for link in links_da_api:
-            if link.get('rel') == 'last':
-                last_link_href = link.get('href')
-                query_params = parse_qs(urlparse(last_link_href).query)
-                total_paginas = int(query_params['pagina'][0])
-                return total_paginas
+        print(f"SEEDER: Verificando número total de páginas em: {camara.url('/proposicoes')} {filtros or ''}")
+        return camara.total_de_paginas("/proposicoes", {**PARAMS_LISTAGEM, **(filtros or {})})
                 
     except Exception as e:
         print(f"SEEDER: [ERRO CRÍTICO] Não foi possível obter o total de páginas: {e}")
         return None
 
-if __name__ == "__main__":
-    
-    if not wait_for_db():
-        exit(1)
+'''
+=================== Carga paralela com checkpoint por página ===================
+'''
 
-    print(f"\n--- [SEED SCRIPT]: {datetime.now()} - INICIANDO CARGA INICIAL ---")
-    
-    print("\n" + "="*30 + " FASE 1: METADADOS (TP) " + "="*30)
-    sicronizar_tabelas_tp(
-        url="https://dadosabertos.camara.leg.br/api/v2/referencias/proposicoes/codSituacao",
-        model_class=TP_Situacao, id_field_name="id_situacao", ds_field_name="ds_situacao",
-        api_id_key="cod", api_desc_key="nome"
+#A chave identifica a listagem: 'todos' (sem filtro) ou 'ano=2023'
+def filtros_da_chave(chave):
+    if chave == 'todos':
+        return {}
+    campo, valor = chave.split('=', 1)
+    return {campo: valor}
+
+def interpretar_faixas(texto):
+    """
+    Converte '1-100,150,200-210' em uma lista ordenada de páginas.
+    """
+    paginas = set()
+    for parte in texto.split(','):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if '-' in parte:
+            inicio, fim = (int(p) for p in parte.split('-', 1))
+            paginas.update(range(inicio, fim + 1))
+        else:
+            paginas.add(int(parte))
+    return sorted(p for p in paginas if p >= 1)
+
+def registrar_paginas(chave, paginas):
+    """
+    Registra as páginas no checkpoint (as que já existem ficam como estão)
+    e retorna as que ainda não foram concluídas.
+    """
+    tabela = TB_CargaPagina.__table__
+    db.session.execute(
+        insert(tabela).on_conflict_do_nothing(index_elements=[tabela.c.chave, tabela.c.pagina]),
+        [{"chave": chave, "pagina": pagina, "status": "pendente", "tentativas": 0} for pagina in paginas]
     )
-    print("-" * 20)
-    sicronizar_tabelas_tp(
-        url="https://dadosabertos.camara.leg.br/api/v2/referencias/proposicoes/codTipoTramitacao",
-        model_class=TP_Tramitacao, id_field_name="id_tramitacao", ds_field_name="ds_tramitacao",
-        api_id_key="cod", api_desc_key="nome"
+    db.session.commit()
+
+    concluidas = set(db.session.scalars(
+        db.select(TB_CargaPagina.pagina).where(TB_CargaPagina.chave == chave, TB_CargaPagina.status == 'ok')
+    ).all())
+    return [pagina for pagina in paginas if pagina not in concluidas]
+
+def marcar_pagina(chave, pagina, status, erro=None):
+    tabela = TB_CargaPagina.__table__
+    stmt = insert(tabela).values(
+        chave=chave, pagina=pagina, status=status, tentativas=1, erro=erro, atualizado_em=datetime.now()
     )
-    print("-" * 20)
-    sicronizar_tabelas_tp(
-        url="https://dadosabertos.camara.leg.br/api/v2/referencias/proposicoes/codTema",
-        model_class=TP_Temas, id_field_name="id_tema", ds_field_name="ds_tema",
-        api_id_key="cod", api_desc_key="nome"
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabela.c.chave, tabela.c.pagina],
+        set_={
+            "status": stmt.excluded.status,
+            "erro": stmt.excluded.erro,
+            "atualizado_em": stmt.excluded.atualizado_em,
+            "tentativas": tabela.c.tentativas + 1
+        }
     )
+    db.session.execute(stmt)
+    db.session.commit()
+
+def iniciar_processo_filho(processos=1):
+    #Conexões herdadas do processo pai pelo fork não podem ser reaproveitadas
+    global camara
+    db.engine.dispose(close=False)
+    #Cada processo tem o seu limitador: a taxa total é dividida entre eles
+    camara = CamaraClient(limitador=LimitadorAdaptativo(
+        CAMARA_TAXA_INICIAL / processos, CAMARA_TAXA_MINIMA / processos, CAMARA_TAXA_MAXIMA / processos
+    ))
+
+def processar_pagina(unidade):
+    """
+    Busca e grava uma página da listagem, marcando o resultado no checkpoint.
+    Roda dentro de um processo do pool. Retorna (chave, pagina, ok, pn, pa, tn).
+    """
+    chave, pagina = unidade
+    try:
+        params = {**PARAMS_LISTAGEM, **filtros_da_chave(chave), "pagina": pagina}
+        projetos_da_pagina = camara.get_dados("/proposicoes", params) or []
+
+        pn, pa, tn, falhas = processar_pagina_de_projetos(projetos_da_pagina)
+
+        if falhas:
+            marcar_pagina(chave, pagina, 'erro', f"{falhas} projeto(s) com falha")
+            return chave, pagina, False, pn, pa, tn
+
+        marcar_pagina(chave, pagina, 'ok')
+        return chave, pagina, True, pn, pa, tn
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"SEEDER: [ERRO] Falha na página {pagina} ({chave}): {e}")
+        try:
+            marcar_pagina(chave, pagina, 'erro', str(e)[:1000])
+        except Exception as erro_checkpoint:
+            db.session.rollback()
+            print(f"SEEDER: [ERRO] Não foi possível marcar a página {pagina} ({chave}) no checkpoint: {erro_checkpoint}")
+        return chave, pagina, False, 0, 0, 0
+
+def montar_unidades(args):
+    """
+    Monta a lista de (chave, pagina) pedida na linha de comando.
+    Retorna (unidades, chaves_sem_total): as listagens cujo total de páginas
+    não pôde ser obtido ficam de fora e são devolvidas à parte.
+    """
+    grupos = []
+    chaves_sem_total = []
+    if args.anos:
+        for ano in (a.strip() for a in args.anos.split(',') if a.strip()):
+            chave = f"ano={ano}"
+            if args.paginas:
+                grupos.append((chave, interpretar_faixas(args.paginas)))
+            else:
+                total = get_total_pages(filtros_da_chave(chave))
+                if total is None:
+                    print(f"SEEDER: [AVISO] Ano {ano} ignorado: total de páginas desconhecido.")
+                    chaves_sem_total.append(chave)
+                    continue
+                grupos.append((chave, list(range(1, total + 1))))
+    elif args.paginas:
+        grupos.append(('todos', interpretar_faixas(args.paginas)))
+    else:
+        total = get_total_pages()
+        if total is None:
+            chaves_sem_total.append('todos')
+        elif total:
+            grupos.append(('todos', list(range(1, total + 1))))
+
+    unidades = []
+    for chave, paginas in grupos:
+        if args.refazer:
+            pendentes = paginas
+            registrar_paginas(chave, paginas)
+        else:
+            pendentes = registrar_paginas(chave, paginas)
+        print(f"SEEDER: '{chave}': {len(paginas)} páginas pedidas, {len(pendentes)} a processar.")
+        unidades.extend((chave, pagina) for pagina in pendentes)
+    return unidades, chaves_sem_total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga de projetos da Câmara, paralela e retomável.")
+    parser.add_argument('--paginas', help="Faixas de páginas, ex: 1-500 ou 1-10,42. Padrão: todas.")
+    parser.add_argument('--anos', help="Anos separados por vírgula, ex: 2023,2024. As páginas passam a ser as de cada ano.")
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1, help="Número de processos em paralelo.")
+    parser.add_argument('--refazer', action='store_true', help="Reprocessa também as páginas já concluídas.")
+    parser.add_argument('--pular-metadados', action='store_true', help="Não sincroniza as tabelas TP antes da carga.")
+    args = parser.parse_args()
+
+    app = create_app()
+    app.app_context().push()
     
-    print("\n" + "="*30 + " FASE 2: PROJETOS (INTERATIVO) " + "="*30)
+    if not wait_for_db():
+        exit(1)
+
+    print(f"\n--- [SEED SCRIPT]: {datetime.now()} - INICIANDO CARGA ---")
     
-    total_paginas = get_total_pages()
+    if not args.pular_metadados:
+        print("\n" + "="*30 + " FASE 1: METADADOS (TP) " + "="*30)
+        sicronizar_tabelas_tp(
+            url="/referencias/proposicoes/codSituacao",
+            model_class=TP_Situacao, id_field_name="id_situacao", ds_field_name="ds_situacao",
+            api_id_key="cod", api_desc_key="nome"
+        )
+        print("-" * 20)
+        sicronizar_tabelas_tp(
+            url="/referencias/proposicoes/codTipoTramitacao",
+            model_class=TP_Tramitacao, id_field_name="id_tramitacao", ds_field_name="ds_tramitacao",
+            api_id_key="cod", api_desc_key="nome"
+        )
+        print("-" * 20)
+        sicronizar_tabelas_tp(
+            url="/referencias/proposicoes/codTema",
+            model_class=TP_Temas, id_field_name="id_tema", ds_field_name="ds_tema",
+            api_id_key="cod", api_desc_key="nome"
+        )
     
-    if total_paginas:
-        print(f"SEEDER: A API reportou um total de {total_paginas} páginas (de 100 itens).")
-        
-        try:
-            pagina_inicio = int(input(f"Qual página você quer COMEÇAR (ex: 1)? "))
-            pagina_fim = int(input(f"Qual página você quer TERMINAR (ex: {total_paginas})? "))
-            
-            if pagina_fim > total_paginas:
-                pagina_fim = total_paginas
-            if pagina_inicio < 1:
-                pagina_inicio = 1
-            
-            print(f"\nSEEDER: Ok! Processando da página {pagina_inicio} até a página {pagina_fim}...")
-            
-            total_projetos_novos = 0
-            total_projetos_atualizados = 0
-            total_tramitacoes_novas = 0
-            
-            for pagina_atual in range(pagina_inicio, pagina_fim + 1):
-                url = f"https://dadosabertos.camara.leg.br/api/v2/proposicoes?pagina={pagina_atual}&itens=100&ordem=ASC&ordenarPor=id"
-                print(f"\n--- Processando Página {pagina_atual} / {pagina_fim} ---")
-                
-                try:
-                    resposta = requests.get(url, timeout=20)
-                    resposta.raise_for_status()
-                    projetos_da_pagina = resposta.json().get('dados', [])
-                    
-                    if not projetos_da_pagina:
-                        print(f"SEEDER: Página {pagina_atual} não retornou dados. Pulando.")
-                        continue
-
-                    pn, pa, tn = processar_pagina_de_projetos(projetos_da_pagina)
-                    
-                    print(f"SEEDER: Página {pagina_atual} concluída. ({pn} novos, {pa} atualizados, {tn} tramitações)")
-                    total_projetos_novos += pn
-                    total_projetos_atualizados += pa
-                    total_tramitacoes_novas += tn
-                    
-                    time.sleep(1)
-                
-                except requests.exceptions.RequestException as e:
-                    print(f"SEEDER: [ERRO DE REDE] Falha ao buscar página {pagina_atual}: {e}. Pulando esta página.")
-                    continue
-            
-            print("\n" + "="*30 + " ESTATÍSTICAS DO LOTE " + "="*30)
-            print(f"Páginas processadas: {pagina_fim - pagina_inicio + 1}")
-            print(f"Projetos Novos: {total_projetos_novos}")
-            print(f"Projetos Atualizados: {total_projetos_atualizados}")
-            print(f"Tramitações Adicionadas: {total_tramitacoes_novas}")
-            
-        except ValueError:
-            print("SEEDER: [ERRO] Entrada inválida. Por favor, digite apenas números.")
-        except KeyboardInterrupt:
-            print("\nSEEDER: Carga interrompida pelo usuário.")
+    print("\n" + "="*30 + " FASE 2: PROJETOS " + "="*30)
+
+    unidades, chaves_sem_total = montar_unidades(args)
+    if not unidades:
+        if chaves_sem_total:
+            print(f"SEEDER: [ERRO CRÍTICO] Sem o total de páginas de {', '.join(chaves_sem_total)}. Nada foi carregado.")
+            exit(1)
+        print("SEEDER: Nada a processar (todas as páginas pedidas já foram concluídas).")
+        exit(0)
+
+    processos = max(1, min(args.processos, len(unidades)))
+    print(f"SEEDER: Processando {len(unidades)} páginas com {processos} processo(s)...")
+
+    total_projetos_novos = 0
+    total_projetos_atualizados = 0
+    total_tramitacoes_novas = 0
+    paginas_com_erro = []
+
+    #fork: os filhos herdam o app e o contexto já criados acima
+    db.session.remove()
+    contexto = multiprocessing.get_context('fork')
+    try:
+        with contexto.Pool(processos, initializer=iniciar_processo_filho, initargs=(processos,)) as pool:
+            for i, (chave, pagina, ok, pn, pa, tn) in enumerate(pool.imap_unordered(processar_pagina, unidades), start=1):
+                total_projetos_novos += pn
+                total_projetos_atualizados += pa
+                total_tramitacoes_novas += tn
+                if not ok:
+                    paginas_com_erro.append((chave, pagina))
+                print(f"SEEDER: [{i}/{len(unidades)}] Página {pagina} ({chave}) {'concluída' if ok else 'COM ERRO'}. ({pn} novos, {pa} atualizados, {tn} tramitações)")
+
+    except KeyboardInterrupt:
+        print("\nSEEDER: Carga interrompida pelo usuário. Rode de novo para continuar de onde parou.")
+
+    print("\n" + "="*30 + " ESTATÍSTICAS DO LOTE " + "="*30)
+    print(f"Páginas processadas: {len(unidades)}")
+    print(f"Páginas com erro: {len(paginas_com_erro)} (serão refeitas na próxima execução)")
+    print(f"Projetos Novos: {total_projetos_novos}")
+    print(f"Projetos Atualizados: {total_projetos_atualizados}")
+    print(f"Tramitações Adicionadas: {total_tramitacoes_novas}")
             
-    print(f"\n--- [SEED SCRIPT]: CARGA PARCIAL CONCLUÍDA ---")
\ No newline at end of file
+    print("\n--- [SEED SCRIPT]: CARGA CONCLUÍDA ---")
+
+    if chaves_sem_total:
+        print(f"SEEDER: [ERRO] Listagens ignoradas por falta do total de páginas: {', '.join(chaves_sem_total)}.")
+        exit(1)
@@ -1,13 +1,33 @@
+import os
 import time
 import requests
-from datetime import datetime, timedelta
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from . import create_app, db
-from .models import TP_Situacao, TP_Tramitacao, TP_Temas, TB_Projeto, RL_Tramitacoes, rel_temas
-from sqlalchemy.exc import IntegrityError, OperationalError
+from .models import TP_Situacao, TP_Tramitacao, TP_Temas, TB_Sincronizacao
+from .camara import CamaraClient
+from .coleta import buscar_projeto_completo
+from .pipeline import Pipeline
+from .agendador import Agendador
+from .fila import enfileirar, consumir_fila, tamanho_da_fila
+from .metricas import contar_projetos, servir_metricas
+from .gravacao import TAMANHO_LOTE, montar_item, carregar_datas_locais
+from .leitura import atualizar_cards_da_referencia
+from .falhas import gravar_com_fila, reprocessar_falhas, rearmar_falhas
+from .cache import invalidar_tudo
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlalchemy import text
 
-app = create_app()
-app.app_context().push()
+camara = CamaraClient()
+
+#Sobreposição com o ciclo anterior, para não perder alterações na virada da janela
+MARGEM_MARCA_DAGUA = 5 #minutos
+
+#A API devolve dataHora no horário de Brasília, sem fuso: a janela usa o mesmo relógio
+FUSO_CAMARA = timezone(timedelta(hours=-3))
+
+def agora_na_camara():
+    return datetime.now(FUSO_CAMARA).replace(tzinfo=None)
 
 #Espero o DB iniciar
 def wait_for_db():
@@ -33,14 +53,15 @@ def wait_for_db():
     return False
 
 #Atualização e Adição de Metadados das Tabelas Tipo 
+#Coluna de tb_projeto que aponta para cada tabela de referência mostrada no card
+COLUNAS_CARD = {TP_Situacao: 'id_ultima_situacao', TP_Tramitacao: 'id_ultima_tramitacao'}
+
 def sicronizar_tabelas_tp(url, model_class, id_field_name, ds_field_name, api_id_key, api_desc_key):
     tabela_nome = model_class.__tablename__
     print(f"WORKER: Iniciando sicronização da tabela '{tabela_nome}'...")
     
     try:
-        resposta = requests.get(url, timeout=10)
-        resposta.raise_for_status()
-        dados_api = resposta.json().get('dados', {})
+        dados_api = camara.get_dados(url) or {}
 
         if not dados_api:
             print(f"WORKER: Nenhum dado recebido da API para '{tabela_nome}'. Pulando.")
@@ -86,11 +107,25 @@ def sicronizar_tabelas_tp(url, model_class, id_field_name, ds_field_name, api_id
             print(f"WORKER: {itens_novos} itens novos, {itens_atualizados} itens atualizados para '{tabela_nome}'. Salvando...")
             try:
                 db.session.add_all(itens_para_salvar)
+                #Descrição nova de situação/tramitação muda o card dos projetos que a usam
+                coluna_card = COLUNAS_CARD.get(model_class)
+                if coluna_card and itens_atualizados:
+                    db.session.flush()
+                    atualizar_cards_da_referencia(coluna_card, [getattr(item, id_field_name) for item in itens_para_salvar])
                 db.session.commit()
                 print(f"WORKER: Sincronização de '{tabela_nome}' completa.")
             except Exception as e:
                 db.session.rollback()
                 print(f"WORKER: [ERRO] ERRO ao salvar no banco para '{tabela_nome}': {e}")
+                return
+
+            #As respostas em cache guardam os cards (e as descrições) antigos
+            if itens_atualizados:
+                try:
+                    invalidar_tudo()
+                except SQLAlchemyError as e:
+                    db.session.rollback()
+                    print(f"WORKER: [AVISO] Falha ao invalidar o cache depois de atualizar '{tabela_nome}': {e}")
         else:
             print(f"WORKER: Tabela '{tabela_nome}' já está atualizada.")
 
@@ -100,208 +135,262 @@ def sicronizar_tabelas_tp(url, model_class, id_field_name, ds_field_name, api_id
         print(f"WORKER: [ERRO] ERRO INESPERADO (fora do loop) ao sicronizar '{tabela_nome}': {e}")
         db.session.rollback()
 
-#Atualização e Adição de Projetos
-def sicronizar_projetos(tempo_de_espera):
-    todos_projetos = []
-
-    data_fim_dt = datetime.now()
-    minutos_atras = (tempo_de_espera/60) + 5
-    data_inicio_dt = data_fim_dt - timedelta(minutes=minutos_atras)
+#Estado persistente de uma tarefa de sincronização (cria a linha na primeira vez)
+def carregar_estado(tarefa):
+    estado = db.session.get(TB_Sincronizacao, tarefa)
+    if not estado:
+        estado = TB_Sincronizacao(tarefa=tarefa)
+        db.session.add(estado)
+        db.session.commit()
+    return estado
+
+#Anda com o checkpoint enquanto os ids em ordem já estiverem concluídos
+def avancar_checkpoint(ids_em_ordem, concluidos):
+    ultimo = None
+    while ids_em_ordem and ids_em_ordem[0] in concluidos:
+        ultimo = ids_em_ordem.popleft()
+        concluidos.discard(ultimo)
+    return ultimo
+
+#Define a janela do ciclo (ou retoma a interrompida). Retorna (params da listagem, último id já processado, corte)
+def abrir_janela(estado, tempo_de_espera):
+    if estado.janela_inicio and estado.ultimo_id is not None:
+        #Ciclo anterior foi interrompido: refaz a mesma janela a partir do último id gravado
+        data_inicio_dt = estado.janela_inicio
+        data_fim_dt = estado.janela_fim
+        print(f"WORKER (Projetos): Retomando ciclo interrompido a partir do projeto {estado.ultimo_id}.")
+    else:
+        data_fim_dt = agora_na_camara()
+        if estado.marca_dagua:
+            data_inicio_dt = estado.marca_dagua - timedelta(minutes=MARGEM_MARCA_DAGUA)
+        else:
+            minutos_atras = (tempo_de_espera/60) + 5
+            data_inicio_dt = data_fim_dt - timedelta(minutes=minutos_atras)
+
+        estado.janela_inicio = data_inicio_dt
+        estado.janela_fim = data_fim_dt
+        estado.ultimo_id = None
+        db.session.commit()
+
+    #A API só filtra por dia (AAAA-MM-DD) e o resumo da listagem não traz data: a listagem
+    #volta tudo desde 00:00. O corte fino é o statusProposicao.dataHora do detalhe, comparado
+    #com o início da janela. Sem marca d'água (primeiro ciclo) não há corte: nada foi visto ainda
+    params = {
+        "dataInicio": data_inicio_dt.strftime('%Y-%m-%d'),
+        "dataFim": data_fim_dt.strftime('%Y-%m-%d'),
+        "pagina": 1, "itens": 100, "ordem": "ASC", "ordenarPor": "id"
+    }
+    corte = data_inicio_dt if estado.marca_dagua else None
+    return params, estado.ultimo_id or 0, corte
 
-    data_inicio_str = data_inicio_dt.strftime('%Y-%m-%d')
-    data_fim_str = data_fim_dt.strftime('%Y-%m-%d')
+#Atualização e Adição de Projetos
+def sicronizar_projetos(tempo_de_espera, concorrencia=1):
+    estado = carregar_estado('projetos')
+    params, ultimo_id_gravado, corte = abrir_janela(estado, tempo_de_espera)
 
-    url = (
-        f"https://dadosabertos.camara.leg.br/api/v2/proposicoes"
-        f"?dataInicio={data_inicio_str}"
-        f"&dataFim={data_fim_str}"
-        f"&pagina=1&itens=100&ordem=ASC&ordenarPor=id"
-    )
+    print(f"WORKER (Projetos): Iniciando busca paginada de projetos alterados entre {params['dataInicio']} e {params['dataFim']} (concorrência {concorrencia})...")
 
-    print("WORKER (Projetos): Iniciando busca paginada de projetos alterados...")
+    #As threads do pipeline não herdam o app context
+    engine = db.engine
+    ids_em_ordem = deque()
+    concluidos = set()
+    totais = {"listados": 0, "novos": 0, "atualizados": 0, "sem_mudanca": 0, "tramitacoes": 0}
 
-    while url:
-        print(f"WORKER (Projetos): Buscando página: {url}")
-        try:
-            resposta = requests.get(url, timeout=10)
-            resposta.raise_for_status()
+    def listar():
+        for pagina in camara.paginas("/proposicoes", params):
+            print(f"WORKER (Projetos): Página recebida com {len(pagina['dados'])} projetos.")
 
-            dados_api = resposta.json()
-            projetos_desta_pagina = dados_api.get('dados', [])
-            links_da_api = dados_api.get('links', [])
+            projetos_da_pagina = {}
+            for projeto_resumido in pagina['dados']:
+                try:
+                    id_api = int(projeto_resumido.get('id'))
+                except (ValueError, TypeError):
+                    print("WORKER (Projetos): [AVISO] Item de projeto resumido sem ID. Pulando item.")
+                    continue
+                if id_api > ultimo_id_gravado and id_api not in projetos_da_pagina:
+                    projetos_da_pagina[id_api] = projeto_resumido
+
+            datas_locais = carregar_datas_locais(engine, list(projetos_da_pagina))
+            for id_api, projeto_resumido in projetos_da_pagina.items():
+                #Registrado antes de entrar na fila, para o checkpoint seguir a ordem da listagem
+                ids_em_ordem.append(id_api)
+                yield id_api, (projeto_resumido, datas_locais.get(id_api))
+        print("WORKER (Projetos): Última página alcançada. Concluindo busca.")
+
+    def buscar(id_api, contexto):
+        return buscar_projeto_completo(camara, id_api, data_hora_local=contexto[1], desde=corte)
+
+    def transformar(id_api, contexto, resultado):
+        projeto_detalhado, tramitacoes_api, projeto_temas_api = resultado
+        if tramitacoes_api is None:
+            #statusProposicao.dataHora igual ao do banco: tramitações e temas não foram buscados
+            return None
+
+        status_proposicao = projeto_detalhado.get('statusProposicao', {})
+        if not status_proposicao:
+            print(f"WORKER (Projetos): [AVISO] 'statusProposicao' não encontrado para projeto {id_api}.")
+        return montar_item(contexto[0], status_proposicao, tramitacoes_api, projeto_temas_api, "WORKER (Projetos)")
+
+    def gravar(lote):
+        itens = []
+        erros = []
+        for id_api, item, erro in lote:
+            concluidos.add(id_api)
+            totais["listados"] += 1
+            if erro:
+                print(f"WORKER (Projetos): [ERRO CRÍTICO] Falha ao buscar projeto {id_api}: {erro}")
+                erros.append((id_api, erro))
+            elif item is None:
+                totais["sem_mudanca"] += 1
+            else:
+                itens.append(item)
 
-            if not projetos_desta_pagina:
-                print("WORKER (Projetos): Página sem dados. Concluindo busca.")
-                break
+        contar_projetos("WORKER (Projetos)", sem_mudanca=sum(1 for _, item, erro in lote if item is None and not erro))
 
-            todos_projetos.extend(projetos_desta_pagina)
+        #O checkpoint vai no mesmo commit do lote
+        ultimo = avancar_checkpoint(ids_em_ordem, concluidos)
+        if ultimo is not None:
+            estado.ultimo_id = ultimo
 
-            novo_url = None
-            for link in links_da_api:
-                if link.get('rel') == 'next':
-                    novo_url = link.get('href')
-                    break
+        #Quem falhou vai para a fila de falhas; o checkpoint pode seguir em frente
+        pn, pa, tn, _ = gravar_com_fila(itens, erros, "WORKER (Projetos)")
+        totais["novos"] += pn
+        totais["atualizados"] += pa
+        totais["tramitacoes"] += tn
 
-            url = novo_url
-            time.sleep(1)
+    pipeline = Pipeline("WORKER (Projetos)", concorrencia=concorrencia, tamanho_lote=TAMANHO_LOTE)
+    pipeline.executar(listar, buscar, transformar, gravar)
 
-        except requests.exceptions.RequestException as e:
-            print(f"WORKER (Projetos): [ERRO DE REDE] Falha ao buscar página: {e}. Abortando ciclo.")
-            url = None
+    if pipeline.listagem_completa:
+        concluir_ciclo(estado)
+    else:
+        print("WORKER (Projetos): [ERRO DE REDE] Listagem incompleta. O ciclo será retomado do checkpoint.")
 
-    if not todos_projetos:
+    if not totais["listados"]:
         print("WORKER (Projetos): Nenhum projeto para atualizar neste ciclo.")
         return
-    
-    print(f"WORKER (Projetos): Paginação concluída. {len(todos_projetos)} projetos encontrados para checar/atualizar.")
-    
-    projetos_atualizados = 0
-    projetos_novos = 0
-    novas_tramitacoes_total = 0
 
-    for projeto_resumido in todos_projetos:
-        id_api = None
-
-        try:
-            id_api_str = projeto_resumido.get('id')
-            if not id_api_str:
-                print(f"WORKER (Projetos): [AVISO] Item de projeto resumido sem ID. Pulando item.")
-                continue
-            
-            id_api = int(id_api_str)
-            projeto_db = db.session.get(TB_Projeto, id_api)
-
-            if not projeto_db:
-                projeto_db = TB_Projeto(id_projeto=id_api)
-                db.session.add(projeto_db)
-                projetos_novos += 1
-            else:
-                projetos_atualizados += 1
+    percentual_sem_mudanca = 100 * totais["sem_mudanca"] / totais["listados"]
+    print(f"WORKER (Projetos): {totais['sem_mudanca']} de {totais['listados']} projetos sem mudança ({percentual_sem_mudanca:.1f}%). {2 * totais['sem_mudanca']} requisições de tramitações/temas evitadas.")
+    print(f"WORKER (Projetos): Sincronização concluída. {totais['novos']} projetos novos, {totais['atualizados']} projetos atualizados, {totais['tramitacoes']} tramitações novas.")
 
-            projeto_db.titulo_projeto = projeto_resumido.get('ementa')
-            projeto_db.descricao = f"{projeto_resumido.get('siglaTipo')} {projeto_resumido.get('numero')}/{projeto_resumido.get('ano')}"
-            projeto_db.ano_inicio = projeto_resumido.get('ano')
+#Modo fila: só lista a janela e enfileira os ids; as réplicas consomem com consumir_fila
+def enfileirar_projetos(tempo_de_espera):
+    estado = carregar_estado('projetos')
+    params, ultimo_id_enfileirado, _ = abrir_janela(estado, tempo_de_espera)
 
-            resposta = requests.get(f'https://dadosabertos.camara.leg.br/api/v2/proposicoes/{id_api}', timeout=10)
-            resposta.raise_for_status()
+    print(f"WORKER (Projetos): Enfileirando projetos alterados entre {params['dataInicio']} e {params['dataFim']}...")
 
-            projeto_detalhado = resposta.json().get('dados', {})
-            status_proposicao = projeto_detalhado.get('statusProposicao', {})
-
-            if status_proposicao:
+    listados = enfileirados = 0
+    try:
+        for pagina in camara.paginas("/proposicoes", params):
+            ids = []
+            for projeto_resumido in pagina['dados']:
                 try:
-                    projeto_db.data_hora = datetime.fromisoformat(status_proposicao.get("dataHora"))
-                    projeto_db.sigla_orgao = status_proposicao.get("siglaOrgao")
-                    projeto_db.despacho = status_proposicao.get("despacho")
-                    projeto_db.id_ultima_situacao = int(status_proposicao.get("codSituacao"))
-                    projeto_db.id_ultima_tramitacao = int(status_proposicao.get("codTipoTramitacao"))
+                    id_api = int(projeto_resumido.get('id'))
                 except (ValueError, TypeError):
-                     print(f"WORKER (Projetos): [AVISO] 'statusProposicao' malformado para projeto {id_api}.")
-            else:
-                print(f"WORKER (Projetos): [AVISO] 'statusProposicao' não encontrado para projeto {id_api}.")
-
-            sequencias_existentes = {t.sequencia for t in projeto_db.tramitacoes}
-            url_tram = f"https://dadosabertos.camara.leg.br/api/v2/proposicoes/{id_api}/tramitacoes"
-            resposta_tram = requests.get(url_tram, timeout=10)
-            resposta_tram.raise_for_status()
-            tramitacoes_api = resposta_tram.json().get('dados', [])
-
-            novas_tramitacoes_para_salvar = []
-
-            for item_tram_api in tramitacoes_api:
-                try:
-                    seq_api = int(item_tram_api['sequencia'])
-                    
-                    if seq_api not in sequencias_existentes:
-                        nova_tram = RL_Tramitacoes(
-                            id_projeto = id_api,
-                            sequencia = seq_api,
-                            data_hora = datetime.fromisoformat(item_tram_api['dataHora']),
-                            id_situacao = int(item_tram_api['codSituacao']),
-                            id_tramitacao = int(item_tram_api['codTipoTramitacao'])
-                        )
-                        novas_tramitacoes_para_salvar.append(nova_tram)
-                        
-                except (ValueError, TypeError, KeyError, AttributeError):
-                    print(f"WORKER (Projetos): [AVISO] Item de tramitação malformado para projeto {id_api}. Pulando item.")
-
-            if novas_tramitacoes_para_salvar:
-                db.session.add_all(novas_tramitacoes_para_salvar)
-                novas_tramitacoes_total += len(novas_tramitacoes_para_salvar)
-
-            resposta_tema = requests.get(f'https://dadosabertos.camara.leg.br/api/v2/proposicoes/{id_api}/temas', timeout=10)
-            resposta_tema.raise_for_status()
-            projeto_temas_api = resposta_tema.json().get("dados", [])
-
-            if projeto_temas_api:
-                temas_existentes_ids = {tema.id_tema for tema in projeto_db.temas}
-                
-                for tema_api in projeto_temas_api:
-                    try:
-                        id_tema_api = int(tema_api.get('cod'))
-                        if id_tema_api not in temas_existentes_ids:
-                            tema_db = db.session.get(TP_Temas, id_tema_api)
-                            if tema_db:
-                                projeto_db.temas.append(tema_db)
-                            else:
-                                print(f"WORKER (Projetos): [AVISO] Tema {id_tema_api} não encontrado no banco local. Pulei.")
-                    except (ValueError, TypeError, KeyError, AttributeError):
-                        print(f"WORKER (Projetos): [AVISO] Item de tema malformado para projeto {id_api}. Pulando item.")
-
+                    print("WORKER (Projetos): [AVISO] Item de projeto resumido sem ID. Pulando item.")
+                    continue
+                if id_api > ultimo_id_enfileirado:
+                    ids.append(id_api)
+
+            listados += len(ids)
+            enfileirados += enfileirar(ids)
+            #Checkpoint da página no mesmo commit dos ids enfileirados
+            if ids:
+                estado.ultimo_id = max(ids)
             db.session.commit()
-            if novas_tramitacoes_para_salvar:
-                 print(f"WORKER (Projetos): Projeto {id_api} processado. {len(novas_tramitacoes_para_salvar)} novas tramitações salvas.")
 
-        except Exception as e:
-            print(f"WORKER (Projetos): [ERRO CRÍTICO] Falha ao processar projeto {id_api}: {e}")
-            db.session.rollback()
+    except requests.exceptions.RequestException as e:
+        db.session.rollback()
+        print(f"WORKER (Projetos): [ERRO DE REDE] Falha ao buscar página: {e}. O ciclo será retomado do checkpoint.")
+        return
+
+    print(f"WORKER (Projetos): {listados} projetos listados, {enfileirados} novos na fila ({tamanho_da_fila()} aguardando).")
+    concluir_ciclo(estado)
+
+#Fecha o ciclo: a janela processada vira a nova marca d'água
+def concluir_ciclo(estado):
+    estado.marca_dagua = estado.janela_fim
+    estado.janela_inicio = None
+    estado.janela_fim = None
+    estado.ultimo_id = None
+    estado.atualizado_em = datetime.now()
+    db.session.commit()
+    print(f"WORKER (Projetos): Marca d'água avançada para {estado.marca_dagua}.")
+
+#Tabelas de referência (mudam raramente)
+def sicronizar_tabelas_referencia():
+    #TP_Situacao
+    sicronizar_tabelas_tp(
+        url="/referencias/proposicoes/codSituacao",
+        model_class=TP_Situacao,
+        id_field_name="id_situacao",
+        ds_field_name="ds_situacao",
+        api_id_key="cod",
+        api_desc_key="nome"
+    )
+    print("-" * 20)
+
+    #TP_Tramitacao
+    sicronizar_tabelas_tp(
+        url="/referencias/proposicoes/codTipoTramitacao",
+        model_class=TP_Tramitacao,
+        id_field_name="id_tramitacao",
+        ds_field_name="ds_tramitacao",
+        api_id_key="cod",
+        api_desc_key="nome"
+    )
+    print("-" * 20)
+
+    #TP_Temas
+    sicronizar_tabelas_tp(
+        url="/referencias/proposicoes/codTema",
+        model_class=TP_Temas,
+        id_field_name="id_tema",
+        ds_field_name="ds_tema",
+        api_id_key="cod",
+        api_desc_key="nome"
+    )
+    print("-" * 20)
 
-    print(f"WORKER (Projetos): Sincronização concluída. {projetos_novos} projetos novos, {projetos_atualizados} projetos atualizados, {novas_tramitacoes_total} tramitações novas.")
+    #Com as referências em dia, quem desistiu por código desconhecido ganha mais uma tentativa
+    rearmar_falhas()
 
 #Loop do Worker
 if __name__ == "__main__":
-    TEMPO_DE_ESPERA = 60 * 15 #15 minutos
+    INTERVALO_REFERENCIAS = int(os.environ.get('WORKER_INTERVALO_REFERENCIAS', 60 * 60 * 24)) #1 dia
+    INTERVALO_PROJETOS = int(os.environ.get('WORKER_INTERVALO_PROJETOS', 60 * 5)) #5 minutos
+    INTERVALO_FALHAS = int(os.environ.get('WORKER_INTERVALO_FALHAS', 60 * 2)) #2 minutos
+    INTERVALO_FILA = int(os.environ.get('WORKER_INTERVALO_FILA', 10)) #segundos entre consultas à fila vazia
+    PORTA_METRICAS = int(os.environ.get('WORKER_PORTA_METRICAS', 9100))
+    MODO = os.environ.get('WORKER_MODO', 'direto') #'direto' (uma réplica faz tudo) ou 'fila' (réplicas consomem tb_fila_projetos)
+    CONCORRENCIA = int(os.environ.get('WORKER_CONCORRENCIA', 8))
+
+    app = create_app()
+    app.app_context().push()
 
     if not wait_for_db():
         exit(1)
 
-    while True:
-        print(f"\nWORKER (Metadata): {datetime.now()} - Iniciando novo ciclo de sincronização...")
-        
-        #TP_Situacao
-        sicronizar_tabelas_tp(
-            url="https://dadosabertos.camara.leg.br/api/v2/referencias/proposicoes/codSituacao",
-            model_class=TP_Situacao,
-            id_field_name="id_situacao",
-            ds_field_name="ds_situacao",
-            api_id_key="cod",
-            api_desc_key="nome"
-        )
-        print("-" * 20)
-
-        #TP_Tramitacao
-        sicronizar_tabelas_tp(
-            url="https://dadosabertos.camara.leg.br/api/v2/referencias/proposicoes/codTipoTramitacao",
-            model_class=TP_Tramitacao,
-            id_field_name="id_tramitacao",
-            ds_field_name="ds_tramitacao",
-            api_id_key="cod",
-            api_desc_key="nome"
-        )
-        print("-" * 20)
-
-        #TP_Temas
-        sicronizar_tabelas_tp(
-            url="https://dadosabertos.camara.leg.br/api/v2/referencias/proposicoes/codTema",
-            model_class=TP_Temas,
-            id_field_name="id_tema",
-            ds_field_name="ds_tema",
-            api_id_key="cod",
-            api_desc_key="nome"
-        )
-
-        #Projetos
-        sicronizar_projetos(TEMPO_DE_ESPERA)
-
-        print(f"\nWORKER: Ciclo completo. Dormindo por {TEMPO_DE_ESPERA / 60} minutos...")
-        time.sleep(TEMPO_DE_ESPERA)
\ No newline at end of file
+    servir_metricas(PORTA_METRICAS)
+
+    #Projetos referenciam situações, tramitações e temas: as tabelas de referência são
+    #sincronizadas antes de qualquer ciclo de projetos, e daí em diante pelo agendador
+    print(f"\nWORKER: {datetime.now()} - Sincronizando as tabelas de referência antes de iniciar o agendador...")
+    sicronizar_tabelas_referencia()
+    db.session.remove()
+
+    #Cada tarefa tem a sua cadência e o seu advisory lock: réplicas extras ficam de reserva
+    agendador = Agendador(app)
+    agendador.adicionar('tabelas_referencia', sicronizar_tabelas_referencia, INTERVALO_REFERENCIAS, atraso_inicial=INTERVALO_REFERENCIAS)
+    agendador.adicionar('fila_falhas', lambda: reprocessar_falhas(camara, max(1, CONCORRENCIA // 2)), INTERVALO_FALHAS)
+
+    if MODO == 'fila':
+        #Uma réplica lista e enfileira; todas consomem
+        agendador.adicionar('projetos', lambda: enfileirar_projetos(INTERVALO_PROJETOS), INTERVALO_PROJETOS)
+        agendador.adicionar('consumir_fila', lambda: consumir_fila(camara, concorrencia=CONCORRENCIA), INTERVALO_FILA, exclusiva=False)
+    else:
+        agendador.adicionar('projetos', lambda: sicronizar_projetos(INTERVALO_PROJETOS, concorrencia=CONCORRENCIA), INTERVALO_PROJETOS)
+
+    agendador.executar()
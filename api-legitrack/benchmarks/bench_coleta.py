@@ -0,0 +1,69 @@
+"""
+Mede projetos/s do Pipeline do worker (detalhe + tramitações + temas de cada projeto)
+contra a Câmara falsa local, com concorrência 1, 8 e 32. Transformar e gravar não fazem
+nada: o que se mede é a etapa de busca. O teto por host (CAMARA_LIMITE_POR_HOST) sobe
+para a maior concorrência pedida, a não ser que --limite-por-host diga outro.
+
+Uso: python -m benchmarks.bench_coleta --projetos 300 --latencia 0.02
+     python -m benchmarks.bench_coleta --limite-por-host 8
+"""
+import argparse
+import time
+
+from app.camara import CamaraClient
+from app.limitador import LimitadorAdaptativo
+from app import coleta
+from app.coleta import buscar_projeto_completo
+from app.pipeline import Pipeline
+from .fake_camara import iniciar_servidor
+
+def medir(cliente, total_projetos, concorrencia):
+    erros = [0]
+
+    def listar():
+        for id_projeto in range(1, total_projetos + 1):
+            yield id_projeto, None
+
+    def buscar(id_projeto, contexto):
+        return buscar_projeto_completo(cliente, id_projeto)
+
+    def transformar(id_projeto, contexto, resultado):
+        return resultado
+
+    def gravar(lote):
+        erros[0] += sum(1 for _, _, erro in lote if erro)
+
+    pipeline = Pipeline("BENCH", concorrencia=concorrencia)
+    inicio = time.perf_counter()
+    pipeline.executar(listar, buscar, transformar, gravar)
+    duracao = time.perf_counter() - inicio
+
+    return total_projetos / duracao, erros[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da busca de projetos pelo Pipeline.")
+    parser.add_argument('--projetos', type=int, default=300)
+    parser.add_argument('--latencia', type=float, default=0.02, help="Atraso por requisição na Câmara falsa, em segundos.")
+    parser.add_argument('--concorrencias', default="1,8,32")
+    parser.add_argument('--limite-por-host', type=int, help="Requisições simultâneas por host. Padrão: a maior concorrência.")
+    args = parser.parse_args()
+
+    concorrencias = [int(c) for c in args.concorrencias.split(',')]
+    #O semáforo do host é criado na primeira requisição, com o valor do módulo nesse momento
+    coleta.CAMARA_LIMITE_POR_HOST = args.limite_por_host or max(concorrencias)
+
+    servidor, url_base = iniciar_servidor(latencia=args.latencia)
+
+    print(f"BENCH: {args.projetos} projetos, latência simulada de {args.latencia * 1000:.0f} ms por requisição, "
+          f"{coleta.CAMARA_LIMITE_POR_HOST} requisições por host")
+    #Sem teto de taxa: aqui interessa o limite da busca concorrente, não o do limitador
+    limitador = LimitadorAdaptativo(taxa_inicial=100000, taxa_maxima=100000)
+    cliente = CamaraClient(url_base=url_base, tamanho_pool=max(concorrencias), limitador=limitador)
+
+    for concorrencia in concorrencias:
+        projetos_por_segundo, erros = medir(cliente, args.projetos, concorrencia)
+        #Acima do teto por host, as threads extras só esperam o semáforo
+        efetiva = min(concorrencia, coleta.CAMARA_LIMITE_POR_HOST)
+        print(f"BENCH: concorrência {concorrencia:>3} (efetiva {efetiva:>3}): {projetos_por_segundo:8.1f} projetos/s ({erros} erros)")
+
+    servidor.shutdown()
@@ -0,0 +1,82 @@
+"""
+Mede a camada de resposta numa página típica da lista (40 projetos com ementa e
+despacho longos): tempo para codificar o JSON e bytes que vão para o cliente.
+
+    antes    jsonify com o provedor padrão do Flask, sem compressão
+    depois   ProvedorJSONRapido (orjson) + gzip/brotli acima de COMPRESSAO_MINIMO
+
+Não precisa de banco: as rotas devolvem um payload sintético.
+
+Uso: python -m benchmarks.bench_respostas --repeticoes 2000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask, jsonify
+from app.respostas import configurar_respostas, brotli, orjson
+
+EMENTA = ("Altera a Lei nº 8.069, de 13 de julho de 1990 (Estatuto da Criança e do Adolescente), "
+          "para dispor sobre a proteção integral de crianças e adolescentes em ambientes digitais, "
+          "e dá outras providências. ")
+DESPACHO = ("Às Comissões de Comunicação; Previdência, Assistência Social, Infância, Adolescência e Família "
+            "e Constituição e Justiça e de Cidadania (Mérito e Art. 54, RICD). Proposição sujeita à apreciação "
+            "conclusiva pelas Comissões - Art. 24 II. Regime de Tramitação: Ordinário (Art. 151, III, RICD). ")
+
+def pagina_sintetica(tamanho=40):
+    inicio = datetime(2025, 3, 1, 14, 30)
+    return {
+        "mensagem": f"Projetos: {tamanho}. Temas: 0.",
+        "projetos": [{
+            "id": 2400000 + i,
+            "titulo": EMENTA * (1 + i % 3),
+            "descricao": f"PL {1000 + i}/2025",
+            "ano_inicio": "2025",
+            "sigla_orgao": "CCJC",
+            "despacho": DESPACHO * (1 + i % 2),
+            "ultima_situação": "Aguardando Designação de Relator(a)",
+            "ultima_tramitação": "Recebimento",
+            "ultima_data": inicio - timedelta(hours=i)
+        } for i in range(tamanho)],
+        "next_cursor": "WyIyMDI1LTAzLTAxVDE0OjMwOjAwIiwyNDAwMDM5XQ"
+    }
+
+def criar_app(rapido):
+    app = Flask(__name__)
+    if rapido:
+        configurar_respostas(app)
+    pagina = pagina_sintetica()
+
+    @app.route("/pagina")
+    def rota():
+        return jsonify(pagina)
+
+    return app
+
+def medir(app, repeticoes, codificacao):
+    cliente = app.test_client()
+    cabecalhos = {"Accept-Encoding": codificacao} if codificacao else {}
+    resposta = cliente.get("/pagina", headers=cabecalhos)
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        cliente.get("/pagina", headers=cabecalhos)
+    duracao = time.perf_counter() - inicio
+
+    return len(resposta.data), resposta.headers.get("Content-Encoding", "identity"), duracao / repeticoes * 1e6
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da codificação e compressão das respostas.")
+    parser.add_argument('--repeticoes', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"BENCH: orjson {'instalado' if orjson else 'AUSENTE (cai no json padrão)'}, brotli {'instalado' if brotli else 'AUSENTE (só gzip)'}")
+    print(f"{'cenário':<28}{'codificação':>12}{'bytes':>10}{'µs/req':>10}")
+
+    cenarios = [("antes (jsonify padrão)", False, None), ("depois, cliente sem gzip", True, None), ("depois, gzip", True, "gzip")]
+    if brotli:
+        cenarios.append(("depois, brotli", True, "br, gzip"))
+
+    for nome, rapido, codificacao in cenarios:
+        tamanho, usada, micros = medir(criar_app(rapido), args.repeticoes, codificacao)
+        print(f"{nome:<28}{usada:>12}{tamanho:>10}{micros:>10.0f}")
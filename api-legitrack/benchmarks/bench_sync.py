@@ -0,0 +1,136 @@
+"""
+Benchmark de ponta a ponta da ingestão: Câmara falsa local -> pipeline -> Postgres.
+Mede projetos/s e linhas gravadas/s para cada modo de sincronização:
+
+    direto       worker.sicronizar_projetos (uma réplica lista, busca e grava)
+    fila         worker.enfileirar_projetos + consumir_fila em N consumidores
+    seed_recent  seed_recent.sicronizar_projetos_por_ano
+    seed_copy    o mesmo, mas gravando por COPY na staging e um merge no fim
+
+Cada modo roda duas vezes: "fria" (banco sem os projetos sintéticos) e
+"quente" (tudo já gravado, só a detecção de mudança trabalha).
+
+ATENÇÃO: apaga e regrava os projetos da faixa sintética. Rode contra um banco
+descartável, passado em BENCH_DATABASE_URL (nunca o DATABASE_URL de produção).
+
+Uso: BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_sync --projetos 2000 --latencia 0.02
+"""
+import argparse
+import os
+import threading
+import time
+
+from prometheus_client import REGISTRY
+from .fake_camara import iniciar_servidor
+
+MODOS = ("direto", "fila", "seed_recent", "seed_copy")
+TABELAS = ("tb_projeto", "rl_tramitacoes", "rl_temas")
+
+def linhas_gravadas():
+    return sum(REGISTRY.get_sample_value('ingestao_linhas_inseridas_total', {'tabela': tabela}) or 0 for tabela in TABELAS)
+
+def limpar(db, id_inicial, total_projetos):
+    """
+    Apaga os projetos sintéticos e o estado das filas e da sincronização.
+    """
+    faixa = {"inicio": id_inicial, "fim": id_inicial + total_projetos}
+    for tabela in ("rl_tramitacoes", "rl_temas", "tb_fila_projetos", "tb_fila_falhas", "tb_projeto"):
+        db.session.execute(db.text(f"DELETE FROM camara.{tabela} WHERE id_projeto >= :inicio AND id_projeto < :fim"), faixa)
+    db.session.execute(db.text("DELETE FROM camara.tb_sincronizacao WHERE tarefa = 'projetos'"))
+    db.session.commit()
+
+def rodar_modo(modo, args):
+    from app import db
+    from app import worker, seed_recent
+    from app.fila import consumir_fila
+    from flask import current_app
+
+    if modo == "direto":
+        db.session.execute(db.text("DELETE FROM camara.tb_sincronizacao WHERE tarefa = 'projetos'"))
+        db.session.commit()
+        worker.sicronizar_projetos(300, concorrencia=args.concorrencia)
+
+    elif modo == "fila":
+        db.session.execute(db.text("DELETE FROM camara.tb_sincronizacao WHERE tarefa = 'projetos'"))
+        db.session.commit()
+        worker.enfileirar_projetos(300)
+        #As threads não herdam o app context
+        app = current_app._get_current_object()
+
+        def consumidor(numero):
+            with app.app_context():
+                consumir_fila(worker.camara, consumidor=f"bench-{numero}", concorrencia=args.concorrencia)
+                db.session.remove()
+
+        threads = [threading.Thread(target=consumidor, args=(numero,)) for numero in range(args.consumidores)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    elif modo in ("seed_recent", "seed_copy"):
+        anos = sorted({str(2000 + id_projeto % 25) for id_projeto in range(args.id_inicial, args.id_inicial + args.projetos)})
+        seed_recent.sicronizar_projetos_por_ano(anos, concorrencia=args.concorrencia, copy=modo == "seed_copy")
+
+def medir(modo, args):
+    from app import worker, seed_recent
+    from app.limitador import LimitadorAdaptativo
+
+    #Cada medição começa com o limitador na taxa inicial, sem herdar as reduções da anterior
+    for cliente in (worker.camara, seed_recent.camara):
+        cliente.limitador = LimitadorAdaptativo(args.taxa, taxa_maxima=args.taxa)
+
+    linhas_antes = linhas_gravadas()
+    inicio = time.perf_counter()
+    rodar_modo(modo, args)
+    duracao = time.perf_counter() - inicio
+    linhas = linhas_gravadas() - linhas_antes
+    return args.projetos / duracao, linhas / duracao, linhas, duracao
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta da ingestão contra a Câmara falsa.")
+    parser.add_argument('--projetos', type=int, default=1000)
+    parser.add_argument('--id-inicial', type=int, default=900000000, help="Início da faixa de ids sintéticos (fora da faixa real).")
+    parser.add_argument('--latencia', type=float, default=0.02, help="Atraso por requisição na Câmara falsa, em segundos.")
+    parser.add_argument('--taxa-erros', type=float, default=0.0, help="Fração de respostas 503 da Câmara falsa.")
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--consumidores', type=int, default=2, help="Consumidores da fila no modo 'fila'.")
+    parser.add_argument('--taxa', type=float, default=1000, help="Teto do limitador de requisições, em req/s.")
+    parser.add_argument('--modos', default=",".join(MODOS))
+    args = parser.parse_args()
+
+    if not os.environ.get('BENCH_DATABASE_URL'):
+        parser.error("defina BENCH_DATABASE_URL com um banco descartável (os projetos sintéticos são apagados e regravados).")
+
+    servidor, url_base = iniciar_servidor(
+        latencia=args.latencia, taxa_erros=args.taxa_erros, id_inicial=args.id_inicial, total_projetos=args.projetos
+    )
+
+    #Lidos na importação de app.*: precisam estar definidos antes
+    os.environ['DATABASE_URL'] = os.environ['BENCH_DATABASE_URL']
+    os.environ['CAMARA_API_URL'] = url_base
+    os.environ['CAMARA_TAXA_INICIAL'] = str(args.taxa)
+    os.environ['CAMARA_TAXA_MAXIMA'] = str(args.taxa)
+
+    from app import create_app, db
+    from app import worker
+
+    app = create_app()
+    app.app_context().push()
+    worker.sicronizar_tabelas_referencia()
+
+    print(f"BENCH: {args.projetos} projetos, latência simulada de {args.latencia * 1000:.0f} ms, {args.taxa_erros:.1%} de erros, concorrência {args.concorrencia}")
+    resultados = []
+    for modo in [m.strip() for m in args.modos.split(',') if m.strip()]:
+        if modo not in MODOS:
+            parser.error(f"modo desconhecido: {modo}")
+        limpar(db, args.id_inicial, args.projetos)
+        for rodada in ("fria", "quente"):
+            resultados.append((modo, rodada, *medir(modo, args)))
+
+    limpar(db, args.id_inicial, args.projetos)
+    servidor.shutdown()
+
+    print("\nBENCH: modo         rodada   projetos/s   linhas/s    linhas   duração")
+    for modo, rodada, projetos_por_segundo, linhas_por_segundo, linhas, duracao in resultados:
+        print(f"BENCH: {modo:<12} {rodada:<8} {projetos_por_segundo:10.1f} {linhas_por_segundo:10.1f} {linhas:9.0f} {duracao:8.1f}s")
@@ -0,0 +1,253 @@
+"""
+Servidor local que imita os endpoints da API de Dados Abertos da Câmara
+usados pela ingestão: /proposicoes (listagem paginada), /proposicoes/{id},
+/proposicoes/{id}/tramitacoes, /proposicoes/{id}/temas e
+/referencias/proposicoes/*.
+
+Os dados são sintéticos, ou lidos de um diretório com respostas gravadas
+(--dados). Dá para injetar latência e erros (503/429) para testar o limitador,
+o disjuntor e a fila de falhas.
+
+Uso: python -m benchmarks.fake_camara --porta 8001 --latencia 0.02 --projetos 5000 --taxa-erros 0.01
+     python -m benchmarks.fake_camara --gravar 2345678,2345679 --dados benchmarks/dados
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlparse, parse_qs
+
+PREFIXO_API = '/api/v2'
+ROTA_PROJETO = re.compile(r'^/proposicoes/(\d+)(/tramitacoes|/temas)?$')
+ROTA_REFERENCIA = re.compile(r'^/referencias/proposicoes/(codSituacao|codTipoTramitacao|codTema)$')
+
+'''
+=================== Dados sintéticos ===================
+'''
+
+def ano_sintetico(id_projeto):
+    return 2000 + id_projeto % 25
+
+def resumo_sintetico(id_projeto):
+    return {
+        "id": id_projeto,
+        "uri": f"https://dadosabertos.camara.leg.br/api/v2/proposicoes/{id_projeto}",
+        "siglaTipo": "PL",
+        "numero": id_projeto % 5000,
+        "ano": ano_sintetico(id_projeto),
+        "ementa": f"Projeto sintético {id_projeto}"
+    }
+
+def projeto_sintetico(id_projeto):
+    return {
+        **resumo_sintetico(id_projeto),
+        "statusProposicao": {
+            "dataHora": "2025-01-01T10:00",
+            "siglaOrgao": "PLEN",
+            "despacho": "Despacho sintético",
+            "codSituacao": 900 + id_projeto % 10,
+            "codTipoTramitacao": 100 + id_projeto % 10
+        }
+    }
+
+def tramitacoes_sinteticas(id_projeto):
+    return [{
+        "sequencia": seq,
+        "dataHora": f"2025-01-{seq:02d}T10:00",
+        "siglaOrgao": "PLEN",
+        "despacho": "Despacho sintético",
+        "codSituacao": 900 + seq % 10,
+        "codTipoTramitacao": 100 + seq % 10
+    } for seq in range(1, 6)]
+
+def temas_sinteticos(id_projeto):
+    return [{"cod": 40 + id_projeto % 20, "tema": "Tema sintético"}]
+
+#Cobrem todos os códigos usados acima, para as FKs fecharem
+REFERENCIAS_SINTETICAS = {
+    "codSituacao": [{"cod": str(cod), "nome": f"Situação {cod}"} for cod in range(900, 910)],
+    "codTipoTramitacao": [{"cod": str(cod), "nome": f"Tramitação {cod}"} for cod in range(100, 110)],
+    "codTema": [{"cod": str(cod), "nome": f"Tema {cod}"} for cod in range(40, 60)]
+}
+
+'''
+=================== Servidor ===================
+'''
+
+class CamaraFalsaHandler(BaseHTTPRequestHandler):
+    latencia = 0.0
+    taxa_erros = 0.0 #Fração de respostas 503
+    taxa_429 = 0.0 #Fração de respostas 429 (com Retry-After)
+    id_inicial = 1
+    total_projetos = 1000
+    diretorio_dados = None #Respostas gravadas: <diretorio>/<caminho>.json
+
+    def do_GET(self):
+        time.sleep(self.latencia)
+
+        sorteio = random.random()
+        if sorteio < self.taxa_erros:
+            self._responder(503, {"status": 503, "title": "Serviço indisponível (injetado)"})
+            return
+        if sorteio < self.taxa_erros + self.taxa_429:
+            self._responder(429, {"status": 429, "title": "Muitas requisições (injetado)"}, {"Retry-After": "1"})
+            return
+
+        url = urlparse(self.path)
+        caminho = url.path[len(PREFIXO_API):] if url.path.startswith(PREFIXO_API) else url.path
+        caminho = caminho.rstrip('/') or '/'
+        params = parse_qs(url.query)
+
+        gravado = self._resposta_gravada(caminho)
+        if gravado is not None:
+            self._responder(200, gravado)
+            return
+
+        if caminho == '/proposicoes':
+            self._responder(200, self._listagem(params))
+            return
+
+        rota = ROTA_REFERENCIA.match(caminho)
+        if rota:
+            self._responder(200, {"dados": REFERENCIAS_SINTETICAS[rota.group(1)], "links": []})
+            return
+
+        rota = ROTA_PROJETO.match(caminho)
+        if not rota or not self._existe(int(rota.group(1))):
+            self._responder(404, {"status": 404, "title": "Não encontrado"})
+            return
+
+        id_projeto = int(rota.group(1))
+        if rota.group(2) == '/tramitacoes':
+            dados = tramitacoes_sinteticas(id_projeto)
+        elif rota.group(2) == '/temas':
+            dados = temas_sinteticos(id_projeto)
+        else:
+            dados = projeto_sintetico(id_projeto)
+
+        self._responder(200, {"dados": dados, "links": []})
+
+    def _existe(self, id_projeto):
+        return self.id_inicial <= id_projeto < self.id_inicial + self.total_projetos
+
+    def _resposta_gravada(self, caminho):
+        if not self.diretorio_dados:
+            return None
+        arquivo = os.path.join(self.diretorio_dados, caminho.strip('/') + '.json')
+        if not os.path.isfile(arquivo):
+            return None
+        with open(arquivo, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _listagem(self, params):
+        """
+        Lista os projetos sintéticos em ordem de id, filtrando por ano.
+        dataInicio/dataFim são ignorados: todos contam como alterados na janela.
+        """
+        pagina = int(params.get('pagina', ['1'])[0])
+        itens = int(params.get('itens', ['15'])[0])
+        anos = {int(ano) for ano in params.get('ano', [])}
+
+        ids = range(self.id_inicial, self.id_inicial + self.total_projetos)
+        if anos:
+            ids = [id_projeto for id_projeto in ids if ano_sintetico(id_projeto) in anos]
+
+        total_paginas = max(1, -(-len(ids) // itens))
+        dados = [resumo_sintetico(id_projeto) for id_projeto in ids[(pagina - 1) * itens:pagina * itens]]
+
+        def link(rel, numero):
+            consulta = {chave: valores for chave, valores in params.items() if chave != 'pagina'}
+            consulta['pagina'] = [str(numero)]
+            return {"rel": rel, "href": f"http://{self.headers.get('Host')}{PREFIXO_API}/proposicoes?{urlencode(consulta, doseq=True)}"}
+
+        links = [link('self', pagina), link('first', 1), link('last', total_paginas)]
+        if pagina < total_paginas:
+            links.append(link('next', pagina + 1))
+        return {"dados": dados, "links": links}
+
+    def _responder(self, status, corpo, cabecalhos=None):
+        conteudo = json.dumps(corpo).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(conteudo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def log_message(self, format, *args):
+        pass
+
+class CamaraFalsa(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+def iniciar_servidor(porta=0, latencia=0.0, taxa_erros=0.0, taxa_429=0.0, id_inicial=1, total_projetos=1000, diretorio_dados=None):
+    """
+    Sobe o servidor numa thread de fundo e retorna (servidor, url_base).
+    """
+    handler = type('Handler', (CamaraFalsaHandler,), {
+        'latencia': latencia,
+        'taxa_erros': taxa_erros,
+        'taxa_429': taxa_429,
+        'id_inicial': id_inicial,
+        'total_projetos': total_projetos,
+        'diretorio_dados': diretorio_dados
+    })
+    servidor = CamaraFalsa(('127.0.0.1', porta), handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}{PREFIXO_API}"
+
+'''
+=================== Gravação de respostas reais ===================
+'''
+
+def gravar_respostas(ids_projetos, diretorio, url_base=None):
+    """
+    Baixa da API de verdade o detalhe, as tramitações e os temas de alguns
+    projetos, e as tabelas de referência, no formato lido por --dados.
+    """
+    from app.camara import CamaraClient
+    cliente = CamaraClient(url_base=url_base)
+
+    caminhos = [f"/referencias/proposicoes/{tabela}" for tabela in REFERENCIAS_SINTETICAS]
+    for id_projeto in ids_projetos:
+        caminhos += [f"/proposicoes/{id_projeto}", f"/proposicoes/{id_projeto}/tramitacoes", f"/proposicoes/{id_projeto}/temas"]
+
+    for caminho in caminhos:
+        arquivo = os.path.join(diretorio, caminho.strip('/') + '.json')
+        os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump(cliente.get_json(caminho), f, ensure_ascii=False)
+        print(f"Gravado {arquivo}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API falsa da Câmara para testes locais.")
+    parser.add_argument('--porta', type=int, default=8001)
+    parser.add_argument('--latencia', type=float, default=0.0, help="Atraso por requisição, em segundos.")
+    parser.add_argument('--taxa-erros', type=float, default=0.0, help="Fração de respostas 503.")
+    parser.add_argument('--taxa-429', type=float, default=0.0, help="Fração de respostas 429.")
+    parser.add_argument('--id-inicial', type=int, default=1)
+    parser.add_argument('--projetos', type=int, default=1000, help="Quantos projetos sintéticos a listagem devolve.")
+    parser.add_argument('--dados', help="Diretório com respostas gravadas (têm prioridade sobre as sintéticas).")
+    parser.add_argument('--gravar', help="Em vez de servir, grava as respostas reais destes ids em --dados.")
+    args = parser.parse_args()
+
+    if args.gravar:
+        if not args.dados:
+            parser.error("--gravar precisa de --dados.")
+        gravar_respostas([int(i) for i in args.gravar.split(',') if i.strip()], args.dados)
+        raise SystemExit(0)
+
+    servidor, url_base = iniciar_servidor(
+        args.porta, args.latencia, args.taxa_erros, args.taxa_429, args.id_inicial, args.projetos, args.dados
+    )
+    print(f"Câmara falsa ouvindo em {url_base} ({args.projetos} projetos a partir do id {args.id_inicial})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
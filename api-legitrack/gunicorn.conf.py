@@ -0,0 +1,16 @@
+import os
+import shutil
+
+#Métricas com vários workers do gunicorn: cada processo escreve seus valores
+#em PROMETHEUS_MULTIPROC_DIR e o /metrics soma todos. Precisa estar definido
+#antes de o app (e o prometheus_client) ser importado.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus')
+
+def on_starting(server):
+    diretorio = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.makedirs(diretorio, exist_ok=True)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,42 @@
+"""Chaves únicas para tramitações e temas
+
+Revision ID: 56a966f3c953
+Revises: 7bda87742764
+Create Date: 2026-10-18 09:12:41.508113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '56a966f3c953'
+down_revision = '7bda87742764'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Remove duplicatas antigas antes de criar as chaves (fica a linha mais antiga)
+    op.execute("""
+        DELETE FROM camara.rl_tramitacoes a
+        USING camara.rl_tramitacoes b
+        WHERE a.id_projeto = b.id_projeto
+          AND a.sequencia = b.sequencia
+          AND a.id_rl_tramitacao > b.id_rl_tramitacao
+    """)
+    op.execute("""
+        DELETE FROM camara.rl_temas a
+        USING camara.rl_temas b
+        WHERE a.id_projeto = b.id_projeto
+          AND a.id_tema = b.id_tema
+          AND a.id_rl_temas > b.id_rl_temas
+    """)
+
+    op.create_unique_constraint('uq_tramitacao_projeto_sequencia', 'rl_tramitacoes', ['id_projeto', 'sequencia'], schema='camara')
+    op.create_unique_constraint('uq_tema_projeto', 'rl_temas', ['id_projeto', 'id_tema'], schema='camara')
+
+
+def downgrade():
+    op.drop_constraint('uq_tema_projeto', 'rl_temas', schema='camara', type_='unique')
+    op.drop_constraint('uq_tramitacao_projeto_sequencia', 'rl_tramitacoes', schema='camara', type_='unique')
@@ -0,0 +1,30 @@
+"""Índice do feed por data e id
+
+Revision ID: 79c31487167c
+Revises: 99dfbb07e683
+Create Date: 2026-10-18 16:05:41.218337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '79c31487167c'
+down_revision = '99dfbb07e683'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    #CONCURRENTLY não bloqueia as escritas em tb_projeto enquanto o índice é montado,
+    #mas não roda dentro de transação: vai num bloco em autocommit
+    with op.get_context().autocommit_block():
+        op.create_index('ix_camara_tb_projeto_data_hora_id_projeto', 'tb_projeto', ['data_hora', 'id_projeto'], unique=False,
+                        schema='camara', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_camara_tb_projeto_data_hora_id_projeto', table_name='tb_projeto', schema='camara',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,39 @@
+"""Fila de projetos com falha
+
+Revision ID: 91e605874d16
+Revises: b4a4cd024383
+Create Date: 2026-10-18 12:05:41.208311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '91e605874d16'
+down_revision = 'b4a4cd024383'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tb_fila_falhas',
+    sa.Column('id_projeto', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('classe_erro', sa.String(length=100), nullable=False),
+    sa.Column('erro', sa.Text(), nullable=True),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('proxima_tentativa', sa.DateTime(), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=True),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id_projeto'),
+    schema='camara'
+    )
+    with op.batch_alter_table('tb_fila_falhas', schema='camara') as batch_op:
+        batch_op.create_index(batch_op.f('ix_camara_tb_fila_falhas_proxima_tentativa'), ['proxima_tentativa'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tb_fila_falhas', schema='camara') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_camara_tb_fila_falhas_proxima_tentativa'))
+
+    op.drop_table('tb_fila_falhas', schema='camara')
@@ -0,0 +1,37 @@
+"""Fila de projetos para as réplicas
+
+Revision ID: 99dfbb07e683
+Revises: 91e605874d16
+Create Date: 2026-10-18 13:32:17.554902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '99dfbb07e683'
+down_revision = '91e605874d16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tb_fila_projetos',
+    sa.Column('id_projeto', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('disponivel_em', sa.DateTime(), nullable=False),
+    sa.Column('reservado_por', sa.String(length=100), nullable=True),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('enfileirado_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id_projeto'),
+    schema='camara'
+    )
+    with op.batch_alter_table('tb_fila_projetos', schema='camara') as batch_op:
+        batch_op.create_index(batch_op.f('ix_camara_tb_fila_projetos_disponivel_em'), ['disponivel_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tb_fila_projetos', schema='camara') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_camara_tb_fila_projetos_disponivel_em'))
+
+    op.drop_table('tb_fila_projetos', schema='camara')
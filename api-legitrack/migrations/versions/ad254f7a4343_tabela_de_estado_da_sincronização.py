@@ -0,0 +1,33 @@
+"""Tabela de estado da sincronização
+
+Revision ID: ad254f7a4343
+Revises: 56a966f3c953
+Create Date: 2026-10-18 10:03:17.224915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ad254f7a4343'
+down_revision = '56a966f3c953'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tb_sincronizacao',
+    sa.Column('tarefa', sa.String(length=50), nullable=False),
+    sa.Column('marca_dagua', sa.DateTime(), nullable=True),
+    sa.Column('janela_inicio', sa.DateTime(), nullable=True),
+    sa.Column('janela_fim', sa.DateTime(), nullable=True),
+    sa.Column('ultimo_id', sa.Integer(), nullable=True),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('tarefa'),
+    schema='camara'
+    )
+
+
+def downgrade():
+    op.drop_table('tb_sincronizacao', schema='camara')
@@ -0,0 +1,59 @@
+"""Busca textual dos projetos
+
+Revision ID: b0c11931b0e5
+Revises: d855755c1a62
+Create Date: 2026-10-18 18:02:41.530114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b0c11931b0e5'
+down_revision = 'd855755c1a62'
+branch_labels = None
+depends_on = None
+
+#Mesma expressão de TB_Projeto.busca (models.py)
+EXPRESSAO_BUSCA = (
+    "setweight(to_tsvector('camara.busca_pt'::regconfig, coalesce(titulo_projeto, '')), 'A') || "
+    "setweight(to_tsvector('camara.busca_pt'::regconfig, coalesce(descricao, '')), 'B')"
+)
+
+
+def upgrade():
+    #Configuração própria: português, e sem acento quando o unaccent existe no servidor.
+    #Com o nome da configuração fixo, to_tsvector é IMMUTABLE e pode ir numa coluna gerada
+    op.execute("CREATE TEXT SEARCH CONFIGURATION camara.busca_pt (COPY = pg_catalog.portuguese)")
+    conexao = op.get_bind()
+    tem_unaccent = conexao.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'unaccent'")).first()
+    if tem_unaccent:
+        op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        op.execute("""
+            ALTER TEXT SEARCH CONFIGURATION camara.busca_pt
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem
+        """)
+    else:
+        print("MIGRAÇÃO: [AVISO] extensão unaccent indisponível. A busca vai diferenciar acentos.")
+
+    #ATENÇÃO: coluna gerada STORED reescreve camara.tb_projeto inteira sob ACCESS EXCLUSIVE.
+    #Leituras e escritas na tabela ficam bloqueadas até o fim; rodar fora do horário de uso
+    with op.batch_alter_table('tb_projeto', schema='camara') as batch_op:
+        batch_op.add_column(sa.Column('busca', postgresql.TSVECTOR(), sa.Computed(EXPRESSAO_BUSCA, persisted=True), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_camara_tb_projeto_busca', 'tb_projeto', ['busca'], unique=False, schema='camara',
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_camara_tb_projeto_busca', table_name='tb_projeto', schema='camara',
+                      postgresql_concurrently=True, if_exists=True)
+
+    with op.batch_alter_table('tb_projeto', schema='camara') as batch_op:
+        batch_op.drop_column('busca')
+
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS camara.busca_pt")
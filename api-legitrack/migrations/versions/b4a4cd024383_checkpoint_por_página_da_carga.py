@@ -0,0 +1,33 @@
+"""Checkpoint por página da carga
+
+Revision ID: b4a4cd024383
+Revises: ad254f7a4343
+Create Date: 2026-10-18 11:20:05.631842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4a4cd024383'
+down_revision = 'ad254f7a4343'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tb_carga_paginas',
+    sa.Column('chave', sa.String(length=50), autoincrement=False, nullable=False),
+    sa.Column('pagina', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('erro', sa.Text(), nullable=True),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('chave', 'pagina'),
+    schema='camara'
+    )
+
+
+def downgrade():
+    op.drop_table('tb_carga_paginas', schema='camara')
@@ -0,0 +1,37 @@
+"""Índices dos caminhos de leitura
+
+Revision ID: d855755c1a62
+Revises: 79c31487167c
+Create Date: 2026-10-18 17:12:09.640183
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd855755c1a62'
+down_revision = '79c31487167c'
+branch_labels = None
+depends_on = None
+
+#tb_projeto(data_hora, id_projeto) já veio na 79c31487167c. rl_tramitacoes(id_projeto, sequencia)
+#e tb_interesses(id_user, ...) já têm índice pelas constraints UNIQUE
+INDICES = [
+    ('ix_camara_rl_temas_id_tema_id_projeto', 'rl_temas', ['id_tema', 'id_projeto'], 'camara'),
+    ('ix_usuarios_tb_interesses_id_interesse', 'tb_interesses', ['id_interesse'], 'usuarios'),
+    ('ix_usuarios_rl_favoritos_id_projeto', 'rl_favoritos', ['id_projeto'], 'usuarios'),
+]
+
+
+def upgrade():
+    #CONCURRENTLY não trava as escritas do worker, mas não pode rodar dentro de uma transação
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas, schema in INDICES:
+            op.create_index(nome, tabela, colunas, unique=False, schema=schema, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas, schema in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, schema=schema, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,68 @@
+"""Card dos projetos para as listas
+
+Revision ID: eda21becffc8
+Revises: fb8d3908984c
+Create Date: 2026-10-18 20:04:51.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'eda21becffc8'
+down_revision = 'fb8d3908984c'
+branch_labels = None
+depends_on = None
+
+#Mesmo comando de app/leitura.py (ATUALIZAR_CARDS), para todos os projetos
+PREENCHER_CARDS = """
+    INSERT INTO camara.projeto_card (id_projeto, data_hora, ids_temas, card)
+    SELECT p.id_projeto, p.data_hora, coalesce(t.ids_temas, '{}'),
+           jsonb_build_object(
+               'id', p.id_projeto,
+               'titulo', p.titulo_projeto,
+               'descricao', p.descricao,
+               'ano_inicio', p.ano_inicio,
+               'sigla_orgao', p.sigla_orgao,
+               'despacho', p.despacho,
+               'ultima_situação', coalesce(s.ds_situacao, ''),
+               'ultima_tramitação', coalesce(tr.ds_tramitacao, ''),
+               'ultima_data', CASE
+                   WHEN date_trunc('second', p.data_hora) = p.data_hora THEN to_char(p.data_hora, 'YYYY-MM-DD"T"HH24:MI:SS')
+                   ELSE to_char(p.data_hora, 'YYYY-MM-DD"T"HH24:MI:SS.US')
+               END
+           )::text
+    FROM camara.tb_projeto p
+    LEFT JOIN camara.tp_situacao s ON s.id_situacao = p.id_ultima_situacao
+    LEFT JOIN camara.tp_tramitacao tr ON tr.id_tramitacao = p.id_ultima_tramitacao
+    LEFT JOIN LATERAL (
+        SELECT array_agg(rt.id_tema ORDER BY rt.id_tema) AS ids_temas FROM camara.rl_temas rt WHERE rt.id_projeto = p.id_projeto
+    ) t ON TRUE
+"""
+
+
+def upgrade():
+    op.create_table('projeto_card',
+    sa.Column('id_projeto', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('data_hora', sa.DateTime(), nullable=True),
+    sa.Column('ids_temas', postgresql.ARRAY(sa.Integer()), server_default='{}', nullable=False),
+    sa.Column('card', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['id_projeto'], ['camara.tb_projeto.id_projeto'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_projeto'),
+    schema='camara'
+    )
+    #Preenche antes dos índices: montar cada um uma vez no fim sai mais barato
+    op.execute(PREENCHER_CARDS)
+    with op.batch_alter_table('projeto_card', schema='camara') as batch_op:
+        batch_op.create_index('ix_camara_projeto_card_data_hora_id_projeto', ['data_hora', 'id_projeto'], unique=False)
+        batch_op.create_index('ix_camara_projeto_card_ids_temas', ['ids_temas'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    with op.batch_alter_table('projeto_card', schema='camara') as batch_op:
+        batch_op.drop_index('ix_camara_projeto_card_ids_temas', postgresql_using='gin')
+        batch_op.drop_index('ix_camara_projeto_card_data_hora_id_projeto')
+
+    op.drop_table('projeto_card', schema='camara')
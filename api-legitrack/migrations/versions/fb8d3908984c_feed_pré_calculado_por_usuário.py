@@ -0,0 +1,37 @@
+"""Feed pré-calculado por usuário
+
+Revision ID: fb8d3908984c
+Revises: b0c11931b0e5
+Create Date: 2026-10-18 19:10:27.402518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fb8d3908984c'
+down_revision = 'b0c11931b0e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tb_feed',
+    sa.Column('id_user', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('id_projeto', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('data_hora', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_projeto'], ['camara.tb_projeto.id_projeto'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_user'], ['usuarios.tb_users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_user', 'id_projeto'),
+    schema='usuarios'
+    )
+    with op.batch_alter_table('tb_feed', schema='usuarios') as batch_op:
+        batch_op.create_index('ix_usuarios_tb_feed_id_user_data_hora_id_projeto', ['id_user', 'data_hora', 'id_projeto'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tb_feed', schema='usuarios') as batch_op:
+        batch_op.drop_index('ix_usuarios_tb_feed_id_user_data_hora_id_projeto')
+
+    op.drop_table('tb_feed', schema='usuarios')
@@ -0,0 +1,129 @@
+import os
+from contextlib import contextmanager
+from unittest import mock
+
+import pytest
+from sqlalchemy import event, text
+
+MIGRACOES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+TOTAL_PROJETOS = 20000
+TOTAL_TEMAS = 40
+TOTAL_USUARIOS = 5000
+EMENTA_BUSCA = 'Dispõe sobre a educação infantil nas escolas públicas'
+
+'''
+=================== Postgres de teste ===================
+'''
+
+#Os testes que precisam de banco rodam contra TEST_DATABASE_URL, que é APAGADO
+#(schemas camara, usuarios e senado) e recriado pelas migrações. Sem ela, são pulados
+
+@pytest.fixture(scope='session')
+def app_pg():
+    url = os.environ.get('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip("TEST_DATABASE_URL não definido: testes contra o Postgres pulados.")
+
+    from flask_migrate import upgrade
+    from app import create_app, db
+
+    with mock.patch.dict(os.environ, {'DATABASE_URL': url}):
+        app = create_app()
+
+    with app.app_context():
+        with db.engine.begin() as conexao:
+            conexao.execute(text("DROP SCHEMA IF EXISTS camara, usuarios, senado CASCADE"))
+            conexao.execute(text("DROP TABLE IF EXISTS public.alembic_version"))
+            for schema in ('camara', 'usuarios', 'senado'):
+                conexao.execute(text(f"CREATE SCHEMA {schema}"))
+        upgrade(directory=MIGRACOES)
+        popular(db)
+        yield app
+        db.session.remove()
+
+#Volume suficiente para o planner preferir os índices
+DADOS_SINTETICOS = [
+    "INSERT INTO camara.tp_situacao SELECT g, 'Situação ' || g FROM generate_series(1, 10) g",
+    "INSERT INTO camara.tp_tramitacao SELECT g, 'Tramitação ' || g FROM generate_series(1, 10) g",
+    f"INSERT INTO camara.tp_temas SELECT g, 'Tema ' || g FROM generate_series(1, {TOTAL_TEMAS}) g",
+    #Um em cada dez projetos fica sem data (vai para o fim da lista)
+    f"""
+    INSERT INTO camara.tb_projeto (id_projeto, titulo_projeto, descricao, ano_inicio, data_hora, sigla_orgao, despacho, id_ultima_situacao, id_ultima_tramitacao)
+    SELECT g, 'Projeto de teste ' || g, 'PL ' || g || '/2025', '2025',
+           CASE WHEN g % 10 = 0 THEN NULL ELSE timestamp '2025-01-01' + (g / 2) * interval '1 hour' END,
+           'PLEN', 'Despacho', 1 + g % 10, 1 + g % 10
+    FROM generate_series(1, {TOTAL_PROJETOS}) g
+    """,
+    #Alguns projetos com ementa de verdade para a busca textual
+    f"UPDATE camara.tb_projeto SET titulo_projeto = '{EMENTA_BUSCA}' WHERE id_projeto % 50 = 7",
+    """
+    INSERT INTO camara.rl_tramitacoes (id_projeto, sequencia, data_hora, id_situacao, id_tramitacao)
+    SELECT p.id_projeto, s, timestamp '2025-01-01' + s * interval '1 day', 1 + s, 1 + s
+    FROM camara.tb_projeto p, generate_series(1, 3) s
+    """,
+    f"INSERT INTO camara.rl_temas (id_projeto, id_tema) SELECT id_projeto, 1 + id_projeto % {TOTAL_TEMAS} FROM camara.tb_projeto",
+    f"""
+    INSERT INTO usuarios.tb_users (id, username, email, password_hash)
+    SELECT g, 'usuario' || g, 'usuario' || g || '@teste.com', 'x' FROM generate_series(1, {TOTAL_USUARIOS}) g
+    """,
+    f"""
+    INSERT INTO usuarios.tb_interesses (id_user, id_interesse)
+    SELECT u, 1 + (u * 7 + i) % {TOTAL_TEMAS} FROM generate_series(1, {TOTAL_USUARIOS}) u, generate_series(0, 2) i
+    """,
+    f"""
+    INSERT INTO usuarios.rl_favoritos (id_user, id_projeto)
+    SELECT u, 1 + (u * 97 + i * 13) % {TOTAL_PROJETOS} FROM generate_series(1, {TOTAL_USUARIOS}) u, generate_series(0, 4) i
+    """,
+    "SELECT setval(pg_get_serial_sequence('usuarios.tb_users', 'id'), (SELECT max(id) FROM usuarios.tb_users))",
+]
+
+def popular(db):
+    from app.leitura import ATUALIZAR_CARDS
+
+    for comando in DADOS_SINTETICOS:
+        db.session.execute(text(comando))
+    #Os dados sintéticos entram por fora da ingestão: os cards são montados aqui
+    db.session.execute(text(ATUALIZAR_CARDS.format(filtro="TRUE")))
+    db.session.commit()
+
+    #VACUUM também esvazia a lista pendente do GIN da busca (encheu com o UPDATE acima)
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexao:
+        conexao.execute(text("VACUUM ANALYZE"))
+
+'''
+=================== Consultas executadas ===================
+'''
+
+@pytest.fixture
+def contar_consultas():
+    return _contar_consultas
+
+@contextmanager
+def _contar_consultas(engine):
+    """
+    Junta numa lista os (SQL, parâmetros) executados no engine dentro do bloco.
+    """
+    consultas = []
+
+    def registrar(conexao, cursor, statement, parameters, context, executemany):
+        consultas.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+@pytest.fixture
+def explicar():
+    return _explicar
+
+def _explicar(engine, statement, parameters):
+    """
+    Plano estimado (EXPLAIN em JSON) de uma consulta capturada por contar_consultas.
+    """
+    with engine.connect() as conexao:
+        cursor = conexao.connection.cursor()
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        return cursor.fetchone()[0][0]['Plan']
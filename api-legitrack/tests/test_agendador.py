@@ -0,0 +1,110 @@
+import time
+from unittest import mock
+
+from sqlalchemy import text
+
+from app import db
+from app.agendador import Agendador, Tarefa, chave_do_lock
+
+'''
+=================== Cadência e jitter ===================
+'''
+
+def test_intervalo_com_jitter_fica_na_faixa():
+    tarefa = Tarefa('teste', lambda: None, intervalo=100, jitter=0.1)
+    for sorteio in (-0.1, 0.0, 0.1):
+        with mock.patch('app.agendador.random.uniform', return_value=sorteio) as uniform:
+            antes = time.monotonic()
+            tarefa.agendar_proxima()
+        uniform.assert_called_once_with(-0.1, 0.1)
+        assert abs(tarefa.proxima_execucao - antes - 100 * (1 + sorteio)) < 0.5
+
+def test_espera_explicita_ignora_o_jitter():
+    tarefa = Tarefa('teste', lambda: None, intervalo=100)
+    antes = time.monotonic()
+    tarefa.agendar_proxima(30)
+    assert abs(tarefa.proxima_execucao - antes - 30) < 0.5
+
+def test_primeira_execucao_espalhada_ou_com_atraso_inicial():
+    #Primeira execução em até 10s (ou intervalo * jitter, se for menor)
+    for intervalo in (5, 3600):
+        antes = time.monotonic()
+        tarefa = Tarefa('teste', lambda: None, intervalo=intervalo, jitter=0.1)
+        assert 0 <= tarefa.proxima_execucao - antes <= min(10, intervalo * 0.1) + 0.5
+
+    antes = time.monotonic()
+    tarefa = Tarefa('teste', lambda: None, intervalo=86400, atraso_inicial=86400)
+    assert tarefa.proxima_execucao - antes >= 86400
+
+'''
+=================== Liderança por advisory lock ===================
+'''
+
+def test_so_uma_replica_lidera_cada_tarefa(app_pg):
+    nome = 'teste_lideranca'
+    replica_a = Agendador(app_pg, prefixo="TESTE (A)")
+    replica_b = Agendador(app_pg, prefixo="TESTE (B)")
+    tarefa_a = Tarefa(nome, lambda: None, 60)
+    tarefa_b = Tarefa(nome, lambda: None, 60)
+
+    with app_pg.app_context():
+        try:
+            assert replica_a._garantir_lideranca(tarefa_a)
+            assert not replica_b._garantir_lideranca(tarefa_b)
+            #A líder continua líder sem disputar de novo, e o teste da conexão não deixa transação aberta
+            assert replica_a._garantir_lideranca(tarefa_a)
+            assert not tarefa_a.conexao_lock.in_transaction()
+
+            #Quando a conexão da líder cai, o lock é solto e a reserva assume
+            replica_a._soltar_lideranca(tarefa_a)
+            assert replica_b._garantir_lideranca(tarefa_b)
+            assert not replica_a._garantir_lideranca(tarefa_a)
+        finally:
+            replica_a._soltar_lideranca(tarefa_a)
+            replica_b._soltar_lideranca(tarefa_b)
+
+        livre = db.session.execute(text("SELECT pg_try_advisory_lock(:chave)"), {"chave": chave_do_lock(nome)}).scalar()
+        db.session.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": chave_do_lock(nome)})
+        db.session.commit()
+        assert livre
+
+def test_reserva_nao_roda_a_tarefa_e_tenta_de_novo_depois(app_pg):
+    nome = 'teste_reserva'
+    chamadas = []
+    lider = Agendador(app_pg, prefixo="TESTE (líder)")
+    reserva = Agendador(app_pg, prefixo="TESTE (reserva)", intervalo_reserva=30)
+    tarefa_lider = Tarefa(nome, lambda: chamadas.append('líder'), 3600)
+    tarefa_reserva = Tarefa(nome, lambda: chamadas.append('reserva'), 3600)
+
+    try:
+        lider._rodar(tarefa_lider)
+        antes = time.monotonic()
+        reserva._rodar(tarefa_reserva)
+
+        assert chamadas == ['líder']
+        #A reserva volta a disputar em intervalo_reserva, não no intervalo da tarefa
+        assert abs(tarefa_reserva.proxima_execucao - antes - 30) < 0.5
+        assert tarefa_lider.proxima_execucao - antes > 3000
+        assert not tarefa_lider.em_execucao and not tarefa_reserva.em_execucao
+    finally:
+        lider._soltar_lideranca(tarefa_lider)
+        reserva._soltar_lideranca(tarefa_reserva)
+
+def test_lider_que_perde_a_conexao_disputa_de_novo(app_pg):
+    replica = Agendador(app_pg, prefixo="TESTE")
+    tarefa = Tarefa('teste_conexao_perdida', lambda: None, 60)
+
+    with app_pg.app_context():
+        try:
+            assert replica._garantir_lideranca(tarefa)
+            pid = tarefa.conexao_lock.execute(text("SELECT pg_backend_pid()")).scalar()
+            tarefa.conexao_lock.commit()
+            #Simula um restart do banco derrubando a conexão que segura o lock
+            db.session.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid})
+            db.session.commit()
+
+            assert replica._garantir_lideranca(tarefa)
+            assert tarefa.conexao_lock.execute(text("SELECT pg_backend_pid()")).scalar() != pid
+            tarefa.conexao_lock.commit()
+        finally:
+            replica._soltar_lideranca(tarefa)
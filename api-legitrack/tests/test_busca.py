@@ -0,0 +1,43 @@
+from app.paginacao import codificar_cursor
+
+#Se o cursor parar de avançar, o teste falha em vez de rodar para sempre
+MAXIMO_PAGINAS = 100
+
+def ids_da_busca(cliente, url):
+    vistos = []
+    cursor = None
+    for _ in range(MAXIMO_PAGINAS):
+        resposta = cliente.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert resposta.status_code == 200
+        vistos += [projeto['id'] for projeto in resposta.json['projetos']]
+        cursor = resposta.json['next_cursor']
+        if not cursor:
+            return vistos
+    raise AssertionError(f"paginação não terminou em {MAXIMO_PAGINAS} páginas")
+
+def test_busca_encontra_pela_ementa_e_pagina_sem_repetir(app_pg):
+    cliente = app_pg.test_client()
+
+    #"escola" casa com "escolas" pelo radical
+    vistos = ids_da_busca(cliente, "/projetos/busca?q=educação escola&tamanho_pagina=30")
+
+    assert sorted(vistos) == [id_projeto for id_projeto in range(1, 20001) if id_projeto % 50 == 7]
+    assert len(set(vistos)) == len(vistos)
+
+def test_busca_filtra_por_tema(app_pg):
+    cliente = app_pg.test_client()
+
+    vistos = ids_da_busca(cliente, "/projetos/busca?q=educação&tema=8&tema=18")
+
+    #rl_temas sintético: tema = 1 + id % 40
+    assert vistos
+    assert all(1 + id_projeto % 40 in (8, 18) for id_projeto in vistos)
+
+def test_busca_valida_parametros(app_pg):
+    cliente = app_pg.test_client()
+
+    assert cliente.get("/projetos/busca?q=").status_code == 400
+    assert cliente.get("/projetos/busca?q=educação&tema=x").status_code == 400
+    assert cliente.get("/projetos/busca?q=educação&cursor=lixo").status_code == 400
+    assert cliente.get(f"/projetos/busca?q=educação&cursor={codificar_cursor('0.5')}").status_code == 400
+    assert cliente.get(f"/projetos/busca?q=educação&cursor={codificar_cursor('x', 1)}").status_code == 400
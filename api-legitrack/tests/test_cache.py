@@ -0,0 +1,24 @@
+from flask import Flask
+
+from app import cache
+
+def test_invalidacao_por_tema_so_afeta_as_consultas_do_tema():
+    app = Flask(__name__)
+    cache.configurar_cache(app)
+
+    with app.app_context():
+        assert cache.normalizar_temas([5, "3", 5]) == [3, 5]
+
+        chave_3_5 = cache.chave_da_consulta([3, 5])
+        chave_7 = cache.chave_da_consulta([7])
+        chave_todos = cache.chave_da_consulta([])
+        cache.gravar(chave_3_5, {"projetos": [1]})
+        assert cache.ler(cache.chave_da_consulta([3, 5])) == {"projetos": [1]}
+
+        cache.invalidar_temas({5})
+
+        assert cache.chave_da_consulta([3, 5]) != chave_3_5
+        assert cache.ler(cache.chave_da_consulta([3, 5])) is None
+        assert cache.chave_da_consulta([7]) == chave_7
+        #Qualquer gravação muda a lista sem filtro
+        assert cache.chave_da_consulta([]) != chave_todos
@@ -0,0 +1,127 @@
+import importlib
+import json
+import sys
+from unittest import mock
+
+import pytest
+import requests
+
+from app import camara
+from app.camara import CamaraClient
+from app.limitador import LimitadorAdaptativo
+
+URL_BASE = "http://camara.teste/api/v2"
+
+def resposta(status, corpo=None, cabecalhos=None):
+    r = requests.Response()
+    r.status_code = status
+    r._content = json.dumps(corpo if corpo is not None else {}).encode('utf-8')
+    r.headers.update(cabecalhos or {})
+    r.url = URL_BASE
+    return r
+
+def pagina(ids, proxima=None, ultima=None):
+    links = []
+    if proxima:
+        links.append({"rel": "next", "href": f"{URL_BASE}/proposicoes?itens=2&pagina={proxima}"})
+    if ultima:
+        links.append({"rel": "last", "href": f"{URL_BASE}/proposicoes?itens=2&pagina={ultima}"})
+    return resposta(200, {"dados": [{"id": i} for i in ids], "links": links})
+
+@pytest.fixture
+def cliente():
+    #Limitador de mentira: o único sleep que sobra é o backoff do próprio cliente
+    return CamaraClient(url_base=URL_BASE, tentativas=2, backoff=0.01, limitador=mock.Mock(spec=LimitadorAdaptativo))
+
+'''
+=================== Paginação ===================
+'''
+
+def test_paginas_segue_o_link_next_sem_repetir_os_parametros(cliente):
+    respostas = [pagina([1, 2], proxima=2), pagina([3, 4], proxima=3), pagina([5])]
+    with mock.patch.object(cliente.session, 'get', side_effect=respostas) as get:
+        assert [item["id"] for item in cliente.itens("/proposicoes", {"itens": 2})] == [1, 2, 3, 4, 5]
+
+    urls = [(chamada.args[0], chamada.kwargs["params"]) for chamada in get.call_args_list]
+    assert urls[0] == (f"{URL_BASE}/proposicoes", {"itens": 2})
+    #O link next já traz a busca inteira
+    assert urls[1] == (f"{URL_BASE}/proposicoes?itens=2&pagina=2", None)
+
+def test_paginas_para_na_primeira_pagina_vazia(cliente):
+    with mock.patch.object(cliente.session, 'get', side_effect=[pagina([1], proxima=2), pagina([], proxima=3)]) as get:
+        assert len(list(cliente.paginas("/proposicoes"))) == 1
+    assert get.call_count == 2
+
+def test_total_de_paginas_pelo_link_last(cliente):
+    with mock.patch.object(cliente.session, 'get', side_effect=[pagina([1, 2], proxima=2, ultima=37), pagina([1]), pagina([])]):
+        assert cliente.total_de_paginas("/proposicoes", {"itens": 2}) == 37
+        #Sem link last: uma página se veio algo, nenhuma se não veio
+        assert cliente.total_de_paginas("/proposicoes") == 1
+        assert cliente.total_de_paginas("/proposicoes") == 0
+
+'''
+=================== Novas tentativas ===================
+'''
+
+def test_refaz_5xx_com_backoff(cliente):
+    with mock.patch.object(cliente.session, 'get', side_effect=[resposta(503), resposta(502), resposta(200, {"dados": {"id": 7}})]) as get, \
+         mock.patch.object(camara.time, 'sleep') as sleep:
+        assert cliente.get_dados("/proposicoes/7") == {"id": 7}
+    assert get.call_count == 3
+    assert [chamada.args[0] for chamada in sleep.call_args_list] == [0.01, 0.02]
+    #Cada resposta chega ao limitador
+    assert [chamada.args[0] for chamada in cliente.limitador.registrar.call_args_list] == [503, 502, 200]
+
+def test_429_pausa_pelo_retry_after(cliente):
+    with mock.patch.object(cliente.session, 'get', side_effect=[resposta(429, cabecalhos={"Retry-After": "3"}), resposta(200, {"dados": []})]), \
+         mock.patch.object(camara.time, 'sleep') as sleep:
+        assert cliente.get_dados("/proposicoes") == []
+    #Com Retry-After quem espera é o limitador (todas as threads), não só esta chamada
+    cliente.limitador.pausar.assert_called_once_with(3.0)
+    sleep.assert_not_called()
+
+def test_desiste_depois_das_tentativas_e_nao_refaz_4xx(cliente):
+    with mock.patch.object(cliente.session, 'get', return_value=resposta(503)) as get, mock.patch.object(camara.time, 'sleep'):
+        with pytest.raises(requests.exceptions.HTTPError):
+            cliente.get_json("/proposicoes")
+    assert get.call_count == cliente.tentativas + 1
+
+    with mock.patch.object(cliente.session, 'get', return_value=resposta(404)) as get:
+        with pytest.raises(requests.exceptions.HTTPError):
+            cliente.get_json("/proposicoes/1")
+    assert get.call_count == 1
+
+def test_refaz_erro_de_conexao(cliente):
+    falha = requests.exceptions.ConnectionError("conexão recusada")
+    with mock.patch.object(cliente.session, 'get', side_effect=[falha, resposta(200, {"dados": []})]) as get, \
+         mock.patch.object(camara.time, 'sleep'):
+        assert cliente.get_dados("/proposicoes") == []
+    assert get.call_count == 2
+
+'''
+=================== Decodificação do JSON ===================
+'''
+
+@pytest.fixture
+def camara_sem_orjson():
+    #Recarrega o módulo como se o orjson não estivesse instalado, e restaura no fim
+    with mock.patch.dict(sys.modules, {'orjson': None}):
+        modulo = importlib.reload(camara)
+    try:
+        yield modulo
+    finally:
+        importlib.reload(camara)
+
+CORPO = {"dados": {"id": 1, "ementa": "Dispõe sobre a criação de ações"}, "links": []}
+
+def test_decodifica_com_orjson(cliente):
+    orjson = pytest.importorskip('orjson')
+    assert camara._decodificar_json is orjson.loads
+    with mock.patch.object(cliente.session, 'get', return_value=resposta(200, CORPO)):
+        assert cliente.get_json("/proposicoes/1") == CORPO
+
+def test_decodifica_sem_orjson(camara_sem_orjson):
+    assert camara_sem_orjson._decodificar_json is json.loads
+    cliente = camara_sem_orjson.CamaraClient(url_base=URL_BASE, limitador=LimitadorAdaptativo(taxa_inicial=1000, taxa_maxima=1000))
+    with mock.patch.object(cliente.session, 'get', return_value=resposta(200, CORPO)):
+        assert cliente.get_json("/proposicoes/1") == CORPO
@@ -0,0 +1,81 @@
+import json
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app.camara import CamaraClient
+from app.limitador import LimitadorAdaptativo
+from app.coleta import buscar_projeto_completo, projeto_mudou, _semaforo_do_host, CAMARA_LIMITE_POR_HOST
+from benchmarks.fake_camara import iniciar_servidor
+
+def cliente_para(url_base):
+    return CamaraClient(url_base=url_base, backoff=0.01, limitador=LimitadorAdaptativo(taxa_inicial=1000, taxa_maxima=1000))
+
+def test_listagem_paginada_percorre_todos_os_projetos():
+    servidor, url_base = iniciar_servidor(id_inicial=500, total_projetos=250)
+    try:
+        cliente = cliente_para(url_base)
+        ids = [item['id'] for item in cliente.itens("/proposicoes", {"pagina": 1, "itens": 100})]
+        assert ids == list(range(500, 750))
+
+        anos = [item['ano'] for item in cliente.itens("/proposicoes", {"ano": [2010], "itens": 100})]
+        assert anos and set(anos) == {2010}
+    finally:
+        servidor.shutdown()
+
+def test_respostas_gravadas_tem_prioridade(tmp_path):
+    (tmp_path / "proposicoes").mkdir()
+    (tmp_path / "proposicoes" / "7.json").write_text(json.dumps({"dados": {"id": 7, "ementa": "Gravada"}, "links": []}))
+
+    servidor, url_base = iniciar_servidor(diretorio_dados=str(tmp_path))
+    try:
+        cliente = cliente_para(url_base)
+        assert cliente.get_dados("/proposicoes/7")["ementa"] == "Gravada"
+        assert cliente.get_dados("/proposicoes/8")["ementa"] == "Projeto sintético 8"
+        assert {tema["cod"] for tema in cliente.get_dados("/referencias/proposicoes/codTema")} == {str(cod) for cod in range(40, 60)}
+    finally:
+        servidor.shutdown()
+
+def test_semaforo_e_um_so_por_host():
+    #O teto vale para o host, somando todas as threads, e não por chamador
+    primeiro = _semaforo_do_host("http://camara.teste:8000/proposicoes/1")
+    assert _semaforo_do_host("http://camara.teste:8000/proposicoes/2/temas") is primeiro
+    assert _semaforo_do_host("http://outro.teste/proposicoes/1") is not primeiro
+    assert primeiro._initial_value == CAMARA_LIMITE_POR_HOST
+
+def test_projeto_mudou():
+    projeto = {"statusProposicao": {"dataHora": "2025-03-01T10:00"}}
+    gravada = datetime(2025, 3, 1, 10, 0)
+    assert not projeto_mudou(projeto, gravada)
+    assert projeto_mudou(projeto, gravada - timedelta(minutes=1))
+    #Sem data local ou com data malformada, busca tudo
+    assert projeto_mudou(projeto, None)
+    assert projeto_mudou({"statusProposicao": {"dataHora": "ontem"}}, gravada)
+    assert projeto_mudou({}, gravada)
+    #Status anterior ao corte da janela já foi visto, mesmo sem data local
+    assert not projeto_mudou(projeto, None, desde=gravada + timedelta(hours=1))
+    assert projeto_mudou(projeto, None, desde=gravada - timedelta(hours=1))
+
+def caminhos_pedidos(get_dados):
+    return [chamada.args[0] for chamada in get_dados.call_args_list]
+
+def test_busca_do_projeto_completo():
+    servidor, url_base = iniciar_servidor()
+    try:
+        cliente = cliente_para(url_base)
+        with mock.patch.object(cliente, 'get_dados', wraps=cliente.get_dados) as get_dados:
+            projeto, tramitacoes, temas = buscar_projeto_completo(cliente, 7)
+        assert projeto["id"] == 7 and tramitacoes and temas
+        assert caminhos_pedidos(get_dados) == ["/proposicoes/7", "/proposicoes/7/tramitacoes", "/proposicoes/7/temas"]
+
+        #dataHora igual à gravada: só o detalhe é pedido
+        data_hora = datetime.fromisoformat(projeto["statusProposicao"]["dataHora"])
+        with mock.patch.object(cliente, 'get_dados', wraps=cliente.get_dados) as get_dados:
+            assert buscar_projeto_completo(cliente, 7, data_hora_local=data_hora) == (projeto, None, None)
+        assert caminhos_pedidos(get_dados) == ["/proposicoes/7"]
+
+        #dataHora diferente: busca tramitações e temas de novo
+        with mock.patch.object(cliente, 'get_dados', wraps=cliente.get_dados) as get_dados:
+            assert buscar_projeto_completo(cliente, 7, data_hora_local=data_hora - timedelta(days=1)) == (projeto, tramitacoes, temas)
+        assert caminhos_pedidos(get_dados) == ["/proposicoes/7", "/proposicoes/7/tramitacoes", "/proposicoes/7/temas"]
+    finally:
+        servidor.shutdown()
@@ -0,0 +1,53 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import db
+from app.cache import cache
+from app.gravacao import confirmar_lote
+from app.models import TB_ProjetoCard
+
+CAMPOS_PROJETO = ('id_projeto', 'titulo_projeto', 'descricao', 'ano_inicio', 'data_hora', 'sigla_orgao', 'despacho', 'id_ultima_situacao', 'id_ultima_tramitacao')
+
+def item_de_teste(id_projeto, titulo, ids_temas):
+    projeto = dict.fromkeys(CAMPOS_PROJETO)
+    projeto.update(id_projeto=id_projeto, titulo_projeto=titulo, descricao="PL 1/2030", ano_inicio="2030",
+                   data_hora=datetime(2030, 1, 2, 3, 4, 5, 600000), id_ultima_situacao=3, id_ultima_tramitacao=4)
+    temas = [{"id_projeto": id_projeto, "id_tema": id_tema} for id_tema in ids_temas]
+    return {"id_projeto": id_projeto, "projeto": projeto, "tramitacoes": [], "temas": temas}
+
+def test_card_tem_o_mesmo_json_de_antes(app_pg):
+    with app_pg.app_context():
+        card = json.loads(db.session.get(TB_ProjetoCard, 1234).card)
+
+    assert card == {
+        "id": 1234, "titulo": "Projeto de teste 1234", "descricao": "PL 1234/2025", "ano_inicio": "2025",
+        "sigla_orgao": "PLEN", "despacho": "Despacho", "ultima_situação": "Situação 5", "ultima_tramitação": "Tramitação 5",
+        "ultima_data": "2025-01-26T17:00:00"
+    }
+
+def test_ingestao_grava_o_card_na_mesma_transacao(app_pg):
+    cliente = app_pg.test_client()
+    with app_pg.app_context():
+        try:
+            assert confirmar_lote([item_de_teste(900002, "Primeira ementa", [7])], "TESTE")[3] == []
+            card = db.session.get(TB_ProjetoCard, 900002)
+            assert card.ids_temas == [7]
+            assert json.loads(card.card)["ultima_data"] == "2030-01-02T03:04:05.600000"
+
+            #Regravar com ementa e tema novos atualiza o card
+            assert confirmar_lote([item_de_teste(900002, "Ementa nova", [8])], "TESTE")[3] == []
+            db.session.expire_all()
+            card = db.session.get(TB_ProjetoCard, 900002)
+            assert card.ids_temas == [7, 8]
+            assert json.loads(card.card)["titulo"] == "Ementa nova"
+
+            cache.clear()
+            resposta = cliente.post('/projetos_iniciais', json={"ids_temas": [8]})
+            assert resposta.json["projetos"][0]["titulo"] == "Ementa nova"
+        finally:
+            db.session.execute(text("DELETE FROM camara.rl_temas WHERE id_projeto = 900002"))
+            db.session.execute(text("DELETE FROM camara.tb_projeto WHERE id_projeto = 900002"))
+            db.session.commit()
+            cache.clear()
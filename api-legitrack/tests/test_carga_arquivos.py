@@ -0,0 +1,114 @@
+import os
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import db
+from app.carga_arquivos import arquivos_do_ano, carregar_ano, em_blocos, ler_proposicoes, ler_temas, ler_tramitacoes
+from app.gravacao import montar_item, montar_tramitacoes
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'arquivos')
+
+def test_arquivos_do_ano_encontra_os_tres_arquivos():
+    arquivos = arquivos_do_ano(FIXTURES, 2023)
+    assert set(arquivos) == {'proposicoes', 'temas', 'tramitacoes'}
+    assert arquivos_do_ano(FIXTURES, 1999) == {}
+
+def test_ler_proposicoes_monta_resumo_e_status():
+    proposicoes = list(ler_proposicoes(arquivos_do_ano(FIXTURES, 2023)['proposicoes']))
+    assert [resumo['id'] for resumo, _ in proposicoes] == ['2341001', '2341002', '2341003']
+
+    resumo, status = proposicoes[0]
+    item = montar_item(resumo, status, [], [], "TESTE")
+    assert item['projeto'] == {
+        "id_projeto": 2341001,
+        "titulo_projeto": "Dispõe sobre a acessibilidade em terminais de autoatendimento.",
+        "descricao": "PL 10/2023",
+        "ano_inicio": "2023",
+        "data_hora": datetime(2023, 3, 15, 14, 30),
+        "sigla_orgao": "CCJC",
+        "despacho": "Ao relator.",
+        "id_ultima_situacao": 924,
+        "id_ultima_tramitacao": 500
+    }
+
+def test_ler_proposicoes_sem_status_nao_apaga_campos():
+    _, status = list(ler_proposicoes(arquivos_do_ano(FIXTURES, 2023)['proposicoes']))[2]
+    assert status is None
+
+def test_ler_temas_extrai_id_da_uri():
+    temas = list(ler_temas(arquivos_do_ano(FIXTURES, 2023)['temas']))
+    assert temas[:3] == [(2341001, {"cod": "34"}), (2341002, {"cod": "34"}), (2341002, {"cod": "56"})]
+
+def test_ler_tramitacoes_descarta_item_malformado():
+    tramitacoes = list(ler_tramitacoes(arquivos_do_ano(FIXTURES, 2023)['tramitacoes']))
+    assert len(tramitacoes) == 4
+
+    linhas = montar_tramitacoes(2341002, [t for id_projeto, t in tramitacoes if id_projeto == 2341002], "TESTE")
+    assert [linha['sequencia'] for linha in linhas] == [1]
+
+def test_em_blocos_consome_o_gerador_aos_poucos():
+    lidos = []
+
+    def gerador():
+        for i in range(5):
+            lidos.append(i)
+            yield i
+
+    blocos = em_blocos(gerador(), 2)
+    assert next(blocos) == [0, 1]
+    assert lidos == [0, 1]
+    assert list(blocos) == [[2, 3], [4]]
+
+'''
+=================== Gravação no Postgres ===================
+'''
+
+IDS_FIXTURE = [2341001, 2341002, 2341003]
+
+#Códigos dos arquivos de exemplo que não estão nos dados sintéticos do conftest
+REFERENCIAS_FIXTURE = [
+    "INSERT INTO camara.tp_situacao VALUES (901, 'Aguardando Despacho'), (924, 'Aguardando Parecer') ON CONFLICT DO NOTHING",
+    "INSERT INTO camara.tp_tramitacao VALUES (100, 'Apresentação'), (500, 'Recebimento') ON CONFLICT DO NOTHING",
+    "INSERT INTO camara.tp_temas VALUES (56, 'Saúde') ON CONFLICT DO NOTHING",
+]
+
+def linhas_da_fixture(consulta):
+    return db.session.execute(text(consulta), {"ids": IDS_FIXTURE + [9999999]}).all()
+
+def apagar_fixture():
+    for tabela in ('rl_tramitacoes', 'rl_temas', 'tb_projeto'):
+        db.session.execute(text(f"DELETE FROM camara.{tabela} WHERE id_projeto = ANY(:ids)"), {"ids": IDS_FIXTURE})
+    db.session.commit()
+
+def test_carregar_ano_grava_projetos_temas_e_tramitacoes(app_pg):
+    with app_pg.app_context():
+        for comando in REFERENCIAS_FIXTURE:
+            db.session.execute(text(comando))
+        db.session.commit()
+        try:
+            carregar_ano(arquivos_do_ano(FIXTURES, 2023))
+
+            projetos = linhas_da_fixture("SELECT id_projeto, data_hora, id_ultima_situacao FROM camara.tb_projeto WHERE id_projeto = ANY(:ids) ORDER BY 1")
+            assert projetos == [
+                (2341001, datetime(2023, 3, 15, 14, 30), 924),
+                (2341002, datetime(2023, 2, 20, 11, 0), 901),
+                (2341003, None, None)
+            ]
+            #Tema de projeto ausente (9999999) e tramitação malformada ficam de fora
+            assert linhas_da_fixture("SELECT id_projeto, id_tema FROM camara.rl_temas WHERE id_projeto = ANY(:ids) ORDER BY 1, 2") == [
+                (2341001, 34), (2341002, 34), (2341002, 56)
+            ]
+            assert linhas_da_fixture("SELECT id_projeto, sequencia FROM camara.rl_tramitacoes WHERE id_projeto = ANY(:ids) ORDER BY 1, 2") == [
+                (2341001, 1), (2341001, 4), (2341002, 1)
+            ]
+            cards = linhas_da_fixture("SELECT id_projeto, ids_temas FROM camara.projeto_card WHERE id_projeto = ANY(:ids) ORDER BY 1")
+            assert cards == [(2341001, [34]), (2341002, [34, 56]), (2341003, [])]
+
+            #Carregar de novo não duplica nada
+            carregar_ano(arquivos_do_ano(FIXTURES, 2023))
+            assert len(linhas_da_fixture("SELECT 1 FROM camara.rl_tramitacoes WHERE id_projeto = ANY(:ids)")) == 3
+            assert len(linhas_da_fixture("SELECT 1 FROM camara.rl_temas WHERE id_projeto = ANY(:ids)")) == 3
+        finally:
+            db.session.rollback()
+            apagar_fixture()
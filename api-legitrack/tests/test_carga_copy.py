@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import db
+from app.carga_copy import CargaStaging
+
+IDS = (940001, 940002, 940003, 940004)
+
+def item(id_projeto, titulo='Projeto da staging', descricao=None, despacho=None, temas=(), sequencias=()):
+    projeto = {
+        "id_projeto": id_projeto, "titulo_projeto": titulo, "descricao": descricao, "ano_inicio": "2025",
+        "data_hora": datetime(2025, 6, 1, 12, 0), "sigla_orgao": "PLEN", "despacho": despacho,
+        "id_ultima_situacao": 1, "id_ultima_tramitacao": 1
+    }
+    return {
+        "id_projeto": id_projeto,
+        "projeto": projeto,
+        "tramitacoes": [{"id_projeto": id_projeto, "sequencia": s, "data_hora": datetime(2025, 5, s), "id_situacao": 1, "id_tramitacao": 1} for s in sequencias],
+        "temas": [{"id_projeto": id_projeto, "id_tema": t} for t in temas]
+    }
+
+def linhas(consulta):
+    return db.session.execute(text(consulta), {"ids": list(IDS)}).all()
+
+def apagar():
+    for tabela in ('rl_tramitacoes', 'rl_temas', 'tb_fila_falhas', 'tb_projeto'):
+        db.session.execute(text(f"DELETE FROM camara.{tabela} WHERE id_projeto = ANY(:ids)"), {"ids": list(IDS)})
+    db.session.commit()
+
+def test_carga_pela_staging_grava_nas_tabelas_de_destino(app_pg):
+    with app_pg.app_context():
+        try:
+            #Dois na fila de falhas: só sai quem a carga gravou
+            for id_projeto in (IDS[0], IDS[3]):
+                db.session.execute(text(
+                    "INSERT INTO camara.tb_fila_falhas (id_projeto, classe_erro, tentativas) VALUES (:id, 'HTTPError', 1)"
+                ), {"id": id_projeto})
+            db.session.commit()
+
+            staging = CargaStaging(db.engine, "TESTE", tamanho_bloco=2)
+            staging.adicionar([
+                item(IDS[0], titulo='Com "aspas", vírgula\ne quebra de linha', descricao='', temas=(1, 2), sequencias=(1, 2)),
+                item(IDS[1], despacho=r'\N', sequencias=(1,)),
+                #Repetido: vale a última versão
+                item(IDS[0], titulo='Versão final', descricao='', temas=(2,))
+            ])
+            staging.adicionar([item(IDS[2], temas=(999,))])
+            assert staging.mesclar() == (3, 0, 3, 2)
+
+            #'' continua texto vazio e None continua NULL; nenhum texto vira NULL
+            assert linhas("SELECT id_projeto, titulo_projeto, descricao, despacho FROM camara.tb_projeto WHERE id_projeto = ANY(:ids) ORDER BY 1") == [
+                (IDS[0], 'Versão final', '', None),
+                (IDS[1], 'Projeto da staging', None, r'\N'),
+                (IDS[2], 'Projeto da staging', None, None)
+            ]
+            assert linhas("SELECT id_projeto, sequencia FROM camara.rl_tramitacoes WHERE id_projeto = ANY(:ids) ORDER BY 1, 2") == [
+                (IDS[0], 1), (IDS[0], 2), (IDS[1], 1)
+            ]
+            #Tema desconhecido (999) fica de fora
+            assert linhas("SELECT id_projeto, ids_temas FROM camara.projeto_card WHERE id_projeto = ANY(:ids) ORDER BY 1") == [
+                (IDS[0], [1, 2]), (IDS[1], []), (IDS[2], [])
+            ]
+            assert linhas("SELECT id_projeto FROM camara.tb_fila_falhas WHERE id_projeto = ANY(:ids)") == [(IDS[3],)]
+            #A staging some no fim
+            assert db.session.execute(text("SELECT count(*) FROM pg_class WHERE relname LIKE 'stg\\_%' AND relpersistence = 't'")).scalar() == 0
+        finally:
+            db.session.rollback()
+            apagar()
+
+def test_cargas_concorrentes_nao_misturam_as_stagings(app_pg):
+    with app_pg.app_context():
+        try:
+            primeira = CargaStaging(db.engine, "TESTE (1)")
+            segunda = CargaStaging(db.engine, "TESTE (2)")
+            primeira.adicionar([item(IDS[0]), item(IDS[1])])
+            segunda.adicionar([item(IDS[3])])
+
+            assert segunda.mesclar()[:2] == (1, 0)
+            assert primeira.mesclar()[:2] == (2, 0)
+            assert [linha.id_projeto for linha in linhas("SELECT id_projeto FROM camara.tb_projeto WHERE id_projeto = ANY(:ids) ORDER BY 1")] == [IDS[0], IDS[1], IDS[3]]
+        finally:
+            db.session.rollback()
+            apagar()
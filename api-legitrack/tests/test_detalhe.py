@@ -0,0 +1,52 @@
+from sqlalchemy import text
+
+from app import db
+
+def test_detalhe_do_projeto_com_etag_e_304(app_pg, contar_consultas):
+    cliente = app_pg.test_client()
+
+    resposta = cliente.get("/projetos/1234")
+    assert resposta.status_code == 200
+    assert resposta.json["informacoes"]["titulo"] == "Projeto de teste 1234"
+    assert resposta.json["status_tramitacao_atual"]["descricao_situacao"] == "Situação 5"
+    etag = resposta.headers["ETag"]
+
+    #Versão igual: 304 vazio, com uma consulta só
+    with contar_consultas(db.engine) as consultas:
+        nao_modificado = cliente.get("/projetos/1234", headers={"If-None-Match": etag})
+    assert nao_modificado.status_code == 304
+    assert nao_modificado.data == b""
+    assert nao_modificado.headers["ETag"] == etag
+    assert len(consultas) == 1
+
+    assert cliente.get("/projetos/999999").status_code == 404
+
+def test_tramitacoes_paginadas_e_etag_muda_com_tramitacao_nova(app_pg):
+    cliente = app_pg.test_client()
+
+    primeira = cliente.get("/projetos/tramitacoes/1235?tamanho_pagina=2")
+    assert [t["sequencia"] for t in primeira.json["tramitacoes"]] == [3, 2]
+    segunda = cliente.get(f"/projetos/tramitacoes/1235?tamanho_pagina=2&cursor={primeira.json['next_cursor']}")
+    assert [t["sequencia"] for t in segunda.json["tramitacoes"]] == [1]
+    assert segunda.json["next_cursor"] is None
+
+    etag = primeira.headers["ETag"]
+    assert cliente.get("/projetos/tramitacoes/1235?tamanho_pagina=2", headers={"If-None-Match": etag}).status_code == 304
+
+    with app_pg.app_context():
+        db.session.execute(text("""
+            INSERT INTO camara.rl_tramitacoes (id_projeto, sequencia, data_hora, id_situacao, id_tramitacao)
+            VALUES (1235, 4, timestamp '2025-02-01 10:30', 2, 2)
+        """))
+        db.session.commit()
+    try:
+        atualizada = cliente.get("/projetos/tramitacoes/1235?tamanho_pagina=2", headers={"If-None-Match": etag})
+        assert atualizada.status_code == 200
+        assert atualizada.headers["ETag"] != etag
+        assert atualizada.json["tramitacoes"][0] == {
+            "sequencia": 4, "data": "2025-02-01", "hora": "10:30", "situacao": "Situação 2", "tramitacao": "Tramitação 2"
+        }
+    finally:
+        with app_pg.app_context():
+            db.session.execute(text("DELETE FROM camara.rl_tramitacoes WHERE id_projeto = 1235 AND sequencia = 4"))
+            db.session.commit()
@@ -0,0 +1,49 @@
+import json
+
+from sqlalchemy import text
+
+from app import db, exportacao
+
+def exportar(cliente, url):
+    resposta = cliente.get(url)
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/x-ndjson'
+    assert resposta.is_streamed
+    return [json.loads(linha) for linha in resposta.data.decode('utf-8').splitlines()]
+
+def test_exporta_projetos_por_tema_e_data_em_lotes(app_pg, contar_consultas, monkeypatch):
+    monkeypatch.setattr(exportacao, 'TAMANHO_LOTE_EXPORTACAO', 97)
+    cliente = app_pg.test_client()
+
+    with contar_consultas(db.engine) as consultas:
+        projetos = exportar(cliente, "/export/projetos.ndjson?tema=7")
+    with app_pg.app_context():
+        esperados = db.session.execute(text("""
+            SELECT p.id_projeto FROM camara.tb_projeto p JOIN camara.rl_temas t ON t.id_projeto = p.id_projeto
+            WHERE t.id_tema = 7 ORDER BY p.data_hora DESC NULLS LAST, p.id_projeto DESC
+        """)).scalars().all()
+    assert [projeto["id"] for projeto in projetos] == esperados
+    #Um lote por consulta, nunca tudo de uma vez
+    assert len(consultas) > len(esperados) // 97
+
+    recentes = exportar(cliente, "/export/projetos.ndjson?since=2025-12-01T00:00:00")
+    assert recentes
+    assert all(projeto["ultima_data"] >= "2025-12-01T00:00:00" for projeto in recentes)
+
+def test_exporta_tramitacoes(app_pg, monkeypatch):
+    monkeypatch.setattr(exportacao, 'TAMANHO_LOTE_EXPORTACAO', 50)
+    cliente = app_pg.test_client()
+
+    tramitacoes = exportar(cliente, "/export/tramitacoes.ndjson?tema=7&since=2025-01-03")
+    #Tema 7: 500 projetos; só as sequências 2 e 3 são de 2025-01-03 em diante
+    assert len(tramitacoes) == 500 * 2
+    chaves = [(t["id_projeto"], t["sequencia"]) for t in tramitacoes]
+    assert chaves == sorted(set(chaves))
+    assert tramitacoes[0]["ds_situacao"] == "Situação 3"
+
+def test_exportacao_valida_parametros(app_pg):
+    cliente = app_pg.test_client()
+
+    assert cliente.get("/export/usuarios.ndjson").status_code == 404
+    assert cliente.get("/export/projetos.ndjson?since=ontem").status_code == 400
+    assert cliente.get("/export/projetos.ndjson?tema=x").status_code == 400
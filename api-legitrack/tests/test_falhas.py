@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import text
+
+from app import db, worker
+from app.camara import CamaraClient
+from app.falhas import (BACKOFF_BASE, BACKOFF_MAXIMO, MAX_TENTATIVAS, gravar_com_fila, proxima_tentativa,
+                        rearmar_falhas, reprocessar_falhas)
+from app.limitador import LimitadorAdaptativo
+from benchmarks.fake_camara import iniciar_servidor
+
+IDS = (930001, 930002, 930003)
+
+def test_backoff_dobra_a_cada_tentativa_ate_o_maximo():
+    agora = datetime(2025, 1, 1)
+    assert proxima_tentativa(1, agora) == agora + BACKOFF_BASE
+    assert proxima_tentativa(2, agora) == agora + 2 * BACKOFF_BASE
+    assert proxima_tentativa(4, agora) == agora + 8 * BACKOFF_BASE
+    assert proxima_tentativa(MAX_TENTATIVAS - 1, agora) == agora + BACKOFF_MAXIMO
+
+def test_desiste_depois_do_maximo_de_tentativas():
+    assert proxima_tentativa(MAX_TENTATIVAS, datetime(2025, 1, 1)) is None
+
+'''
+=================== Fila no Postgres ===================
+'''
+
+def item(id_projeto, id_situacao=1):
+    projeto = {
+        "id_projeto": id_projeto, "titulo_projeto": f"Falha {id_projeto}", "descricao": f"PL {id_projeto}/2025",
+        "ano_inicio": "2025", "data_hora": None, "sigla_orgao": "PLEN", "despacho": None,
+        "id_ultima_situacao": id_situacao, "id_ultima_tramitacao": 1
+    }
+    return {"id_projeto": id_projeto, "projeto": projeto, "tramitacoes": [], "temas": []}
+
+def fila():
+    consulta = text("SELECT id_projeto, tentativas, proxima_tentativa FROM camara.tb_fila_falhas WHERE id_projeto = ANY(:ids) ORDER BY 1")
+    return {id_projeto: (tentativas, proxima) for id_projeto, tentativas, proxima in db.session.execute(consulta, {"ids": list(IDS)})}
+
+def enfileirar(id_projeto, tentativas, proxima):
+    db.session.execute(text(
+        "INSERT INTO camara.tb_fila_falhas (id_projeto, classe_erro, erro, tentativas, proxima_tentativa) "
+        "VALUES (:id, 'HTTPError', 'teste', :tentativas, :proxima)"
+    ), {"id": id_projeto, "tentativas": tentativas, "proxima": proxima})
+    db.session.commit()
+
+def apagar():
+    for tabela in ('rl_tramitacoes', 'rl_temas', 'tb_fila_falhas', 'tb_projeto'):
+        db.session.execute(text(f"DELETE FROM camara.{tabela} WHERE id_projeto = ANY(:ids)"), {"ids": list(IDS)})
+    db.session.commit()
+
+def test_gravar_com_fila_enfileira_falhas_e_tira_quem_gravou(app_pg):
+    with app_pg.app_context():
+        try:
+            #O primeiro já estava na fila e agora grava; o segundo falha na gravação (FK); o terceiro falhou na busca
+            enfileirar(IDS[0], 3, datetime.now())
+            erros = [(IDS[2], TimeoutError("sem resposta"))]
+            novos, _, _, falhas = gravar_com_fila([item(IDS[0]), item(IDS[1], id_situacao=9999)], erros, "TESTE")
+
+            assert novos == 1 and [id_projeto for id_projeto, _ in falhas] == [IDS[1]]
+            assert sorted(fila()) == [IDS[1], IDS[2]]
+            assert all(tentativas == 1 and proxima > datetime.now() for tentativas, proxima in fila().values())
+
+            #Falhou de novo: a tentativa conta e o intervalo dobra
+            gravar_com_fila([], [(IDS[2], TimeoutError("sem resposta"))], "TESTE")
+            tentativas, proxima = fila()[IDS[2]]
+            assert tentativas == 2 and proxima > datetime.now() + BACKOFF_BASE
+        finally:
+            apagar()
+
+def test_reprocessar_falhas_busca_so_as_vencidas(app_pg):
+    servidor, url_base = iniciar_servidor(id_inicial=IDS[0], total_projetos=len(IDS))
+    cliente = CamaraClient(url_base=url_base, backoff=0.01, limitador=LimitadorAdaptativo(taxa_inicial=1000, taxa_maxima=1000))
+    with app_pg.app_context():
+        try:
+            #Códigos de situação, tramitação e tema que a Câmara falsa usa
+            with mock.patch.object(worker, 'camara', cliente):
+                worker.sicronizar_tabelas_referencia()
+
+            enfileirar(IDS[0], 2, datetime.now() - timedelta(minutes=1))
+            enfileirar(IDS[1], 2, datetime.now() + timedelta(hours=1))
+            reprocessar_falhas(cliente, concorrencia=2)
+
+            assert list(fila()) == [IDS[1]]
+            gravados = db.session.execute(text("SELECT id_projeto FROM camara.tb_projeto WHERE id_projeto = ANY(:ids)"), {"ids": list(IDS)}).scalars().all()
+            assert gravados == [IDS[0]]
+        finally:
+            apagar()
+            servidor.shutdown()
+
+def test_quem_esgotou_as_tentativas_ganha_mais_uma_depois_das_referencias(app_pg):
+    with app_pg.app_context():
+        try:
+            enfileirar(IDS[0], MAX_TENTATIVAS, None)
+            enfileirar(IDS[1], 2, datetime.now() + timedelta(hours=1))
+            rearmar_falhas()
+
+            tentativas, proxima = fila()[IDS[0]]
+            assert tentativas == MAX_TENTATIVAS - 1 and proxima <= datetime.now()
+            #Quem ainda está no backoff não é mexido
+            assert fila()[IDS[1]][0] == 2
+
+            #Se falhar de novo, desiste até a próxima sincronização
+            gravar_com_fila([], [(IDS[0], TimeoutError("sem resposta"))], "TESTE")
+            assert fila()[IDS[0]] == (MAX_TENTATIVAS, None)
+        finally:
+            apagar()
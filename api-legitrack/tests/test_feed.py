@@ -0,0 +1,87 @@
+import os
+from datetime import datetime
+from unittest import mock
+
+from sqlalchemy import text
+
+from app import db
+from app.feed import atualizar_feeds, recalcular_feeds
+from app.gravacao import confirmar_lote
+
+CAMPOS_PROJETO = ('id_projeto', 'titulo_projeto', 'descricao', 'ano_inicio', 'data_hora', 'sigla_orgao', 'despacho', 'id_ultima_situacao', 'id_ultima_tramitacao')
+
+ID_USUARIO = 5
+
+def ids_do_feed(cliente, id_user, maximo_paginas=100):
+    vistos = []
+    cursor = None
+    for _ in range(maximo_paginas):
+        resposta = cliente.get(f"/feed/{id_user}?tamanho_pagina=40" + (f"&cursor={cursor}" if cursor else ""))
+        assert resposta.status_code == 200
+        vistos += [projeto['id'] for projeto in resposta.json['projetos']]
+        cursor = resposta.json['next_cursor']
+        if not cursor:
+            return vistos
+    raise AssertionError(f"paginação não terminou em {maximo_paginas} páginas")
+
+def feed_esperado(id_user):
+    return db.session.execute(text("""
+        SELECT p.id_projeto FROM camara.tb_projeto p
+        WHERE p.id_projeto IN (
+            SELECT t.id_projeto FROM camara.rl_temas t JOIN usuarios.tb_interesses i ON i.id_interesse = t.id_tema WHERE i.id_user = :u
+            UNION SELECT id_projeto FROM usuarios.rl_favoritos WHERE id_user = :u
+        )
+        ORDER BY p.data_hora DESC NULLS LAST, p.id_projeto DESC
+    """), {"u": id_user}).scalars().all()
+
+def test_feed_junta_temas_e_favoritos_paginado(app_pg):
+    cliente = app_pg.test_client()
+
+    with app_pg.app_context():
+        esperados = feed_esperado(ID_USUARIO)
+    assert ids_do_feed(cliente, ID_USUARIO) == esperados
+    assert cliente.get("/feed/999999").status_code == 404
+
+def test_feed_pre_calculado_igual_ao_direto_e_incremental(app_pg):
+    cliente = app_pg.test_client()
+
+    with mock.patch.dict(os.environ, {'FEED_PRECALCULADO': '1'}):
+        with app_pg.app_context():
+            #Pequeno, para as páginas passarem do que está guardado para a consulta direta
+            recalcular_feeds(maximo=150)
+            esperados = feed_esperado(ID_USUARIO)
+        assert ids_do_feed(cliente, ID_USUARIO) == esperados
+
+        #Projeto novo num tema que o usuário segue, gravado pelo caminho do worker, entra no topo do feed
+        with app_pg.app_context():
+            id_tema = db.session.execute(text("SELECT id_interesse FROM usuarios.tb_interesses WHERE id_user = :u LIMIT 1"), {"u": ID_USUARIO}).scalar()
+            projeto = dict.fromkeys(CAMPOS_PROJETO)
+            projeto.update(id_projeto=900001, titulo_projeto="Novo", data_hora=datetime(2030, 1, 1))
+            item = {"id_projeto": 900001, "projeto": projeto, "tramitacoes": [], "temas": [{"id_projeto": 900001, "id_tema": id_tema}]}
+            try:
+                assert confirmar_lote([item], "TESTE")[3] == []
+                assert ids_do_feed(cliente, ID_USUARIO)[0] == 900001
+            finally:
+                db.session.execute(text("DELETE FROM camara.rl_temas WHERE id_projeto = 900001"))
+                db.session.execute(text("DELETE FROM camara.tb_projeto WHERE id_projeto = 900001"))
+                db.session.commit()
+
+def test_feed_vazio_recebe_projeto_novo(app_pg):
+    with app_pg.app_context():
+        #Usuário que segue um tema mas ainda não tem nada guardado no feed
+        id_user, id_tema = db.session.execute(text("SELECT id_user, id_interesse FROM usuarios.tb_interesses WHERE id_user <> :u LIMIT 1"), {"u": ID_USUARIO}).one()
+        db.session.execute(text("DELETE FROM usuarios.tb_feed WHERE id_user = :u"), {"u": id_user})
+        db.session.execute(text(
+            "INSERT INTO camara.tb_projeto (id_projeto, titulo_projeto, data_hora) VALUES (900002, 'Novo', '2030-01-01')"
+        ))
+        db.session.execute(text("INSERT INTO camara.rl_temas (id_projeto, id_tema) VALUES (900002, :t)"), {"t": id_tema})
+        db.session.commit()
+        try:
+            atualizar_feeds([900002])
+            feed = db.session.execute(text("SELECT id_projeto FROM usuarios.tb_feed WHERE id_user = :u"), {"u": id_user}).scalars().all()
+            assert feed == [900002]
+        finally:
+            db.session.execute(text("DELETE FROM usuarios.tb_feed WHERE id_projeto = 900002"))
+            db.session.execute(text("DELETE FROM camara.rl_temas WHERE id_projeto = 900002"))
+            db.session.execute(text("DELETE FROM camara.tb_projeto WHERE id_projeto = 900002"))
+            db.session.commit()
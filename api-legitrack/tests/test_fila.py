@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.fila import enfileirar, reservar, confirmar
+
+IDS = list(range(930001, 930011))
+
+def na_fila():
+    return db.session.execute(text(
+        "SELECT id_projeto, reservado_por FROM camara.tb_fila_projetos WHERE id_projeto = ANY(:ids) ORDER BY 1"
+    ), {"ids": IDS}).all()
+
+@pytest.fixture
+def fila(app_pg):
+    with app_pg.app_context():
+        enfileirar(IDS)
+        db.session.commit()
+        try:
+            yield db.engine
+        finally:
+            db.session.rollback()
+            db.session.execute(text("DELETE FROM camara.tb_fila_projetos WHERE id_projeto = ANY(:ids)"), {"ids": IDS})
+            db.session.commit()
+
+def reservar_e_commitar(engine, consumidor, **kwargs):
+    with engine.begin() as conexao:
+        return [id_projeto for id_projeto, _ in reservar(conexao, consumidor, **kwargs)]
+
+def test_reservas_concorrentes_pegam_lotes_disjuntos(fila):
+    #A primeira réplica ainda está com a transação da reserva aberta quando a segunda reserva
+    with fila.connect() as conexao_a, fila.connect() as conexao_b:
+        reservados_a = [id_projeto for id_projeto, _ in reservar(conexao_a, "a", quantidade=4)]
+        reservados_b = [id_projeto for id_projeto, _ in reservar(conexao_b, "b", quantidade=len(IDS))]
+        conexao_a.commit()
+        conexao_b.commit()
+
+    assert len(reservados_a) == 4
+    assert not set(reservados_a) & set(reservados_b)
+    assert sorted(reservados_a + reservados_b) == IDS
+
+def test_reserva_vencida_volta_para_outra_replica(fila):
+    #Visibilidade zero: a réplica "a" morreu logo depois de reservar
+    assert reservar_e_commitar(fila, "a", visibilidade=timedelta(0)) == IDS
+    with fila.begin() as conexao:
+        redistribuidos = reservar(conexao, "b")
+    assert redistribuidos == [(id_projeto, 2) for id_projeto in IDS]
+
+    #O ack atrasado de "a" não apaga o que agora é de "b"
+    confirmar(IDS, "a")
+    db.session.commit()
+    assert na_fila() == [(id_projeto, "b") for id_projeto in IDS]
+
+def test_ack_so_vale_com_o_commit(fila):
+    reservados = reservar_e_commitar(fila, "a")
+    assert reservados == IDS
+
+    confirmar(reservados, "a")
+    db.session.rollback()
+    assert len(na_fila()) == len(IDS)
+
+    confirmar(reservados, "a")
+    db.session.commit()
+    assert na_fila() == []
+
+def test_reenfileirar_projeto_reservado_nao_perde_a_mudanca(fila):
+    reservados = reservar_e_commitar(fila, "a")
+    assert reservados == IDS
+    #Nada visível enquanto a reserva de "a" vale
+    assert reservar_e_commitar(fila, "b") == []
+
+    #O projeto mudou de novo enquanto "a" ainda o processava
+    assert enfileirar(IDS[:2]) == 2
+    db.session.commit()
+
+    #O ack de "a" não tira os dois da fila: eles voltam, com a tentativa contada
+    confirmar(reservados, "a")
+    db.session.commit()
+    assert na_fila() == [(id_projeto, None) for id_projeto in IDS[:2]]
+    with fila.begin() as conexao:
+        assert reservar(conexao, "b") == [(id_projeto, 2) for id_projeto in IDS[:2]]
+
+def test_enfileirar_ignora_quem_ja_esta_esperando(fila):
+    assert enfileirar(IDS) == 0
+    db.session.commit()
+    assert len(na_fila()) == len(IDS)
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import db
+from app.gravacao import gravar_lote, confirmar_lote
+
+IDS = (910001, 910002, 910003)
+
+def item(id_projeto, id_situacao=1):
+    projeto = {
+        "id_projeto": id_projeto, "titulo_projeto": f"Gravação {id_projeto}", "descricao": f"PL {id_projeto}/2025",
+        "ano_inicio": "2025", "data_hora": None, "sigla_orgao": "PLEN", "despacho": None,
+        "id_ultima_situacao": id_situacao, "id_ultima_tramitacao": 1
+    }
+    tramitacoes = [{"id_projeto": id_projeto, "sequencia": 1, "data_hora": datetime(2025, 1, 1), "id_situacao": 1, "id_tramitacao": 1}]
+    return {"id_projeto": id_projeto, "projeto": projeto, "tramitacoes": tramitacoes, "temas": [{"id_projeto": id_projeto, "id_tema": 1}]}
+
+def gravados():
+    return db.session.execute(text("SELECT id_projeto FROM camara.tb_projeto WHERE id_projeto = ANY(:ids) ORDER BY 1"), {"ids": list(IDS)}).scalars().all()
+
+def apagar():
+    for tabela in ('rl_tramitacoes', 'rl_temas', 'tb_projeto'):
+        db.session.execute(text(f"DELETE FROM camara.{tabela} WHERE id_projeto = ANY(:ids)"), {"ids": list(IDS)})
+    db.session.commit()
+
+def test_projeto_com_fk_invalida_nao_derruba_o_lote(app_pg):
+    with app_pg.app_context():
+        try:
+            #Situação 9999 não existe em tp_situacao: o lote falha e cai para um SAVEPOINT por projeto
+            novos, atualizados, tramitacoes_novas, falhas = gravar_lote([item(IDS[0]), item(IDS[1], id_situacao=9999), item(IDS[2])], "TESTE")
+            db.session.commit()
+
+            assert (novos, atualizados, tramitacoes_novas) == (2, 0, 2)
+            assert [id_projeto for id_projeto, _ in falhas] == [IDS[1]]
+            assert gravados() == [IDS[0], IDS[2]]
+            #Os que entraram ganharam o card na mesma transação
+            assert db.session.execute(text("SELECT count(*) FROM camara.projeto_card WHERE id_projeto = ANY(:ids)"), {"ids": list(IDS)}).scalar() == 2
+        finally:
+            apagar()
+
+def test_regravar_o_mesmo_lote_nao_insere_nada(app_pg):
+    with app_pg.app_context():
+        try:
+            lote = [item(id_projeto) for id_projeto in IDS]
+            assert confirmar_lote(lote, "TESTE") == (3, 0, 3, [])
+
+            novos, atualizados, tramitacoes_novas, falhas = confirmar_lote(lote, "TESTE")
+            assert (novos, tramitacoes_novas, falhas) == (0, 0, [])
+            assert atualizados == 3
+            assert db.session.execute(text("SELECT count(*) FROM camara.rl_temas WHERE id_projeto = ANY(:ids)"), {"ids": list(IDS)}).scalar() == 3
+        finally:
+            apagar()
@@ -0,0 +1,85 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+import requests
+
+from app.camara import CamaraClient
+from app.limitador import CircuitoAberto, Disjuntor, LimitadorAdaptativo
+
+def test_limitador_respeita_a_taxa():
+    limitador = LimitadorAdaptativo(taxa_inicial=50, taxa_maxima=50, rajada=1)
+    inicio = time.monotonic()
+    for _ in range(11):
+        limitador.adquirir()
+    assert time.monotonic() - inicio >= 0.18
+
+def test_limitador_reduz_com_429_e_sobe_aos_poucos():
+    limitador = LimitadorAdaptativo(taxa_inicial=10, taxa_minima=1, taxa_maxima=12, aumento=1, intervalo_reducao=0)
+    limitador.registrar(429, 0.1)
+    assert limitador.taxa == 5
+    limitador.registrar(503, 0.1)
+    assert limitador.taxa == 2.5
+
+    for _ in range(20):
+        limitador.registrar(200, 0.1)
+    assert limitador.taxa == 12
+
+    limitador.registrar(200, 10.0)
+    assert limitador.taxa == pytest.approx(10.8)
+
+def test_limitador_reduz_uma_vez_por_intervalo():
+    limitador = LimitadorAdaptativo(taxa_inicial=8, intervalo_reducao=60)
+    for _ in range(5):
+        limitador.registrar(429, 0.1)
+    assert limitador.taxa == 4
+
+def test_disjuntor_abre_testa_e_fecha():
+    disjuntor = Disjuntor(limite_falhas=2, tempo_aberto=0.2, espera_maxima=5)
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == Disjuntor.FECHADO
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == Disjuntor.ABERTO
+
+    inicio = time.monotonic()
+    disjuntor.permitir()
+    assert time.monotonic() - inicio >= 0.15
+    assert disjuntor.estado == Disjuntor.MEIO_ABERTO
+
+    #Só uma sonda por vez: a segunda chamada espera o resultado da primeira
+    liberada = threading.Event()
+    threading.Thread(target=lambda: (disjuntor.permitir(), liberada.set()), daemon=True).start()
+    assert not liberada.wait(0.1)
+
+    disjuntor.registrar_sucesso()
+    assert liberada.wait(1)
+    assert disjuntor.estado == Disjuntor.FECHADO
+
+def test_disjuntor_reabre_se_a_sonda_falha_e_desiste_apos_espera_maxima():
+    disjuntor = Disjuntor(limite_falhas=1, tempo_aberto=0.1, espera_maxima=0.3)
+    disjuntor.registrar_falha()
+    disjuntor.permitir()
+
+    disjuntor.tempo_aberto = 10
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == Disjuntor.ABERTO
+    with pytest.raises(CircuitoAberto):
+        disjuntor.permitir()
+
+def test_sonda_com_erro_fora_de_conexao_reabre_o_circuito():
+    disjuntor = Disjuntor(limite_falhas=1, tempo_aberto=0.1, espera_maxima=2)
+    cliente = CamaraClient(url_base="http://camara.teste", tentativas=0, disjuntor=disjuntor,
+                           limitador=LimitadorAdaptativo(taxa_inicial=1000, taxa_maxima=1000))
+    disjuntor.registrar_falha()
+
+    ok = mock.Mock(status_code=200, content=b'{"dados": []}')
+    with mock.patch.object(cliente.session, 'get', side_effect=[requests.exceptions.ChunkedEncodingError("corpo truncado"), ok]):
+        #A sonda falha com um erro que não é de conexão: o circuito abre de novo, não fica preso
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            cliente.get_json("/proposicoes")
+        assert disjuntor.estado == Disjuntor.ABERTO
+
+        #Passado tempo_aberto, a próxima sonda vai à rede e fecha o circuito
+        assert cliente.get_json("/proposicoes") == {"dados": []}
+    assert disjuntor.estado == Disjuntor.FECHADO
@@ -0,0 +1,32 @@
+import pytest
+from flask import Flask, g
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.metricas import endpoint_da_url, instrumentar_app
+
+URL_BASE = "https://dadosabertos.camara.leg.br/api/v2"
+
+def test_endpoint_da_url_troca_ids_por_marcador():
+    assert endpoint_da_url(f"{URL_BASE}/proposicoes/2345/tramitacoes", URL_BASE) == "/proposicoes/{id}/tramitacoes"
+    assert endpoint_da_url(f"{URL_BASE}/proposicoes/2345", URL_BASE) == "/proposicoes/{id}"
+    assert endpoint_da_url(f"{URL_BASE}/proposicoes?pagina=2&itens=100", URL_BASE) == "/proposicoes"
+    assert endpoint_da_url(f"{URL_BASE}/referencias/proposicoes/codTema", URL_BASE) == "/referencias/proposicoes/codTema"
+
+def test_consulta_que_falha_nao_deixa_inicio_para_tras():
+    app = Flask(__name__)
+    instrumentar_app(app)
+    engine = create_engine("sqlite://")
+
+    with engine.connect() as conexao:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conexao.execute(text("SELECT * FROM tabela_que_nao_existe"))
+            conexao.rollback()
+        assert isinstance(conexao.info['inicio_consulta'], float)
+
+        #A próxima consulta que dá certo mede só o próprio tempo e limpa o instante
+        with app.test_request_context("/"):
+            conexao.execute(text("SELECT 1"))
+            assert 0 <= g.tempo_db < 1
+        assert 'inicio_consulta' not in conexao.info
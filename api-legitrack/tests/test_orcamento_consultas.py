@@ -0,0 +1,42 @@
+from sqlalchemy import text
+
+from app import db
+
+#Consultas ao banco por requisição. Estourou? Provavelmente voltou um lazy load (N+1)
+ORCAMENTO_LISTA = 1
+
+def test_lista_de_projetos_cabe_no_orcamento(app_pg, contar_consultas):
+    cliente = app_pg.test_client()
+
+    #Tamanhos diferentes para não cair no cache da rota
+    for corpo in ({"ids_temas": [], "tamanho_pagina": 40}, {"ids_temas": [2, 3], "tamanho_pagina": 41}):
+        with contar_consultas(db.engine) as consultas:
+            resposta = cliente.post('/projetos_iniciais', json=corpo)
+
+        assert resposta.status_code == 200
+        assert len(resposta.json['projetos']) == corpo["tamanho_pagina"]
+        assert resposta.json['projetos'][0]['ultima_situação'].startswith("Situação")
+        assert len(consultas) <= ORCAMENTO_LISTA, consultas
+
+def test_paginas_percorrem_todos_os_projetos_do_tema(app_pg):
+    cliente = app_pg.test_client()
+    vistos = []
+    cursor = None
+    for _ in range(100):
+        corpo = {"ids_temas": [7], "tamanho_pagina": 37}
+        if cursor:
+            corpo["cursor"] = cursor
+        resposta = cliente.post('/projetos_iniciais', json=corpo).json
+        vistos += [projeto['id'] for projeto in resposta['projetos']]
+        cursor = resposta['next_cursor']
+        if not cursor:
+            break
+    else:
+        raise AssertionError("paginação não terminou em 100 páginas")
+
+    with app_pg.app_context():
+        esperados = db.session.execute(text("""
+            SELECT p.id_projeto FROM camara.tb_projeto p JOIN camara.rl_temas t ON t.id_projeto = p.id_projeto
+            WHERE t.id_tema = 7 ORDER BY p.data_hora DESC NULLS LAST, p.id_projeto DESC
+        """)).scalars().all()
+    assert vistos == esperados
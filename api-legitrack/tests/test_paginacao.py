@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import pytest
+
+from app.paginacao import (
+    TAMANHO_PAGINA_MAXIMO, codificar_cursor, data_do_cursor, decodificar_cursor, fatiar_pagina, tamanho_da_pagina
+)
+
+def test_cursor_ida_e_volta():
+    cursor = codificar_cursor(datetime(2025, 3, 1, 10, 30), 2345)
+    data_hora, id_projeto = decodificar_cursor(cursor, 2)
+    assert (data_do_cursor(data_hora), id_projeto) == (datetime(2025, 3, 1, 10, 30), 2345)
+
+    with pytest.raises(ValueError):
+        decodificar_cursor("lixo", 2)
+    with pytest.raises(ValueError):
+        decodificar_cursor(codificar_cursor(1, 2, 3), 2)
+
+def test_fatiar_pagina_e_tamanho():
+    linhas = [(5, 'e'), (4, 'd'), (3, 'c')]
+    pagina, proximo = fatiar_pagina(linhas, 2, lambda linha: linha)
+    assert pagina == linhas[:2]
+    assert decodificar_cursor(proximo, 2) == [4, 'd']
+    assert fatiar_pagina(linhas, 3, lambda linha: linha) == (linhas, None)
+
+    assert tamanho_da_pagina("10") == 10
+    assert tamanho_da_pagina(0) == 1
+    assert tamanho_da_pagina(10 ** 6) == TAMANHO_PAGINA_MAXIMO
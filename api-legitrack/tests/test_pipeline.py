@@ -0,0 +1,55 @@
+import threading
+
+from app.pipeline import Pipeline
+
+def test_pipeline_entrega_registros_e_erros_para_a_gravacao():
+    def listar():
+        for id_projeto in range(1, 11):
+            yield id_projeto, None
+
+    def buscar(id_projeto, contexto):
+        if id_projeto == 5:
+            raise RuntimeError("falhou")
+        return id_projeto * 10
+
+    def transformar(id_projeto, contexto, resultado):
+        return None if id_projeto == 7 else {"valor": resultado}
+
+    gravados = []
+    pipeline = Pipeline("TESTE", concorrencia=3, tamanho_fila=2, tamanho_lote=4, intervalo_relatorio=999)
+    pipeline.executar(listar, buscar, transformar, gravados.extend)
+
+    por_id = {id_projeto: (registro, erro) for id_projeto, registro, erro in gravados}
+    assert sorted(por_id) == list(range(1, 11))
+    assert isinstance(por_id[5][1], RuntimeError)
+    assert por_id[7] == (None, None)
+    assert por_id[3] == ({"valor": 30}, None)
+    assert pipeline.listagem_completa
+
+def test_listagem_espera_quando_as_filas_estao_cheias():
+    listados = []
+    liberar = threading.Event()
+
+    def listar():
+        for id_projeto in range(1000):
+            listados.append(id_projeto)
+            yield id_projeto, None
+
+    def buscar(id_projeto, contexto):
+        liberar.wait()
+        return id_projeto
+
+    def gravar(lote):
+        pass
+
+    pipeline = Pipeline("TESTE", concorrencia=1, tamanho_fila=5, intervalo_relatorio=999)
+    thread = threading.Thread(target=pipeline.executar, args=(listar, buscar, lambda i, c, r: r, gravar))
+    thread.start()
+
+    threading.Event().wait(0.3)
+    #Uma busca em andamento, a fila cheia e um item esperando o put
+    assert len(listados) <= 1 + 5 + 1
+
+    liberar.set()
+    thread.join(timeout=10)
+    assert len(listados) == 1000
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.cache import cache
+from app.paginacao import codificar_cursor
+
+#Tabelas que crescem com os dados: nenhum plano das rotas pode varrê-las inteiras
+TABELAS_GRANDES = {'tb_projeto', 'projeto_card', 'rl_temas', 'rl_tramitacoes', 'tb_interesses', 'rl_favoritos', 'tb_users'}
+
+#(descrição, método, url, corpo, custo máximo estimado pelo planner por consulta)
+ROTAS = [
+    ("lista sem filtro", "post", "/projetos_iniciais", {"ids_temas": []}, 200),
+    ("lista por tema", "post", "/projetos_iniciais", {"ids_temas": [7, 8]}, 2000),
+    ("lista, página funda", "post", "/projetos_iniciais", {"ids_temas": [], "cursor": codificar_cursor(datetime(2025, 3, 1), 2000)}, 200),
+    ("busca textual", "get", "/projetos/busca?q=educação infantil", None, 2000),
+    ("busca textual por tema", "get", "/projetos/busca?q=educação&tema=8", None, 2000),
+    ("feed do usuário", "get", "/feed/5", None, 2000),
+    ("detalhe do projeto", "get", "/projetos/1234", None, 100),
+    ("tramitações do projeto", "get", "/projetos/tramitacoes/1234", None, 100),
+    ("interesses do usuário", "get", "/interesses/5", None, 100),
+]
+
+def nos_do_plano(plano):
+    yield plano
+    for filho in plano.get('Plans', []):
+        yield from nos_do_plano(filho)
+
+@pytest.mark.parametrize("descricao, metodo, url, corpo, custo_maximo", ROTAS, ids=[rota[0] for rota in ROTAS])
+def test_planos_das_rotas_usam_indices(app_pg, contar_consultas, explicar, descricao, metodo, url, corpo, custo_maximo):
+    cliente = app_pg.test_client()
+    with app_pg.app_context():
+        cache.clear()
+
+    with contar_consultas(db.engine) as consultas:
+        resposta = getattr(cliente, metodo)(url, json=corpo)
+    assert resposta.status_code == 200
+    assert consultas
+
+    for statement, parametros in consultas:
+        plano = explicar(db.engine, statement, parametros)
+        nos = list(nos_do_plano(plano))
+
+        varridas = {no.get('Relation Name') for no in nos if no['Node Type'] == 'Seq Scan'} & TABELAS_GRANDES
+        assert not varridas, f"Seq Scan em {varridas}: {statement}"
+        if any(no.get('Relation Name') in TABELAS_GRANDES for no in nos):
+            assert any('Index' in no['Node Type'] for no in nos), statement
+        assert plano['Total Cost'] <= custo_maximo, f"custo {plano['Total Cost']} > {custo_maximo}: {statement}"
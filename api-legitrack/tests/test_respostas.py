@@ -0,0 +1,42 @@
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from flask import Flask, jsonify
+
+from app.respostas import configurar_respostas, COMPRESSAO_MINIMO
+
+def criar_app():
+    app = Flask(__name__)
+    configurar_respostas(app)
+
+    @app.route("/grande")
+    def grande():
+        return jsonify({"projetos": [{"id": i, "titulo": "Dispõe sobre " * 20, "data": datetime(2025, 1, 2, 3, 4, 5)} for i in range(40)]})
+
+    @app.route("/pequena")
+    def pequena():
+        return jsonify({"valor": Decimal("0.5"), "data": datetime(2025, 1, 2, 3, 4, 5, 600000)})
+
+    return app
+
+def test_json_com_datas_e_decimal():
+    cliente = criar_app().test_client()
+
+    resposta = cliente.get("/pequena", headers={"Accept-Encoding": "gzip"})
+    assert resposta.headers.get("Content-Encoding") is None
+    assert resposta.json == {"valor": "0.5", "data": "2025-01-02T03:04:05.600000"}
+
+def test_comprime_acima_do_minimo_quando_o_cliente_aceita():
+    cliente = criar_app().test_client()
+
+    sem = cliente.get("/grande")
+    assert sem.headers.get("Content-Encoding") is None
+    assert len(sem.data) >= COMPRESSAO_MINIMO
+
+    com = cliente.get("/grande", headers={"Accept-Encoding": "gzip"})
+    assert com.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in com.headers["Vary"]
+    assert len(com.data) < len(sem.data) / 5
+    assert json.loads(gzip.decompress(com.data)) == sem.json
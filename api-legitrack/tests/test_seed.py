@@ -0,0 +1,36 @@
+from argparse import Namespace
+from unittest import mock
+
+import requests
+from sqlalchemy import text
+
+from app import db, seed
+
+def argumentos(anos=None, paginas=None, refazer=False):
+    return Namespace(anos=anos, paginas=paginas, refazer=refazer)
+
+def test_sem_total_de_paginas_a_listagem_e_devolvida_como_erro():
+    falha = requests.exceptions.ConnectionError("API fora do ar")
+    with mock.patch.object(seed.camara, 'total_de_paginas', side_effect=falha):
+        assert seed.montar_unidades(argumentos()) == ([], ['todos'])
+        assert seed.montar_unidades(argumentos(anos="2023,2024")) == ([], ['ano=2023', 'ano=2024'])
+
+def test_paginas_concluidas_sao_puladas_ao_rodar_de_novo(app_pg):
+    with app_pg.app_context():
+        try:
+            assert seed.montar_unidades(argumentos(anos="1999", paginas="1-4")) == ([("ano=1999", p) for p in (1, 2, 3, 4)], [])
+
+            #Só as marcadas 'ok' contam como concluídas: 'erro' e 'pendente' são refeitas
+            seed.marcar_pagina("ano=1999", 1, 'ok')
+            seed.marcar_pagina("ano=1999", 3, 'ok')
+            seed.marcar_pagina("ano=1999", 4, 'erro', "falhou")
+            assert seed.montar_unidades(argumentos(anos="1999", paginas="1-4")) == ([("ano=1999", 2), ("ano=1999", 4)], [])
+
+            #--refazer ignora o checkpoint
+            assert len(seed.montar_unidades(argumentos(anos="1999", paginas="1-4", refazer=True))[0]) == 4
+
+            tentativas = db.session.execute(text("SELECT tentativas FROM camara.tb_carga_paginas WHERE chave = 'ano=1999' AND pagina = 4")).scalar()
+            assert tentativas == 1
+        finally:
+            db.session.execute(text("DELETE FROM camara.tb_carga_paginas WHERE chave = 'ano=1999'"))
+            db.session.commit()
@@ -0,0 +1,154 @@
+import json
+from collections import deque
+from datetime import datetime
+from unittest import mock
+
+import pytest
+import requests
+from sqlalchemy import text
+
+from app import db, worker
+from app.camara import CamaraClient
+from app.limitador import LimitadorAdaptativo
+from app.models import TB_Sincronizacao
+from benchmarks.fake_camara import iniciar_servidor, projeto_sintetico
+
+ID_INICIAL = 920001
+TOTAL_PROJETOS = 250 #Três páginas de 100
+
+'''
+=================== Checkpoint ===================
+'''
+
+def test_checkpoint_so_anda_sobre_ids_contiguos():
+    ids_em_ordem = deque([1, 2, 3, 4, 5])
+    concluidos = {1, 2, 4}
+
+    #O 3 ainda está em voo: o checkpoint para no 2 e o 4 espera
+    assert worker.avancar_checkpoint(ids_em_ordem, concluidos) == 2
+    assert list(ids_em_ordem) == [3, 4, 5] and concluidos == {4}
+
+    assert worker.avancar_checkpoint(ids_em_ordem, concluidos) is None
+
+    concluidos.add(3)
+    assert worker.avancar_checkpoint(ids_em_ordem, concluidos) == 4
+    assert list(ids_em_ordem) == [5]
+
+'''
+=================== Ciclo contra a Câmara falsa ===================
+'''
+
+def projetos_gravados():
+    return db.session.execute(text("SELECT count(*) FROM camara.tb_projeto WHERE id_projeto >= :inicio"), {"inicio": ID_INICIAL}).scalar()
+
+def limpar():
+    for tabela in ("rl_tramitacoes", "rl_temas", "tb_fila_falhas", "tb_projeto"):
+        db.session.execute(text(f"DELETE FROM camara.{tabela} WHERE id_projeto >= :inicio"), {"inicio": ID_INICIAL})
+    db.session.execute(text("DELETE FROM camara.tb_sincronizacao WHERE tarefa = 'projetos'"))
+    db.session.commit()
+
+@pytest.fixture
+def camara_falsa(app_pg, tmp_path):
+    #Respostas gravadas em tmp_path têm prioridade sobre as sintéticas
+    servidor, url_base = iniciar_servidor(id_inicial=ID_INICIAL, total_projetos=TOTAL_PROJETOS, diretorio_dados=str(tmp_path))
+    cliente = CamaraClient(url_base=url_base, backoff=0.01, limitador=LimitadorAdaptativo(taxa_inicial=1000, taxa_maxima=1000))
+    cliente.diretorio_dados = tmp_path
+    with app_pg.app_context(), mock.patch.object(worker, 'camara', cliente):
+        #Códigos de situação, tramitação e tema que a Câmara falsa usa
+        worker.sicronizar_tabelas_referencia()
+        limpar()
+        try:
+            yield cliente
+        finally:
+            db.session.rollback()
+            limpar()
+            servidor.shutdown()
+
+def listagem_que_cai(cliente, paginas_antes_da_queda):
+    paginas = cliente.paginas
+
+    def paginas_interrompidas(caminho, params):
+        for numero, pagina in enumerate(paginas(caminho, params)):
+            if numero == paginas_antes_da_queda:
+                raise requests.exceptions.ConnectionError("queda simulada")
+            yield pagina
+    return paginas_interrompidas
+
+def test_ciclo_interrompido_retoma_do_checkpoint_sem_mover_a_marca_dagua(camara_falsa):
+    with mock.patch.object(camara_falsa, 'paginas', listagem_que_cai(camara_falsa, 1)):
+        worker.sicronizar_projetos(300, concorrencia=4)
+
+    estado = db.session.get(TB_Sincronizacao, 'projetos')
+    db.session.refresh(estado)
+    #Só a primeira página entrou; a janela continua aberta e a marca d'água não andou
+    assert projetos_gravados() == 100
+    assert estado.ultimo_id == ID_INICIAL + 99
+    assert estado.marca_dagua is None
+    janela = (estado.janela_inicio, estado.janela_fim)
+    assert None not in janela
+
+    #O próximo ciclo refaz a mesma janela a partir do checkpoint e só então fecha o ciclo
+    with mock.patch.object(worker, 'buscar_projeto_completo', wraps=worker.buscar_projeto_completo) as buscar:
+        worker.sicronizar_projetos(300, concorrencia=4)
+    assert min(chamada.args[1] for chamada in buscar.call_args_list) == ID_INICIAL + 100
+
+    db.session.refresh(estado)
+    assert projetos_gravados() == TOTAL_PROJETOS
+    assert estado.marca_dagua == janela[1]
+    assert (estado.janela_inicio, estado.janela_fim, estado.ultimo_id) == (None, None, None)
+
+def test_ciclo_que_falha_logo_no_inicio_nao_move_a_marca_dagua(camara_falsa):
+    estado = worker.carregar_estado('projetos')
+    marca_anterior = estado.marca_dagua
+
+    with mock.patch.object(camara_falsa, 'paginas', listagem_que_cai(camara_falsa, 0)):
+        worker.sicronizar_projetos(300, concorrencia=4)
+
+    db.session.refresh(estado)
+    assert projetos_gravados() == 0
+    assert estado.marca_dagua == marca_anterior
+    assert estado.ultimo_id is None and estado.janela_fim is not None
+
+def test_so_busca_o_resto_de_quem_mudou_depois_da_marca_dagua(camara_falsa):
+    estado = worker.carregar_estado('projetos')
+    estado.marca_dagua = datetime(2025, 6, 1, 12, 0)
+    db.session.commit()
+
+    #A listagem devolve o dia inteiro; só estes dois têm status depois da marca d'água (menos a margem)
+    recentes = {ID_INICIAL + 2: "2025-06-01T15:00", ID_INICIAL + 7: "2025-06-01T11:58"}
+    (camara_falsa.diretorio_dados / "proposicoes").mkdir()
+    for id_projeto, data_hora in recentes.items():
+        detalhe = projeto_sintetico(id_projeto)
+        detalhe["statusProposicao"]["dataHora"] = data_hora
+        (camara_falsa.diretorio_dados / "proposicoes" / f"{id_projeto}.json").write_text(json.dumps({"dados": detalhe, "links": []}))
+
+    with mock.patch.object(camara_falsa, 'get_dados', wraps=camara_falsa.get_dados) as get_dados:
+        worker.sicronizar_projetos(300, concorrencia=4)
+
+    caminhos = [chamada.args[0] for chamada in get_dados.call_args_list]
+    assert sorted(int(c.split('/')[2]) for c in caminhos if c.endswith('/tramitacoes')) == sorted(recentes)
+    assert sorted(int(c.split('/')[2]) for c in caminhos if c.endswith('/temas')) == sorted(recentes)
+    assert projetos_gravados() == len(recentes)
+
+    db.session.refresh(estado)
+    assert estado.marca_dagua > datetime(2025, 6, 1, 12, 0)
+
+'''
+=================== Tabelas de referência ===================
+'''
+
+def sincronizar_situacoes():
+    worker.sicronizar_tabelas_tp("/referencias/proposicoes/codSituacao", worker.TP_Situacao, "id_situacao", "ds_situacao", "cod", "nome")
+
+def test_descricao_nova_invalida_o_cache(camara_falsa):
+    #Nada mudou: o cache fica como está
+    with mock.patch.object(worker, 'invalidar_tudo') as invalidar_tudo:
+        sincronizar_situacoes()
+    invalidar_tudo.assert_not_called()
+
+    db.session.execute(text("UPDATE camara.tp_situacao SET ds_situacao = 'Descrição antiga' WHERE id_situacao = 900"))
+    db.session.commit()
+    with mock.patch.object(worker, 'invalidar_tudo') as invalidar_tudo:
+        sincronizar_situacoes()
+    invalidar_tudo.assert_called_once()
+    assert db.session.execute(text("SELECT ds_situacao FROM camara.tp_situacao WHERE id_situacao = 900")).scalar() == "Situação 900"